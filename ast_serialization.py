@@ -0,0 +1,294 @@
+"""
+Serialización Binaria del AST
+Formato compacto y versionado para guardar árboles ya analizados o enviarlos
+a otros procesos sin el costo de pickle
+"""
+
+import struct
+
+from python_compiler import ASTNode, AST_NODE_CLASSES, ProgramNode, StringNode
+
+
+# ============= FORMATO BINARIO =============
+#
+# Cabecera: magic y versión del formato. Luego la tabla de identificadores
+# (nombres, operadores, funciones) y la de literales string, cada una como
+# varint con el número de entradas seguido de (varint longitud, UTF-8).
+# Por último el árbol en preorden: cada valor empieza con una etiqueta.
+#
+# - Etiqueta < len(AST_NODE_CLASSES): nodo de esa clase. Le siguen la línea
+#   (varint zigzag, como delta respecto de la línea del nodo anterior), el
+#   span (0 si no tiene; si no, 1 + delta zigzag del inicio respecto del
+#   span anterior y varint con su longitud), end_line en ProgramNode
+#   (0 o 1 + línea) y sus campos en el orden de `_fields`.
+# - Otras etiquetas: None, booleanos, enteros (varint zigzag), floats (8
+#   bytes), strings (índice varint en su tabla), listas y tuplas (varint con
+#   la longitud seguido de los elementos).
+
+AST_MAGIC = b'PAST'
+AST_FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<4sB')
+_FLOAT = struct.Struct('<d')
+
+(_TAG_NONE, _TAG_TRUE, _TAG_FALSE, _TAG_INT, _TAG_FLOAT, _TAG_IDENTIFIER,
+ _TAG_LITERAL, _TAG_LIST, _TAG_TUPLE) = range(0x40, 0x49)
+
+_KIND_OF = {node_class: kind for kind, node_class in enumerate(AST_NODE_CLASSES)}
+_HAS_LINE = tuple('line' in node_class.__slots__ for node_class in AST_NODE_CLASSES)
+
+
+class ASTFormatError(Exception):
+    """Datos que no son un AST serializado válido"""
+    pass
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def _read_varint(data, position: int):
+    value = 0
+    shift = 0
+    while True:
+        try:
+            byte = data[position]
+        except IndexError:
+            raise ASTFormatError("AST serializado truncado")
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def _write_table(out: bytearray, table: dict):
+    _write_varint(out, len(table))
+    for text in table:
+        encoded = text.encode('utf-8', 'surrogatepass')
+        _write_varint(out, len(encoded))
+        out += encoded
+
+
+def _read_table(data, position: int):
+    count, position = _read_varint(data, position)
+    table = []
+    for _ in range(count):
+        length, position = _read_varint(data, position)
+        end = position + length
+        if end > len(data):
+            raise ASTFormatError("AST serializado truncado")
+        try:
+            table.append(bytes(data[position:end]).decode('utf-8', 'surrogatepass'))
+        except UnicodeDecodeError:
+            raise ASTFormatError("String con UTF-8 inválido en la tabla del AST") from None
+        position = end
+    return table, position
+
+
+def dump_ast(root) -> bytes:
+    """Serializa un AST (cualquier nodo de python_compiler, o una vista de ASTArena)"""
+    body = bytearray()
+    identifiers = {}
+    literals = {}
+    previous_line = 0
+    previous_span = 0
+
+    # (valor, ¿string literal?): recorrido en preorden sin recursión
+    pending = [(root, False)]
+    while pending:
+        value, literal = pending.pop()
+        if isinstance(value, ASTNode):
+            node_class = type(value)
+            kind = _KIND_OF.get(node_class)
+            if kind is None:
+                # Vistas de ASTArena y variantes Statement: subclases de la clase del nodo
+                node_class = node_class.__mro__[1]
+                kind = _KIND_OF.get(node_class)
+                if kind is None:
+                    raise ASTFormatError(f"Nodo no serializable: {node_class.__name__}")
+            body.append(kind)
+            if _HAS_LINE[kind]:
+                line = value.line
+                _write_varint(body, _zigzag(line - previous_line))
+                previous_line = line
+            span = getattr(value, 'span', None)
+            if span is None:
+                body.append(0)
+            else:
+                _write_varint(body, 1 + _zigzag(span[0] - previous_span))
+                _write_varint(body, span[1] - span[0])
+                previous_span = span[0]
+            if node_class is ProgramNode:
+                end_line = getattr(value, 'end_line', None)
+                _write_varint(body, 0 if end_line is None else 1 + end_line)
+            literal = node_class is StringNode
+            fields = node_class._fields
+            for index in range(len(fields) - 1, -1, -1):
+                pending.append((getattr(value, fields[index]), literal))
+        elif value is None:
+            body.append(_TAG_NONE)
+        elif value is True:
+            body.append(_TAG_TRUE)
+        elif value is False:
+            body.append(_TAG_FALSE)
+        elif isinstance(value, int):
+            body.append(_TAG_INT)
+            _write_varint(body, _zigzag(value))
+        elif isinstance(value, float):
+            body.append(_TAG_FLOAT)
+            body += _FLOAT.pack(value)
+        elif isinstance(value, str):
+            table = literals if literal else identifiers
+            body.append(_TAG_LITERAL if literal else _TAG_IDENTIFIER)
+            _write_varint(body, table.setdefault(value, len(table)))
+        elif isinstance(value, (list, tuple)):
+            body.append(_TAG_LIST if isinstance(value, list) else _TAG_TUPLE)
+            _write_varint(body, len(value))
+            pending.extend((item, literal) for item in reversed(value))
+        else:
+            raise ASTFormatError(f"Valor no serializable en el AST: {value!r}")
+
+    out = bytearray(_HEADER.pack(AST_MAGIC, AST_FORMAT_VERSION))
+    _write_table(out, identifiers)
+    _write_table(out, literals)
+    out += body
+    return bytes(out)
+
+
+def load_ast(data: bytes):
+    """Reconstruye el AST serializado con dump_ast()"""
+    if len(data) < _HEADER.size:
+        raise ASTFormatError("AST serializado truncado")
+    magic, version = _HEADER.unpack_from(data)
+    if magic != AST_MAGIC or version != AST_FORMAT_VERSION:
+        raise ASTFormatError("Formato de AST desconocido")
+    position = _HEADER.size
+    identifiers, position = _read_table(data, position)
+    literals, position = _read_table(data, position)
+
+    size = len(data)
+    previous_line = 0
+    previous_span = 0
+    # Valores compuestos a medio construir: [etiqueta o clase, nº de elementos, elementos, línea, span, end_line]
+    stack = []
+    while True:
+        if position >= size:
+            raise ASTFormatError("AST serializado truncado")
+        tag = data[position]
+        position += 1
+
+        if tag < len(AST_NODE_CLASSES):
+            node_class = AST_NODE_CLASSES[tag]
+            line = None
+            if _HAS_LINE[tag]:
+                delta, position = _read_varint(data, position)
+                line = previous_line = previous_line + _unzigzag(delta)
+            span_start, position = _read_varint(data, position)
+            span = None
+            if span_start:
+                previous_span += _unzigzag(span_start - 1)
+                length, position = _read_varint(data, position)
+                span = (previous_span, previous_span + length)
+            if span is not None:
+                # Expresión usada como sentencia: la variante de su clase con `span`
+                node_class = getattr(node_class, 'Statement', node_class)
+            end_line = None
+            if node_class is ProgramNode:
+                end_line, position = _read_varint(data, position)
+                end_line = end_line - 1 if end_line else None
+            stack.append([node_class, len(node_class._fields), [], line, span, end_line])
+            continue
+        if tag == _TAG_LIST or tag == _TAG_TUPLE:
+            count, position = _read_varint(data, position)
+            if count:
+                stack.append([tag, count, [], None, None, None])
+                continue
+            value = [] if tag == _TAG_LIST else ()
+        elif tag == _TAG_IDENTIFIER or tag == _TAG_LITERAL:
+            index, position = _read_varint(data, position)
+            try:
+                value = (identifiers if tag == _TAG_IDENTIFIER else literals)[index]
+            except IndexError:
+                raise ASTFormatError("Índice de string fuera de la tabla")
+        elif tag == _TAG_INT:
+            value, position = _read_varint(data, position)
+            value = _unzigzag(value)
+        elif tag == _TAG_FLOAT:
+            if position + _FLOAT.size > size:
+                raise ASTFormatError("AST serializado truncado")
+            value = _FLOAT.unpack_from(data, position)[0]
+            position += _FLOAT.size
+        elif tag == _TAG_NONE:
+            value = None
+        elif tag == _TAG_TRUE:
+            value = True
+        elif tag == _TAG_FALSE:
+            value = False
+        else:
+            raise ASTFormatError(f"Etiqueta desconocida: {tag:#x}")
+
+        # Entregar el valor a los compuestos que completa
+        while stack:
+            frame = stack[-1]
+            items = frame[2]
+            items.append(value)
+            if len(items) < frame[1]:
+                break
+            stack.pop()
+            kind, _, _, line, span, end_line = frame
+            if kind == _TAG_LIST:
+                value = items
+            elif kind == _TAG_TUPLE:
+                value = tuple(items)
+            else:
+                if line is not None:
+                    items.append(line)
+                value = kind(*items)
+                if span is not None:
+                    value.span = span
+                if end_line is not None:
+                    value.end_line = end_line
+        else:
+            if position != size:
+                raise ASTFormatError("AST serializado con datos sobrantes")
+            return value
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    import pickle
+    from python_compiler import Lexer, Parser
+
+    code = """
+# Programa de prueba
+x = 10
+lista = [1, 2.5, "tres"]
+if x >= 5:
+    print("mayor")
+elif x < 0:
+    print(-x)
+for i in range(3):
+    print(lista[i])
+"""
+
+    ast = Parser(Lexer(code).tokenize()).parse()
+    data = dump_ast(ast)
+    again = dump_ast(load_ast(data))
+
+    print("=" * 80)
+    print("SERIALIZACIÓN BINARIA DEL AST")
+    print("=" * 80)
+    print(f"Formato binario: {len(data)} bytes   pickle: {len(pickle.dumps(ast, pickle.HIGHEST_PROTOCOL))} bytes")
+    print(f"Ida y vuelta idéntica: {'SÍ' if again == data else 'NO'}")
@@ -0,0 +1,914 @@
+"""
+Benchmarks de Rendimiento del Compilador
+Mide el costo de las distintas fases sobre programas generados sintéticamente
+
+Uso:
+    python benchmarks.py            # Ejecuta todos los benchmarks
+    python benchmarks.py lexer      # Ejecuta solo el benchmark indicado
+"""
+
+import os
+import pickle
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from python_compiler import *
+from ast_serialization import dump_ast, load_ast
+from chart_parser import MembershipChecker, grammar_terminals
+from formal_properties import FormalPropertiesAnalyzer, Grammar
+from grammar_analysis import CompiledGrammar, GrammarSets, grammar_sets
+from grammar_reduction import reduce_lr_productions, reduction_report
+from lr_parser import (CompressedLRTables, LALRTableBuilder, LRParser, dump_lr_tables, grammar_hash,
+                       load_lr_tables, shared_lr_tables)
+from semantic_analyzer import SemanticAnalyzer
+from streaming_pipeline import StreamingPipeline
+from tac_generator import TACGenerator
+from tac_interpreter import TACInterpreter
+from token_cache import TokenCache, dump_tokens
+
+
+# ============= PROGRAMAS SINTÉTICOS =============
+
+def generar_programa(bloques: int = 1000) -> str:
+    """
+    Genera un programa válido del subconjunto de Python con `bloques`
+    bloques de nivel superior independientes
+    """
+    lineas = ["y = 7", "contador = 0", "total = 0", ""]
+    for i in range(bloques):
+        lineas.append(f"# Bloque {i}")
+        lineas.append(f"x{i} = {i} * 2 + (y - 3) / 4")
+        lineas.append(f"lista{i} = [1, 2.5, x{i}]")
+        lineas.append(f"if x{i} >= 10:")
+        lineas.append(f"    print(\"mayor\")")
+        lineas.append(f"    contador = contador + 1")
+        lineas.append(f"else:")
+        lineas.append(f"    while contador != 0:")
+        lineas.append(f"        contador = contador - 1  # decrementar")
+        lineas.append(f"for k in range(len(lista{i})):")
+        lineas.append(f"    total = total + lista{i}[k] % 3")
+        lineas.append("")
+    return "\n".join(lineas)
+
+
+def generar_expresiones(lineas: int = 5000) -> str:
+    """Genera un programa de asignaciones con expresiones largas y anidadas"""
+    programa = ["a = 1", "b = 2", "c = 3"]
+    for i in range(lineas):
+        programa.append(f"v{i} = (a + {i}) * b - c / 2 % 7 + -a * (b - {i} + c * 3) ** 2 >= a * b + 1")
+    return "\n".join(programa)
+
+
+def generar_bloques_anidados(profundidad: int) -> str:
+    """
+    Genera `profundidad` sentencias if anidadas; la indentación del nivel k
+    usa k // 4 tabuladores (cada uno vale 4 niveles) y k % 4 espacios
+    """
+    lineas = []
+    for k in range(profundidad + 1):
+        sangria = "\t" * (k // 4) + " " * (k % 4)
+        lineas.append(f"{sangria}if x{k} < {k}:" if k < profundidad else f"{sangria}y = 1")
+    lineas.append("z = 2")
+    return "\n".join(lineas) + "\n"
+
+
+def generar_expresion_anidada(profundidad: int) -> str:
+    """Genera una asignación con `profundidad` paréntesis anidados"""
+    return "v = " + "(" * profundidad + "1" + " + 1)" * profundidad + "\n"
+
+
+def generar_programa_formal(bloques: int = 10) -> str:
+    """Genera un programa dentro del subconjunto que describe la gramática formal"""
+    lineas = ["y = 7", "lista = []"]
+    for i in range(bloques):
+        lineas.append(f"x{i} = ({i} + y) * 2 - y / 3")
+        lineas.append(f"if x{i} > 10:")
+        lineas.append(f"    print(x{i})")
+        lineas.append(f"else:")
+        lineas.append(f"    while y != 0:")
+        lineas.append(f"        y = y - 1")
+        lineas.append(f"for k in range(len(lista)):")
+        lineas.append(f"    print(\"k\")")
+    return "\n".join(lineas) + "\n"
+
+
+def generar_gramatica(niveles: int = 20, ancho: int = 150, recursiva: bool = False,
+                      anulables: bool = False) -> Grammar:
+    """
+    Genera una gramática por capas (variante de lenguaje sintética): cada no
+    terminal de una capa deriva en no terminales de la siguiente. Con
+    `recursiva` la última capa vuelve a la primera y el lenguaje es infinito;
+    con `anulables` uno de cada tres no terminales deriva también ε y cada
+    capa usa su propio terminal.
+    """
+    N = {'S'}
+    Sigma = {'t', 'u', 'v', 'w'} | ({f"t{nivel}" for nivel in range(niveles)} if anulables else set())
+    P = [('S', f"X0_{i}") for i in range(ancho)]
+    for nivel in range(niveles):
+        for i in range(ancho):
+            simbolo = f"X{nivel}_{i}"
+            N.add(simbolo)
+            if nivel + 1 < niveles:
+                P.append((simbolo, f"t X{nivel + 1}_{i} X{nivel + 1}_{(i * 7 + 3) % ancho}"))
+                P.append((simbolo, f"X{nivel + 1}_{(i + 1) % ancho} u"))
+            elif recursiva:
+                P.append((simbolo, f"w X0_{i}"))
+            P.append((simbolo, f"t{nivel}" if anulables else 'v'))
+            if anulables and i % 3 == 0:
+                P.append((simbolo, ''))
+    return Grammar(N, Sigma, P, 'S')
+
+
+def _pico_memoria(funcion) -> int:
+    """Retorna el pico de memoria (bytes) asignada durante la ejecución"""
+    tracemalloc.start()
+    try:
+        funcion()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _memoria_retenida(funcion) -> int:
+    """Retorna los bytes que siguen asignados al resultado de `funcion`"""
+    tracemalloc.start()
+    try:
+        resultado = funcion()
+        retenida = tracemalloc.get_traced_memory()[0]
+        del resultado
+        return retenida
+    finally:
+        tracemalloc.stop()
+
+
+def _medir(funcion, repeticiones: int = 3) -> float:
+    """Retorna el mejor tiempo (segundos) de varias ejecuciones"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+class ParserCascada(Parser):
+    """Parser de expresiones original (un método por nivel), como referencia"""
+
+    def parse_expression(self):
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        left = self.parse_arithmetic()
+        comparison_ops = {TokenType.EQUAL, TokenType.NOT_EQUAL, TokenType.LESS,
+                          TokenType.GREATER, TokenType.LESS_EQUAL, TokenType.GREATER_EQUAL}
+        if self.current_token.type in comparison_ops:
+            operator = self.current_token.value
+            line = self.current_token.line
+            self.advance()
+            right = self.parse_arithmetic()
+            return BinaryOpNode(left, operator, right, line)
+        return left
+
+    def parse_arithmetic(self):
+        left = self.parse_term()
+        while self.current_token.type in (TokenType.PLUS, TokenType.MINUS):
+            operator = self.current_token.value
+            line = self.current_token.line
+            self.advance()
+            right = self.parse_term()
+            left = BinaryOpNode(left, operator, right, line)
+        return left
+
+    def parse_term(self):
+        left = self.parse_power()
+        while self.current_token.type in (TokenType.MULTIPLY, TokenType.DIVIDE, TokenType.MODULO):
+            operator = self.current_token.value
+            line = self.current_token.line
+            self.advance()
+            right = self.parse_power()
+            left = BinaryOpNode(left, operator, right, line)
+        return left
+
+    def parse_power(self):
+        # Nivel añadido para `**` (asociativo a la derecha), necesario para comparar
+        if self.current_token.type == TokenType.MINUS:
+            token = self.current_token
+            self.advance()
+            return UnaryOpNode('-', self.parse_power(), token.line)
+        left = self.parse_factor()
+        if self.current_token.type == TokenType.POWER:
+            line = self.current_token.line
+            self.advance()
+            return BinaryOpNode(left, '**', self.parse_power(), line)
+        return left
+
+
+def _vacio_por_pasadas(gramatica: Grammar) -> bool:
+    """Problema del vacío original: pasadas completas sobre P hasta un punto fijo"""
+    generating = set()
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs in gramatica.P:
+            if lhs in generating:
+                continue
+            tokens = rhs.split() if rhs else []
+            if all(t in gramatica.Sigma or t in generating for t in tokens):
+                generating.add(lhs)
+                changed = True
+    return gramatica.S not in generating
+
+
+def _recursion_por_dfs(gramatica: Grammar) -> bool:
+    """Detección de recursión original: DFS recursivo que recorre P entera por símbolo"""
+    def has_recursion(symbol, visited, stack):
+        if symbol in stack:
+            return True
+        if symbol in visited:
+            return False
+        visited.add(symbol)
+        stack.add(symbol)
+        for lhs, rhs in gramatica.P:
+            if lhs == symbol:
+                for token in rhs.split():
+                    if token in gramatica.N and has_recursion(token, visited, stack):
+                        return True
+        stack.remove(symbol)
+        return False
+    return has_recursion(gramatica.S, set(), set())
+
+
+def _conjuntos_por_pasadas(gramatica: Grammar):
+    """FIRST y FOLLOW con conjuntos de strings y pasadas completas hasta un punto fijo"""
+    nullable = set()
+    first = {simbolo: set() for simbolo in gramatica.N}
+    follow = {simbolo: set() for simbolo in gramatica.N}
+    follow[gramatica.S].add('$')
+    producciones = [(lhs, rhs.split()) for lhs, rhs in gramatica.P]
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs in producciones:
+            before = len(first[lhs])
+            for simbolo in rhs:
+                if simbolo not in gramatica.N:
+                    first[lhs].add(simbolo)
+                    break
+                first[lhs] |= first[simbolo]
+                if simbolo not in nullable:
+                    break
+            else:
+                if lhs not in nullable:
+                    nullable.add(lhs)
+                    changed = True
+            changed = changed or len(first[lhs]) != before
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs in producciones:
+            siguiente = set(follow[lhs])
+            for simbolo in reversed(rhs):
+                if simbolo not in gramatica.N:
+                    siguiente = {simbolo}
+                    continue
+                before = len(follow[simbolo])
+                follow[simbolo] |= siguiente
+                changed = changed or len(follow[simbolo]) != before
+                siguiente = siguiente | first[simbolo] if simbolo in nullable else set(first[simbolo])
+    return nullable, first, follow
+
+
+def _volcar_ast(nodo):
+    """Representación comparable de un AST o de una vista de ASTArena (clase y atributos, recursivo)"""
+    if isinstance(nodo, ASTNode):
+        return (type(nodo).__name__,) + tuple((k, _volcar_ast(getattr(nodo, k, None)))
+                                              for k in nodo._fields + ('line', 'span', 'end_line'))
+    if isinstance(nodo, (list, tuple)):
+        return tuple(_volcar_ast(x) for x in nodo)
+    return nodo
+
+
+# Réplica de los nodos anteriores a __slots__ (atributos en un __dict__ por instancia)
+_CLASES_CON_DICT = {clase.__name__: type(clase.__name__, (), {'_fields': clase._fields})
+                    for clase in AST_NODE_CLASSES}
+
+
+def _copiar_con_dict(nodo):
+    """Copia un AST a las clases equivalentes con __dict__, como referencia"""
+    if isinstance(nodo, ASTNode):
+        # Por nombre: las variantes Statement de las expresiones usan la misma réplica
+        copia = _CLASES_CON_DICT[type(nodo).__name__]()
+        for nombre in nodo._fields + ('line', 'span', 'end_line'):
+            if hasattr(nodo, nombre):
+                setattr(copia, nombre, _copiar_con_dict(getattr(nodo, nombre)))
+        return copia
+    if isinstance(nodo, list):
+        return [_copiar_con_dict(x) for x in nodo]
+    if isinstance(nodo, tuple):
+        return tuple(_copiar_con_dict(x) for x in nodo)
+    return nodo
+
+
+def _recorrer(raiz) -> int:
+    """Visita todos los nodos siguiendo `_fields`; retorna cuántos visitó"""
+    visitados = 0
+    pendientes = [raiz]
+    while pendientes:
+        nodo = pendientes.pop()
+        if isinstance(nodo, (list, tuple)):
+            pendientes.extend(nodo)
+        elif hasattr(nodo, '_fields'):
+            visitados += 1
+            pendientes.extend(getattr(nodo, nombre) for nombre in nodo._fields)
+    return visitados
+
+
+# ============= BENCHMARKS =============
+
+def benchmark_lexer(bloques: int = 2000):
+    """Compara tokens/segundo de los motores léxicos 'char' y 'regex'"""
+    source = generar_programa(bloques)
+    print("=" * 80)
+    print(f"BENCHMARK LÉXICO ({len(source)} caracteres)")
+    print("=" * 80)
+
+    referencia = [(t.type, t.value, t.line, t.column) for t in Lexer(source, engine='char').tokenize()]
+    resultado = [(t.type, t.value, t.line, t.column) for t in Lexer(source, engine='regex').tokenize()]
+    if referencia != resultado:
+        raise AssertionError("Los motores léxicos produjeron secuencias de tokens distintas")
+
+    tiempos = {}
+    for engine in LEXER_ENGINES:
+        tiempos[engine] = _medir(lambda: Lexer(source, engine=engine).tokenize())
+        print(f"  {engine:<10} {tiempos[engine] * 1000:10.1f} ms   "
+              f"{len(referencia) / tiempos[engine]:14,.0f} tokens/s")
+    print(f"  Aceleración regex/char: {tiempos['char'] / tiempos['regex']:.2f}x")
+    print(f"  Tokens idénticos: SÍ ({len(referencia)} tokens)")
+
+
+def benchmark_streaming(bloques: int = 2000):
+    """Compara el pico de memoria al parsear desde una lista o desde Lexer.iter_tokens()"""
+    source = generar_programa(bloques)
+    print("=" * 80)
+    print(f"BENCHMARK LÉXICO → SINTÁCTICO EN STREAMING ({len(source)} caracteres)")
+    print("=" * 80)
+
+    def desde_lista():
+        Parser(Lexer(source).tokenize()).parse()
+
+    def desde_iterador():
+        Parser(Lexer(source).iter_tokens()).parse()
+
+    for nombre, funcion in (("lista", desde_lista), ("iter_tokens", desde_iterador)):
+        pico = _pico_memoria(funcion)
+        tiempo = _medir(funcion)
+        print(f"  {nombre:<12} pico {pico / 1024 / 1024:8.1f} MB   {tiempo * 1000:10.1f} ms")
+
+
+def benchmark_token_buffer(bloques: int = 2000):
+    """Compara los bytes por token de List[Token] frente a TokenBuffer"""
+    source = generar_programa(bloques)
+    total = len(Lexer(source).tokenize())
+    print("=" * 80)
+    print(f"BENCHMARK MEMORIA POR TOKEN ({total} tokens)")
+    print("=" * 80)
+
+    for nombre, funcion in (("List[Token]", lambda: Lexer(source).tokenize()),
+                            ("TokenBuffer", lambda: Lexer(source).tokenize_buffer())):
+        retenida = _memoria_retenida(funcion)
+        print(f"  {nombre:<12} {retenida / 1024 / 1024:8.1f} MB   {retenida / total:8.1f} bytes/token")
+
+
+def benchmark_relex(bloques: int = 2000):
+    """Compara el re-análisis incremental tras editar una línea con tokenizar todo"""
+    source = generar_programa(bloques)
+    lineas = source.split("\n")
+    medio = len(lineas) // 2
+    while not lineas[medio].startswith("x"):
+        medio += 1
+    editada = "\n".join(lineas[:medio] + [lineas[medio] + " + 1"] + lineas[medio + 1:])
+    print("=" * 80)
+    print(f"BENCHMARK RE-ANÁLISIS LÉXICO INCREMENTAL ({len(lineas)} líneas, 1 editada)")
+    print("=" * 80)
+
+    def completo():
+        return Lexer(editada).tokenize()
+
+    def incremental():
+        lexer = Lexer(source)
+        lexer.tokenize()
+        inicio = time.perf_counter()
+        tokens = lexer.relex(editada)
+        return time.perf_counter() - inicio, tokens, lexer.last_edit
+
+    tiempo_completo = _medir(completo)
+    tiempo_incremental, tokens, (inicio, _, fin) = min(incremental() for _ in range(3))
+    referencia = [(t.type, t.value, t.line, t.column) for t in completo()]
+    if referencia != [(t.type, t.value, t.line, t.column) for t in tokens]:
+        raise AssertionError("El re-análisis incremental difiere del análisis completo")
+    print(f"  Completo     {tiempo_completo * 1000:10.2f} ms")
+    print(f"  Incremental  {tiempo_incremental * 1000:10.2f} ms   "
+          f"({fin - inicio} tokens re-analizados de {len(tokens)})")
+    print(f"  Aceleración: {tiempo_completo / tiempo_incremental:.1f}x")
+
+
+def benchmark_reparse(bloques: int = 2000):
+    """Compara el re-análisis sintáctico incremental (Parser.reparse) con parsear todo"""
+    source = generar_programa(bloques)
+    lineas = source.split("\n")
+    medio = len(lineas) // 2
+    while not lineas[medio].startswith("x"):
+        medio += 1
+    editada = "\n".join(lineas[:medio] + [lineas[medio] + " + 1"] + lineas[medio + 1:])
+    print("=" * 80)
+    print(f"BENCHMARK RE-ANÁLISIS SINTÁCTICO INCREMENTAL ({len(lineas)} líneas, 1 editada)")
+    print("=" * 80)
+
+    tokens_editados = Lexer(editada).tokenize()
+
+    def completo():
+        return Parser(tokens_editados).parse()
+
+    def incremental():
+        # reparse() modifica el árbol anterior: cada medición parte de uno nuevo
+        lexer = Lexer(source)
+        anterior = Parser(lexer.tokenize()).parse()
+        tokens = lexer.relex(editada)
+        inicio = time.perf_counter()
+        arbol = Parser(tokens).reparse(anterior, lexer.last_edit)
+        return time.perf_counter() - inicio, arbol
+
+    tiempo_completo = _medir(completo)
+    tiempo_incremental, arbol = min((incremental() for _ in range(3)), key=lambda medida: medida[0])
+    if _volcar_ast(arbol) != _volcar_ast(completo()):
+        raise AssertionError("El re-análisis sintáctico incremental difiere del análisis completo")
+    print(f"  Completo     {tiempo_completo * 1000:10.2f} ms")
+    print(f"  Incremental  {tiempo_incremental * 1000:10.2f} ms")
+    print(f"  Aceleración: {tiempo_completo / tiempo_incremental:.1f}x")
+    print("  Árboles idénticos: SÍ")
+
+
+def benchmark_from_path(bloques: int = 4000):
+    """Compara leer el archivo a un str con analizarlo mapeado en memoria (Lexer.from_path)"""
+    source = generar_programa(bloques)
+    with tempfile.NamedTemporaryFile('w', suffix='.py', encoding='utf-8', delete=False) as archivo:
+        archivo.write(source)
+        ruta = archivo.name
+    print("=" * 80)
+    print(f"BENCHMARK ENTRADA DESDE ARCHIVO ({os.path.getsize(ruta)} bytes)")
+    print("=" * 80)
+
+    def leyendo_str():
+        with open(ruta, encoding='utf-8') as entrada:
+            lexer = Lexer(entrada.read())
+        for _ in lexer.iter_tokens():
+            pass
+
+    def mapeado():
+        for _ in Lexer.from_path(ruta).iter_tokens():
+            pass
+
+    try:
+        referencia = [(t.type, t.value, t.line, t.column) for t in Lexer(source).tokenize()]
+        if referencia != [(t.type, t.value, t.line, t.column) for t in Lexer.from_path(ruta).tokenize()]:
+            raise AssertionError("Lexer.from_path produjo tokens distintos")
+        for nombre, funcion in (("read() + str", leyendo_str), ("from_path", mapeado)):
+            pico = _pico_memoria(funcion)
+            tiempo = _medir(funcion)
+            print(f"  {nombre:<14} pico {pico / 1024 / 1024:8.2f} MB   {tiempo * 1000:10.1f} ms")
+        print("  (las páginas del mmap las gestiona el sistema operativo y no cuentan en el pico)")
+    finally:
+        os.unlink(ruta)
+
+
+def benchmark_parallel(bloques: int = 8000):
+    """Mide la aceleración de Lexer.tokenize_parallel frente al número de núcleos"""
+    source = generar_programa(bloques)
+    nucleos = os.cpu_count() or 1
+    print("=" * 80)
+    print(f"BENCHMARK ANÁLISIS LÉXICO PARALELO ({len(source)} caracteres, {nucleos} núcleos)")
+    print("=" * 80)
+
+    referencia = [(t.type, t.value, t.line, t.column) for t in Lexer(source).tokenize()]
+    secuencial = _medir(lambda: Lexer(source).tokenize())
+    print(f"  secuencial   {secuencial * 1000:10.1f} ms")
+
+    procesos = sorted({1, 2, nucleos} | {n for n in (4, 8) if n <= nucleos})
+    for workers in procesos:
+        resultado = Lexer(source).tokenize_parallel(workers)
+        if referencia != [(t.type, t.value, t.line, t.column) for t in resultado]:
+            raise AssertionError("tokenize_parallel produjo tokens distintos a tokenize")
+        tiempo = _medir(lambda: Lexer(source).tokenize_parallel(workers))
+        print(f"  {workers:2d} procesos  {tiempo * 1000:10.1f} ms   aceleración {secuencial / tiempo:5.2f}x "
+              f"(ideal {min(workers, nucleos)}x)")
+    print(f"  Tokens idénticos: SÍ ({len(referencia)} tokens)")
+
+
+def benchmark_token_cache(bloques: int = 2000):
+    """Compara Lexer.tokenize con recuperar los tokens de la caché persistente"""
+    source = generar_programa(bloques)
+    tokens = Lexer(source).tokenize()
+    tamaño = len(dump_tokens(tokens))
+    print("=" * 80)
+    print(f"BENCHMARK CACHÉ PERSISTENTE DE TOKENS ({len(tokens)} tokens)")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        cache = TokenCache(directorio)
+        referencia = [(t.type, t.value, t.line, t.column) for t in tokens]
+        if referencia != [(t.type, t.value, t.line, t.column) for t in cache.tokenize(source)] or \
+                referencia != [(t.type, t.value, t.line, t.column) for t in cache.tokenize(source)]:
+            raise AssertionError("La caché de tokens devolvió tokens distintos")
+
+        tiempo_lexer = _medir(lambda: Lexer(source).tokenize())
+        tiempo_cache = _medir(lambda: cache.tokenize(source))
+        print(f"  Lexer.tokenize  {tiempo_lexer * 1000:10.1f} ms")
+        print(f"  Acierto caché   {tiempo_cache * 1000:10.1f} ms   ({tamaño / len(tokens):.1f} bytes/token en disco)")
+        print(f"  Aceleración: {tiempo_lexer / tiempo_cache:.1f}x")
+        print(f"  Contadores: {cache.stats()}")
+
+
+def benchmark_ast(bloques: int = 2000):
+    """Compara memoria por nodo y velocidad de recorrido de las representaciones del AST"""
+    tokens = Lexer(generar_programa(bloques)).tokenize()
+    ast = Parser(tokens).parse()
+    arena = ASTArena.from_ast(ast)
+    nodos = len(arena)
+    print("=" * 80)
+    print(f"BENCHMARK REPRESENTACIÓN DEL AST ({nodos} nodos)")
+    print("=" * 80)
+
+    if _volcar_ast(arena.root) != _volcar_ast(ast) or _volcar_ast(arena.to_ast()) != _volcar_ast(ast):
+        raise AssertionError("La arena no reproduce el AST original")
+
+    def compilar(raiz):
+        SemanticAnalyzer().analyze(raiz)
+        return [str(instruccion) for instruccion in TACGenerator().generate(raiz)]
+
+    if compilar(arena.root) != compilar(ast):
+        raise AssertionError("El recorrido de la arena generó otro código intermedio")
+
+    con_dict = _copiar_con_dict(ast)
+    representaciones = (
+        ("__dict__", lambda: _copiar_con_dict(ast), lambda: con_dict),
+        ("__slots__", lambda: Parser(tokens).parse(), lambda: ast),
+        ("ASTArena", lambda: ASTArena.from_ast(ast), lambda: arena.root),
+    )
+    for nombre, construir, raiz in representaciones:
+        retenida = _memoria_retenida(construir)
+        recorrido = _medir(lambda: _recorrer(raiz()))
+        detalle = f"{retenida / nodos:8.1f} bytes/nodo   recorrido {recorrido * 1000:8.1f} ms"
+        if nombre != "__dict__":
+            # Los visitantes despachan por isinstance(): la réplica con __dict__ no aplica
+            detalle += f"   semántico + TAC {_medir(lambda: compilar(raiz())) * 1000:8.1f} ms"
+        print(f"  {nombre:<10} {detalle}")
+    print("  Árboles y código intermedio idénticos: SÍ")
+
+
+def benchmark_pipeline(bloques: int = 2000):
+    """Compara el pipeline por fases completas con el pipeline sentencia a sentencia"""
+    source = generar_programa(bloques)
+    print("=" * 80)
+    print(f"BENCHMARK PIPELINE EN STREAMING ({len(source)} caracteres)")
+    print("=" * 80)
+
+    def por_fases():
+        ast = Parser(Lexer(source).tokenize()).parse()
+        if not SemanticAnalyzer().analyze(ast):
+            raise AssertionError("El programa sintético tiene errores semánticos")
+        yield from TACInterpreter().interpret(TACGenerator().generate(ast)).split("\n")
+
+    def en_streaming():
+        return StreamingPipeline(source).run()
+
+    if list(por_fases()) != list(en_streaming()):
+        raise AssertionError("Los pipelines produjeron salidas distintas")
+
+    for nombre, pipeline in (("por fases", por_fases), ("streaming", en_streaming)):
+        def primera_salida():
+            inicio = time.perf_counter()
+            next(iter(pipeline()))
+            return time.perf_counter() - inicio
+
+        primera = min(primera_salida() for _ in range(3))
+        total = _medir(lambda: sum(1 for _ in pipeline()))
+        pico = _pico_memoria(lambda: sum(1 for _ in pipeline()))
+        print(f"  {nombre:<10} primera salida {primera * 1000:9.2f} ms   total {total * 1000:9.1f} ms   "
+              f"pico {pico / 1024 / 1024:7.1f} MB")
+    print("  Salidas idénticas: SÍ")
+
+
+def benchmark_serializacion(bloques: int = 2000):
+    """Compara tamaño y velocidad del formato binario del AST con pickle"""
+    ast = Parser(Lexer(generar_programa(bloques)).tokenize()).parse()
+    print("=" * 80)
+    print(f"BENCHMARK SERIALIZACIÓN DEL AST ({len(ASTArena.from_ast(ast))} nodos)")
+    print("=" * 80)
+
+    formatos = (
+        ("pickle", lambda: pickle.dumps(ast, pickle.HIGHEST_PROTOCOL), pickle.loads),
+        ("binario", lambda: dump_ast(ast), load_ast),
+    )
+    referencia = _volcar_ast(ast)
+    for nombre, volcar, cargar in formatos:
+        datos = volcar()
+        if _volcar_ast(cargar(datos)) != referencia:
+            raise AssertionError(f"La ida y vuelta con {nombre} no reproduce el AST")
+        tiempo_volcado = _medir(volcar)
+        tiempo_carga = _medir(lambda: cargar(datos))
+        print(f"  {nombre:<8} {len(datos) / 1024:9.1f} KB   volcado {tiempo_volcado * 1000:8.1f} ms   "
+              f"carga {tiempo_carga * 1000:8.1f} ms")
+    print("  Ida y vuelta idéntica: SÍ")
+
+
+def benchmark_hash_consing(bloques: int = 2000):
+    """Compara el AST con nodos nuevos por aparición y con expresiones internadas"""
+    tokens = Lexer(generar_programa(bloques)).tokenize()
+    print("=" * 80)
+    print(f"BENCHMARK EXPRESIONES INTERNADAS ({len(tokens)} tokens)")
+    print("=" * 80)
+
+    def compilar(raiz):
+        analizador = SemanticAnalyzer()
+        analizador.analyze(raiz)
+        return analizador.errors, analizador.warnings, [str(i) for i in TACGenerator().generate(raiz)]
+
+    fabrica = HashConsingFactory()
+    if compilar(Parser(tokens, factory=fabrica).parse()) != compilar(Parser(tokens).parse()):
+        raise AssertionError("El AST internado produjo otro análisis o código intermedio")
+
+    variantes = (
+        ("NodeFactory", lambda: None, False),
+        ("HashConsing", HashConsingFactory, False),
+        ("+ tablas", HashConsingFactory, True),
+    )
+    for nombre, crear_fabrica, con_tablas in variantes:
+        def analizar():
+            fabrica_actual = crear_fabrica()
+            ast = Parser(tokens, factory=fabrica_actual).parse()
+            # Con tablas: se retiene también la fábrica (internado y líneas de cada aparición)
+            return (ast, fabrica_actual) if con_tablas else ast
+
+        retenida = _memoria_retenida(analizar)
+        tiempo = _medir(analizar)
+        print(f"  {nombre:<12} {retenida / 1024 / 1024:8.1f} MB   {tiempo * 1000:10.1f} ms")
+    estadisticas = fabrica.stats()
+    print(f"  Nodos de expresión creados {estadisticas['created']}, reutilizados {estadisticas['reused']} "
+          f"({estadisticas['sharing']:.0%})")
+    print("  Análisis semántico y código intermedio idénticos: SÍ")
+
+
+def benchmark_lr_tablas(repeticiones: int = 20):
+    """Compara generar las tablas LALR(1) con cargarlas de la caché en disco o de memoria"""
+    producciones = LRParser(table_cache=None).productions
+    digest = grammar_hash(producciones)
+    tablas = CompressedLRTables(LALRTableBuilder(producciones))
+    datos = dump_lr_tables(tablas, digest)
+    if dump_lr_tables(load_lr_tables(datos, digest), digest) != datos:
+        raise AssertionError("La caché de tablas LR devolvió tablas distintas")
+    print("=" * 80)
+    print(f"BENCHMARK CACHÉ DE TABLAS LR ({tablas.state_count} estados, {len(datos)} bytes en disco)")
+    print("=" * 80)
+
+    tiempo_generar = _medir(lambda: CompressedLRTables(LALRTableBuilder(producciones)), repeticiones)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'tablas.lrt')
+        with open(ruta, 'wb') as archivo:
+            archivo.write(datos)
+
+        def cargar():
+            with open(ruta, 'rb') as archivo:
+                return load_lr_tables(archivo.read(), digest)
+        tiempo_disco = _medir(cargar, repeticiones)
+        shared_lr_tables(producciones, directorio)
+        tiempo_memoria = _medir(lambda: LRParser(directorio).tables, repeticiones)
+    print(f"  Generar tablas     {tiempo_generar * 1000:10.3f} ms")
+    print(f"  Caché en disco     {tiempo_disco * 1000:10.3f} ms   ({tiempo_generar / tiempo_disco:.1f}x)")
+    print(f"  Compartidas        {tiempo_memoria * 1000:10.3f} ms   ({tiempo_generar / tiempo_memoria:.0f}x)")
+
+
+def benchmark_lr(bloques: int = 2000):
+    """Compara el parser LALR(1) con acciones semánticas con Parser.parse sobre los mismos tokens"""
+    source = generar_programa(bloques) + "\n" + generar_expresiones(bloques)
+    tokens = Lexer(source).tokenize()
+    print("=" * 80)
+    print(f"BENCHMARK PARSER LR CONTRA DESCENSO RECURSIVO ({len(tokens)} tokens)")
+    print("=" * 80)
+
+    lr = LRParser(trace='off')
+    referencia = _volcar_ast(Parser(tokens).parse())
+    if _volcar_ast(lr.parse_ast(tokens)) != referencia or \
+            _volcar_ast(Parser(tokens, 'lr').parse()) != referencia:
+        raise AssertionError("El parser LR produjo un árbol distinto")
+
+    tiempos = {
+        "recursive": _medir(lambda: Parser(tokens).parse()),
+        "iterative": _medir(lambda: Parser(tokens, 'iterative').parse()),
+        "lr (AST)": _medir(lambda: lr.parse_ast(tokens)),
+        "lr (bool)": _medir(lambda: lr.parse(tokens)),
+    }
+    for nombre, tiempo in tiempos.items():
+        print(f"  {nombre:<12} {tiempo * 1000:10.1f} ms   {len(tokens) / tiempo:14,.0f} tokens/s   "
+              f"({tiempos['recursive'] / tiempo:.2f}x)")
+    print("  Árboles idénticos: SÍ")
+
+    # Un único LRParser (re-entrante) atendiendo análisis concurrentes desde varios hilos
+    fuentes = [generar_programa(50 + i) for i in range(16)]
+    esperados = [_volcar_ast(Parser(Lexer(fuente).tokenize()).parse()) for fuente in fuentes]
+    with ThreadPoolExecutor(max_workers=8) as hilos:
+        obtenidos = list(hilos.map(lambda fuente: _volcar_ast(lr.parse_ast(Lexer(fuente).iter_tokens())), fuentes))
+    if obtenidos != esperados:
+        raise AssertionError("El LRParser compartido entre hilos produjo árboles distintos")
+    print(f"  {len(fuentes)} análisis concurrentes (8 hilos, un LRParser, tokens en streaming): árboles idénticos")
+
+
+def benchmark_gramaticas(niveles: int = 20, ancho: int = 150):
+    """Compara el análisis de vacío y finitud original con el grafo compilado de grammar_analysis"""
+    print("=" * 80)
+    print("BENCHMARK ANÁLISIS DE GRAMÁTICAS")
+    print("=" * 80)
+    for recursiva in (False, True):
+        gramatica = generar_gramatica(niveles, ancho, recursiva)
+        compilada = CompiledGrammar.from_grammar(gramatica)
+        if compilada.is_empty() != _vacio_por_pasadas(gramatica) or \
+                compilada.is_finite() == _recursion_por_dfs(gramatica):
+            raise AssertionError("El grafo compilado dio un resultado distinto")
+
+        def analizar():
+            grafo = CompiledGrammar.from_grammar(gramatica)
+            return grafo.is_empty(), grafo.is_finite()
+        tiempo_original = _medir(lambda: (_vacio_por_pasadas(gramatica), _recursion_por_dfs(gramatica)), 1)
+        tiempo_grafo = _medir(analizar)
+        print(f"  {'Infinita' if recursiva else 'Finita':<9} {len(gramatica.N):6} no terminales  "
+              f"{len(gramatica.P):6} producciones   original {tiempo_original * 1000:9.1f} ms   "
+              f"grafo {tiempo_grafo * 1000:7.1f} ms   ({tiempo_original / tiempo_grafo:.2f}x)")
+    print("  (El DFS original se detiene en el primer ciclo que encuentra, así que en la gramática")
+    print("   infinita puede ganarle al grafo; además toma por infinitos los ciclos unitarios o de")
+    print("   producciones ε, que no generan infinitas cadenas)")
+
+    # Tiempo lineal: duplicar la gramática duplica el costo
+    for factor in (1, 2, 4, 8):
+        gramatica = generar_gramatica(niveles * factor, ancho, True)
+        tiempo = _medir(lambda: CompiledGrammar.from_grammar(gramatica).is_finite())
+        print(f"  {len(gramatica.P):7} producciones   {tiempo * 1000:8.1f} ms   "
+              f"{len(gramatica.P) / tiempo:12,.0f} producciones/s")
+
+
+def benchmark_conjuntos(niveles: int = 20, ancho: int = 150):
+    """Compara anulables/FIRST/FOLLOW con conjuntos de strings frente a los bitsets de grammar_analysis"""
+    print("=" * 80)
+    print("BENCHMARK FIRST/FOLLOW CON BITSETS")
+    print("=" * 80)
+    for factor in (1, 4):
+        gramatica = generar_gramatica(niveles * factor, ancho, True, True)
+        nullable, first, follow = _conjuntos_por_pasadas(gramatica)
+        compilada = CompiledGrammar.from_grammar(gramatica)
+        conjuntos = GrammarSets(compilada)
+        for simbolo in gramatica.N:
+            codigo = compilada.codes[simbolo]
+            if (simbolo in nullable) != conjuntos.nullable[codigo] or \
+                    first[simbolo] != set(conjuntos.terminal_names(conjuntos.first[codigo])) or \
+                    follow[simbolo] != set(conjuntos.terminal_names(conjuntos.follow[codigo])):
+                raise AssertionError(f"Conjuntos distintos para {simbolo}")
+
+        tiempo_pasadas = _medir(lambda: _conjuntos_por_pasadas(gramatica), 1)
+        tiempo_bitsets = _medir(lambda: GrammarSets(CompiledGrammar.from_grammar(gramatica)))
+        tiempo_cache = _medir(lambda: grammar_sets(compilada))
+        print(f"  {len(gramatica.P):6} producciones, {len(gramatica.Sigma)} terminales")
+        print(f"    Conjuntos y pasadas   {tiempo_pasadas * 1000:10.1f} ms")
+        print(f"    Bitsets               {tiempo_bitsets * 1000:10.1f} ms   ({tiempo_pasadas / tiempo_bitsets:.1f}x)")
+        print(f"    Caché por digest      {tiempo_cache * 1000:10.4f} ms")
+
+
+def benchmark_pertenencia(tamanos=(5, 10, 20, 40, 80)):
+    """Costo de decidir la pertenencia con Earley y CYK frente al largo de la entrada"""
+    analizador = FormalPropertiesAnalyzer()
+    verificador = MembershipChecker(analizador.compiled_grammar)
+    print("=" * 80)
+    print(f"BENCHMARK PERTENENCIA: EARLEY Y CYK ({len(verificador.cyk.cnf.productions)} producciones en FNC)")
+    print("=" * 80)
+    print(f"  {'Tokens':>7} {'Items':>9} {'Earley':>12} {'CYK':>12} {'Parser':>12}")
+    for bloques in tamanos:
+        fuente = generar_programa_formal(bloques)
+        tokens = Lexer(fuente).tokenize()
+        terminales = grammar_terminals(tokens)
+        resultado = verificador.check(fuente)
+        if not (resultado.consistent and resultado.parser):
+            raise AssertionError("Earley, CYK y el Parser no coinciden")
+        items = verificador.earley.parse_chart(terminales)[1]
+        tiempo_earley = _medir(lambda: verificador.earley.recognize(terminales))
+        tiempo_cyk = _medir(lambda: verificador.cyk.recognize(terminales), 1)
+        tiempo_parser = _medir(lambda: Parser(tokens).parse())
+        print(f"  {len(terminales):7} {items:9} {tiempo_earley * 1000:9.1f} ms {tiempo_cyk * 1000:9.1f} ms "
+              f"{tiempo_parser * 1000:9.2f} ms")
+
+
+def benchmark_reduccion(bloques: int = 2000):
+    """Parser LR con la gramática original frente a la reducida (sin unitarias ni símbolos inútiles)"""
+    source = generar_programa(bloques) + "\n" + generar_expresiones(bloques)
+    tokens = Lexer(source).tokenize()
+    original = LRParser(trace='off')
+    reducido = LRParser(trace='off', productions=reduce_lr_productions(original.productions))
+    if _volcar_ast(reducido.parse_ast(tokens)) != _volcar_ast(original.parse_ast(tokens)):
+        raise AssertionError("La gramática reducida produjo un árbol distinto")
+    print("=" * 80)
+    print(f"BENCHMARK REDUCCIÓN DE GRAMÁTICAS ({len(tokens)} tokens)")
+    print("=" * 80)
+    print(reduction_report(FormalPropertiesAnalyzer().grammar, tokens))
+
+    tiempos = {
+        "original (AST)": _medir(lambda: original.parse_ast(tokens)),
+        "reducida (AST)": _medir(lambda: reducido.parse_ast(tokens)),
+        "original (bool)": _medir(lambda: original.parse(tokens)),
+        "reducida (bool)": _medir(lambda: reducido.parse(tokens)),
+    }
+    for nombre, tiempo in tiempos.items():
+        referencia = tiempos["original " + nombre.split()[1]]
+        print(f"  {nombre:<16} {tiempo * 1000:10.1f} ms   ({referencia / tiempo:.2f}x)")
+    print("  Árboles idénticos: SÍ")
+
+
+def benchmark_expresiones(lineas: int = 5000):
+    """Compara el parser de expresiones por precedencia con el descenso en cascada"""
+    source = generar_expresiones(lineas)
+    tokens = Lexer(source).tokenize()
+    print("=" * 80)
+    print(f"BENCHMARK PARSER DE EXPRESIONES ({len(tokens)} tokens)")
+    print("=" * 80)
+
+    if _volcar_ast(ParserCascada(tokens).parse()) != _volcar_ast(Parser(tokens).parse()):
+        raise AssertionError("Los parsers de expresiones produjeron árboles distintos")
+
+    tiempos = {}
+    for nombre, clase in (("cascada", ParserCascada), ("precedencia", Parser)):
+        tiempos[nombre] = _medir(lambda: clase(tokens).parse())
+        print(f"  {nombre:<12} {tiempos[nombre] * 1000:10.1f} ms   "
+              f"{len(tokens) / tiempos[nombre]:14,.0f} tokens/s")
+    print(f"  Aceleración: {tiempos['cascada'] / tiempos['precedencia']:.2f}x")
+    print("  Árboles idénticos: SÍ")
+
+
+def benchmark_anidamiento(profundidades=(10, 100, 10000)):
+    """Compara los modos 'recursive' e 'iterative' del Parser según la profundidad de anidamiento"""
+    print("=" * 80)
+    print("BENCHMARK PARSER SEGÚN PROFUNDIDAD DE ANIDAMIENTO")
+    print("=" * 80)
+
+    for nombre, generador in (("bloques", generar_bloques_anidados),
+                              ("expresión", generar_expresion_anidada)):
+        for profundidad in profundidades:
+            tokens = Lexer(generador(profundidad)).tokenize()
+            resultados = {}
+            for mode in PARSER_MODES:
+                try:
+                    resultados[mode] = Parser(tokens, mode).parse()
+                    tiempo = _medir(lambda: Parser(tokens, mode).parse())
+                    detalle = f"{tiempo * 1000:10.2f} ms"
+                except RecursionError:
+                    detalle = f"{'RecursionError':>13}"
+                print(f"  {nombre:<10} profundidad {profundidad:>6}   {mode:<10} {detalle}")
+            if len(resultados) == len(PARSER_MODES) and \
+                    _volcar_ast(resultados['recursive']) != _volcar_ast(resultados['iterative']):
+                raise AssertionError("Los modos del parser produjeron árboles distintos")
+
+
+BENCHMARKS = {
+    'lexer': benchmark_lexer,
+    'streaming': benchmark_streaming,
+    'token_buffer': benchmark_token_buffer,
+    'relex': benchmark_relex,
+    'reparse': benchmark_reparse,
+    'from_path': benchmark_from_path,
+    'parallel': benchmark_parallel,
+    'token_cache': benchmark_token_cache,
+    'expresiones': benchmark_expresiones,
+    'anidamiento': benchmark_anidamiento,
+    'ast': benchmark_ast,
+    'pipeline': benchmark_pipeline,
+    'serializacion': benchmark_serializacion,
+    'hash_consing': benchmark_hash_consing,
+    'lr_tablas': benchmark_lr_tablas,
+    'lr': benchmark_lr,
+    'gramaticas': benchmark_gramaticas,
+    'conjuntos': benchmark_conjuntos,
+    'pertenencia': benchmark_pertenencia,
+    'reduccion': benchmark_reduccion,
+}
+
+
+def main(argv):
+    nombres = argv or list(BENCHMARKS)
+    for nombre in nombres:
+        if nombre not in BENCHMARKS:
+            print(f"Benchmark desconocido: {nombre}. Disponibles: {', '.join(BENCHMARKS)}")
+            return 1
+        BENCHMARKS[nombre]()
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,383 @@
+"""
+Problema de la Pertenencia: Earley y CYK
+Decide si una secuencia de tokens del Lexer pertenece al lenguaje de la
+gramática formal (FormalPropertiesAnalyzer.grammar) con dos algoritmos de
+tabla: Earley sobre la gramática tal cual y CYK con bitsets sobre su Forma
+Normal de Chomsky. Ambos se contrastan con el Parser descendente.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from grammar_analysis import CompiledGrammar, grammar_sets
+from lr_parser import TERMINAL_OF_TOKEN_TYPE
+from python_compiler import Lexer, LexerError, Parser, ParserError, Token, TokenType
+
+
+# Tokens sin terminal en la gramática formal: las sentencias no llevan NEWLINE
+_SKIPPED_TOKEN_TYPES = frozenset((TokenType.NEWLINE, TokenType.EOF))
+
+
+def grammar_terminals(tokens: Iterable[Token]) -> List[str]:
+    """Terminales de la gramática formal que corresponden a los tokens del Lexer"""
+    return [TERMINAL_OF_TOKEN_TYPE.get(token.type, token.type.name)
+            for token in tokens if token.type not in _SKIPPED_TOKEN_TYPES]
+
+
+# ============= EARLEY =============
+
+class EarleyRecognizer:
+    """
+    Reconocedor de Earley sobre una gramática compilada
+
+    Cada item es un entero (producción con punto, `dotted`) más su origen.
+    Las predicciones se memoizan por no terminal: predecir A agrega de una
+    vez los items iniciales de todos los no terminales que pueden empezar
+    una derivación de A, y los marca como ya predichos en el conjunto. Los
+    no terminales anulables se saltan al predecir (Aycock y Horspool), así
+    que ningún completado tiene que volver sobre el conjunto actual.
+    """
+
+    def __init__(self, grammar: CompiledGrammar):
+        self.grammar = grammar
+        count = grammar.nonterminal_count
+        nullable = grammar_sets(grammar).nullable
+
+        # Items con punto: el item de (producción p, punto d) es offset[p] + d
+        self.offsets = []
+        self.next_symbol: List[int] = []     # -1 si el item está completo
+        self.item_lhs: List[int] = []
+        for lhs, rhs in grammar.productions:
+            self.offsets.append(len(self.next_symbol))
+            self.next_symbol.extend(rhs)
+            self.next_symbol.append(-1)
+            self.item_lhs.extend([lhs] * (len(rhs) + 1))
+        self.nullable = nullable
+
+        # Esquinas izquierdas: no terminales que pueden empezar una derivación de A
+        corners = [set() for _ in range(count)]
+        for lhs, rhs in grammar.productions:
+            for symbol in rhs:
+                if symbol >= count:
+                    break
+                corners[lhs].add(symbol)
+                if not nullable[symbol]:
+                    break
+        self._predicted: List[Tuple[int, ...]] = []
+        self._prediction_items: List[Tuple[int, ...]] = []
+        for nonterminal in range(count):
+            closure = {nonterminal}
+            pending = [nonterminal]
+            while pending:
+                for corner in corners[pending.pop()]:
+                    if corner not in closure:
+                        closure.add(corner)
+                        pending.append(corner)
+            self._predicted.append(tuple(closure))
+            self._prediction_items.append(tuple(self.offsets[index] for symbol in closure
+                                                for index in grammar.by_lhs[symbol]))
+
+    def recognize(self, terminals: Sequence[str]) -> bool:
+        """¿La secuencia de terminales pertenece al lenguaje?"""
+        return self.parse_chart(terminals)[0]
+
+    def parse_chart(self, terminals: Sequence[str]) -> Tuple[bool, int]:
+        """
+        Returns:
+            (aceptada, nº de items en la tabla). Se detiene en el primer
+            conjunto vacío, así que en un rechazo la tabla queda incompleta.
+        """
+        grammar = self.grammar
+        count = grammar.nonterminal_count
+        codes = grammar.codes
+        next_symbol = self.next_symbol
+        item_lhs = self.item_lhs
+        nullable = self.nullable
+        # Un terminal que la gramática no usa nunca se puede desplazar
+        input_codes = [codes.get(terminal, -2) for terminal in terminals]
+        input_codes = [code if code >= count else -2 for code in input_codes]
+
+        # Por conjunto: no terminal → items (dotted, origen) que lo esperan
+        waiting_sets: List[Dict[int, List[Tuple[int, int]]]] = []
+        total = 0
+        current = [(dotted, 0) for dotted in self._prediction_items[grammar.start]]
+        predicted = set(self._predicted[grammar.start])
+        for position in range(len(input_codes) + 1):
+            token = input_codes[position] if position < len(input_codes) else -3
+            seen = set(current)
+            waiting: Dict[int, List[Tuple[int, int]]] = {}
+            waiting_sets.append(waiting)
+            scanned = []
+            agenda = current
+            index = 0
+            while index < len(agenda):
+                dotted, origin = agenda[index]
+                index += 1
+                symbol = next_symbol[dotted]
+                if symbol == -1:
+                    # Completar: avanzar los items del origen que esperaban a lhs
+                    for parent, parent_origin in waiting_sets[origin].get(item_lhs[dotted], ()):
+                        entry = (parent + 1, parent_origin)
+                        if entry not in seen:
+                            seen.add(entry)
+                            agenda.append(entry)
+                elif symbol < count:
+                    waiting.setdefault(symbol, []).append((dotted, origin))
+                    if symbol not in predicted:
+                        predicted.update(self._predicted[symbol])
+                        for start in self._prediction_items[symbol]:
+                            entry = (start, position)
+                            if entry not in seen:
+                                seen.add(entry)
+                                agenda.append(entry)
+                    if nullable[symbol]:
+                        entry = (dotted + 1, origin)
+                        if entry not in seen:
+                            seen.add(entry)
+                            agenda.append(entry)
+                elif symbol == token:
+                    scanned.append((dotted + 1, origin))
+            total += len(agenda)
+            if position == len(input_codes):
+                accepted = any(next_symbol[dotted] == -1 and origin == 0 and item_lhs[dotted] == grammar.start
+                               for dotted, origin in agenda)
+                return accepted, total
+            if not scanned:
+                return False, total
+            current = scanned
+            predicted = set()
+        return False, total
+
+
+# ============= FORMA NORMAL DE CHOMSKY =============
+
+def to_cnf(grammar: CompiledGrammar) -> Tuple[CompiledGrammar, bool]:
+    """
+    Convierte la gramática a Forma Normal de Chomsky (A → B C | a)
+
+    Pasos: quitar símbolos inútiles, nuevo símbolo inicial, terminales en
+    reglas largas a no terminales propios, binarizar, eliminar ε y eliminar
+    producciones unitarias.
+
+    Returns:
+        (gramática en FNC, ¿el lenguaje contiene la cadena vacía?)
+    """
+    count = grammar.nonterminal_count
+    symbols = grammar.symbols
+    sets = grammar_sets(grammar)
+    accepts_empty = sets.nullable[grammar.start] and not grammar.is_empty()
+
+    start = symbols[grammar.start] + "₀"
+    rules = [(start, (symbols[grammar.start],))]
+    terminal_names: Dict[str, str] = {}
+    for index in grammar.useful_productions():
+        lhs, rhs = grammar.productions[index]
+        names = [symbols[symbol] for symbol in rhs]
+        if len(names) >= 2:
+            for position, symbol in enumerate(rhs):
+                if symbol >= count:
+                    name = terminal_names.get(names[position])
+                    if name is None:
+                        name = terminal_names[names[position]] = f"⟨{names[position]}⟩"
+                        rules.append((name, (names[position],)))
+                    names[position] = name
+        # Binarizar: A → X1 X2 ... Xn pasa a A → X1 A·1, A·1 → X2 A·2, ...
+        head = symbols[lhs]
+        part = 0
+        while len(names) > 2:
+            part += 1
+            tail = f"{symbols[lhs]}·{index}.{part}"
+            rules.append((head, (names[0], tail)))
+            head = tail
+            names = names[1:]
+        rules.append((head, tuple(names)))
+
+    # Eliminar ε: por cada símbolo anulable, la variante sin él
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs in rules:
+            if lhs not in nullable and all(name in nullable for name in rhs):
+                nullable.add(lhs)
+                changed = True
+    expanded = set()
+    for lhs, rhs in rules:
+        if len(rhs) == 2:
+            first, second = rhs
+            expanded.add((lhs, rhs))
+            if first in nullable:
+                expanded.add((lhs, (second,)))
+            if second in nullable:
+                expanded.add((lhs, (first,)))
+        elif rhs:
+            expanded.add((lhs, rhs))
+
+    # Un no terminal que solo derivaba ε ya no tiene reglas: se descartan sus apariciones
+    heads = {lhs for lhs, _ in expanded}
+    nonterminals = {lhs for lhs, _ in rules}
+    expanded = {(lhs, rhs) for lhs, rhs in expanded
+                if all(name in heads or name not in nonterminals for name in rhs)}
+    heads = {lhs for lhs, _ in expanded}
+
+    # Eliminar unitarias: A hereda las reglas no unitarias de cada B con A ⇒* B
+    units: Dict[str, List[str]] = {}
+    proper: Dict[str, List[Tuple[str, ...]]] = {}
+    for lhs, rhs in expanded:
+        if len(rhs) == 1 and rhs[0] in heads:
+            units.setdefault(lhs, []).append(rhs[0])
+        else:
+            proper.setdefault(lhs, []).append(rhs)
+    productions = []
+    for lhs in sorted(heads, key=lambda name: (name != start, name)):
+        reached = {lhs}
+        pending = [lhs]
+        while pending:
+            for target in units.get(pending.pop(), ()):
+                if target not in reached:
+                    reached.add(target)
+                    pending.append(target)
+        bodies = {rhs for target in reached for rhs in proper.get(target, ())}
+        productions.extend((lhs, rhs) for rhs in sorted(bodies))
+    if not any(lhs == start for lhs, _ in productions):
+        productions.append((start, ()))    # Lenguaje vacío o {ε}: S₀ no deriva nada más
+
+    # Los símbolos inútiles que dejó la eliminación de unitarias se descartan
+    cnf = CompiledGrammar(productions, start)
+    useful = cnf.useful_productions()
+    if len(useful) != len(cnf.productions):
+        cnf = CompiledGrammar([(cnf.symbols[lhs], [cnf.symbols[symbol] for symbol in rhs])
+                               for lhs, rhs in (cnf.productions[index] for index in useful)] or [(start, ())],
+                              start)
+    return cnf, accepts_empty
+
+
+# ============= CYK =============
+
+class CYKRecognizer:
+    """
+    CYK con bitsets sobre la gramática en FNC
+
+    En lugar de la tabla clásica de celdas (i, j), para cada posición i y
+    cada no terminal A se guarda un entero cuyo bit j indica A ⇒* w[i:j].
+    Con A → B C: ends[i][A] |= ends[k][C] para cada k en ends[i][B], de modo
+    que cada unión combina a la vez todas las posiciones finales. Las filas
+    se llenan de derecha a izquierda; dentro de una fila, una lista de
+    trabajo vuelve a aplicar las reglas cuyo primer símbolo creció.
+    """
+
+    def __init__(self, grammar: CompiledGrammar):
+        self.cnf, self.accepts_empty = to_cnf(grammar)
+        cnf = self.cnf
+        count = cnf.nonterminal_count
+        self.terminal_rules: Dict[str, List[int]] = {}
+        self.binary_rules: List[List[Tuple[int, int]]] = [[] for _ in range(count)]
+        for lhs, rhs in cnf.productions:
+            if len(rhs) == 1:
+                self.terminal_rules.setdefault(cnf.symbols[rhs[0]], []).append(lhs)
+            elif len(rhs) == 2:
+                self.binary_rules[rhs[0]].append((lhs, rhs[1]))
+
+    def recognize(self, terminals: Sequence[str]) -> bool:
+        """¿La secuencia de terminales pertenece al lenguaje?"""
+        length = len(terminals)
+        if length == 0:
+            return self.accepts_empty
+        count = self.cnf.nonterminal_count
+        binary_rules = self.binary_rules
+        rows: List[Optional[List[int]]] = [None] * length + [[0] * count]
+        for position in range(length - 1, -1, -1):
+            row = [0] * count
+            worklist = []
+            for lhs in self.terminal_rules.get(terminals[position], ()):
+                row[lhs] |= 1 << (position + 1)
+                worklist.append(lhs)
+            while worklist:
+                first = worklist.pop()
+                middles = row[first]
+                for lhs, second in binary_rules[first]:
+                    ends = 0
+                    remaining = middles
+                    while remaining:
+                        low = remaining & -remaining
+                        ends |= rows[low.bit_length() - 1][second]
+                        remaining ^= low
+                    if ends & ~row[lhs]:
+                        row[lhs] |= ends
+                        worklist.append(lhs)
+            rows[position] = row
+        return bool(rows[0][self.cnf.start] >> length & 1)
+
+
+# ============= VERIFICADOR DE PERTENENCIA =============
+
+@dataclass
+class MembershipResult:
+    """Veredicto de cada algoritmo para un mismo programa"""
+    tokens: int
+    earley: bool
+    cyk: bool
+    parser: bool
+    parser_error: Optional[str] = None
+
+    @property
+    def consistent(self) -> bool:
+        """Earley y CYK deciden lo mismo y coinciden con el Parser"""
+        return self.earley == self.cyk == self.parser
+
+
+class MembershipChecker:
+    """
+    Problema de la pertenencia para la gramática formal: reconoce con Earley
+    y CYK la salida del Lexer y contrasta el resultado con Parser.parse
+
+    La gramática formal describe un subconjunto del lenguaje del Parser (sin
+    elif, `**`, `%`, menos unario, indexación ni elementos de lista): un
+    programa fuera de ese subconjunto aparece como discrepancia.
+    """
+
+    def __init__(self, grammar):
+        """
+        Args:
+            grammar: Grammar de formal_properties o CompiledGrammar
+        """
+        self.grammar = grammar if isinstance(grammar, CompiledGrammar) else CompiledGrammar.from_grammar(grammar)
+        self.earley = EarleyRecognizer(self.grammar)
+        self.cyk = CYKRecognizer(self.grammar)
+
+    def check(self, source) -> MembershipResult:
+        try:
+            tokens = Lexer(source).tokenize()
+        except LexerError as error:
+            return MembershipResult(0, False, False, False, str(error))
+        terminals = grammar_terminals(tokens)
+        parser_error = None
+        try:
+            Parser(tokens).parse()
+        except ParserError as error:
+            parser_error = str(error)
+        return MembershipResult(len(terminals), self.earley.recognize(terminals), self.cyk.recognize(terminals),
+                                parser_error is None, parser_error)
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    from formal_properties import FormalPropertiesAnalyzer
+
+    checker = MembershipChecker(FormalPropertiesAnalyzer().grammar)
+    programs = {
+        "Subconjunto formal": "x = 10\nif x > 5:\n    print(x)\nelse:\n    y = []\n",
+        "Bucle for": "for i in range(len(x)):\n    total = total + i * 2\n",
+        "Fuera del subconjunto (elif)": "if x < 1:\n    y = 1\nelif x > 2:\n    y = 2\n",
+        "Error de sintaxis": "x = (1 + \nprint(x)\n",
+    }
+
+    print("=" * 80)
+    print("PROBLEMA DE LA PERTENENCIA (EARLEY Y CYK)")
+    print("=" * 80)
+    print(f"Gramática en FNC: {len(checker.cyk.cnf.productions)} producciones, "
+          f"{checker.cyk.cnf.nonterminal_count} no terminales")
+    for name, source in programs.items():
+        result = checker.check(source)
+        print(f"{name:<30} tokens: {result.tokens:3}   Earley: {'SÍ' if result.earley else 'NO'}   "
+              f"CYK: {'SÍ' if result.cyk else 'NO'}   Parser: {'SÍ' if result.parser else 'NO'}")
@@ -8,6 +8,11 @@ from typing import Set, List, Dict, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from chart_parser import MembershipChecker, MembershipResult
+from grammar_analysis import CompiledGrammar, LL1Conflict, grammar_sets
+from grammar_reduction import reduce_grammar
+from lr_parser import LALRTableBuilder, LRConflict, Production
+
 
 class LanguageType(Enum):
     """Tipos de lenguajes según la jerarquía de Chomsky"""
@@ -46,6 +51,15 @@ class FormalPropertiesAnalyzer:
     def __init__(self):
         self.grammar = self._define_grammar()
         self.analysis_results = {}
+        self._compiled_grammar = None
+        self._membership_checker = None
+    
+    @property
+    def compiled_grammar(self) -> CompiledGrammar:
+        """Grafo de dependencias de la gramática, compilado una sola vez"""
+        if self._compiled_grammar is None:
+            self._compiled_grammar = CompiledGrammar.from_grammar(self.grammar)
+        return self._compiled_grammar
     
     def _define_grammar(self) -> Grammar:
         """
@@ -54,7 +68,7 @@ class FormalPropertiesAnalyzer:
         """
         # Símbolos no terminales
         N = {
-            'program', 'stmt_list', 'stmt', 'assign', 'print', 'if', 'while', 'for',
+            'program', 'stmt_list', 'stmt', 'assign', 'print_stmt', 'if_stmt', 'while_stmt', 'for_stmt',
             'block', 'expr', 'comparison', 'arithmetic', 'term', 'factor',
             'list', 'call'
         }
@@ -77,24 +91,24 @@ class FormalPropertiesAnalyzer:
             
             # Sentencias
             ('stmt', 'assign'),
-            ('stmt', 'print'),
-            ('stmt', 'if'),
-            ('stmt', 'while'),
-            ('stmt', 'for'),
+            ('stmt', 'print_stmt'),
+            ('stmt', 'if_stmt'),
+            ('stmt', 'while_stmt'),
+            ('stmt', 'for_stmt'),
             
             # Asignación
             ('assign', 'ID = expr'),
             
             # Impresión
-            ('print', 'print ( expr )'),
+            ('print_stmt', 'print ( expr )'),
             
             # Condicional
-            ('if', 'if expr : block'),
-            ('if', 'if expr : block else : block'),
+            ('if_stmt', 'if expr : block'),
+            ('if_stmt', 'if expr : block else : block'),
             
             # Bucles
-            ('while', 'while expr : block'),
-            ('for', 'for ID in expr : block'),
+            ('while_stmt', 'while expr : block'),
+            ('for_stmt', 'for ID in expr : block'),
             
             # Bloques
             ('block', 'INDENT stmt_list DEDENT'),
@@ -268,7 +282,7 @@ class FormalPropertiesAnalyzer:
         if lang_type == LanguageType.TYPE_2:  # Libre de contexto
             properties['membership'] = (
                 True, 
-                "El problema de pertenencia es DECIDIBLE mediante el algoritmo CYK o parsing"
+                "El problema de pertenencia es DECIDIBLE mediante el algoritmo CYK o Earley (check_membership)"
             )
             properties['emptiness'] = (
                 True,
@@ -305,28 +319,10 @@ class FormalPropertiesAnalyzer:
         Returns:
             (es_vacio, explicación)
         """
-        # Algoritmo: verificar si el símbolo inicial es alcanzable
-        # y si puede generar alguna cadena de terminales
-        
-        # Conjunto de símbolos que pueden generar terminales
-        generating = set()
-        
-        # Primera pasada: encontrar símbolos que generan directamente terminales
-        changed = True
-        while changed:
-            changed = False
-            for lhs, rhs in self.grammar.P:
-                if lhs in generating:
-                    continue
-                
-                # Si la producción es vacía o solo tiene terminales/generating
-                tokens = rhs.split() if rhs else []
-                if all(t in self.grammar.Sigma or t in generating for t in tokens):
-                    generating.add(lhs)
-                    changed = True
-        
-        # El lenguaje NO es vacío si el símbolo inicial puede generar terminales
-        is_empty = self.grammar.S not in generating
+        # Algoritmo: lista de trabajo sobre la gramática compilada; cada
+        # aparición de un no terminal en un lado derecho se procesa una vez
+        graph = self.compiled_grammar
+        is_empty = graph.is_empty()
         
         if is_empty:
             return True, f"El lenguaje es VACÍO: el símbolo inicial '{self.grammar.S}' no puede generar cadenas"
@@ -340,39 +336,50 @@ class FormalPropertiesAnalyzer:
         Returns:
             (es_finito, explicación)
         """
-        # Detectar recursión en las producciones
-        # Si hay recursión, el lenguaje es infinito
-        
-        def has_recursion(symbol: str, visited: Set[str], stack: Set[str]) -> bool:
-            """Detecta recursión usando DFS"""
-            if symbol in stack:
-                return True
-            
-            if symbol in visited:
-                return False
-            
-            visited.add(symbol)
-            stack.add(symbol)
-            
-            for lhs, rhs in self.grammar.P:
-                if lhs == symbol:
-                    tokens = rhs.split() if rhs else []
-                    for token in tokens:
-                        if token in self.grammar.N:
-                            if has_recursion(token, visited, stack):
-                                return True
-            
-            stack.remove(symbol)
-            return False
-        
-        # Verificar recursión desde el símbolo inicial
-        has_cycle = has_recursion(self.grammar.S, set(), set())
-        
-        if has_cycle:
-            return False, "El lenguaje es INFINITO: la gramática contiene recursión"
+        # Componentes fuertemente conexas (Tarjan) entre símbolos útiles:
+        # el lenguaje es infinito si algún ciclo agrega símbolos que derivan
+        # cadenas no vacías (los ciclos unitarios o de ε no cuentan)
+        graph = self.compiled_grammar
+        pumping = graph.pumping_nonterminals()
+        
+        if pumping:
+            names = ', '.join(graph.names(pumping))
+            return False, f"El lenguaje es INFINITO: la gramática contiene recursión ({names})"
         else:
             return True, "El lenguaje es FINITO: la gramática no contiene recursión"
     
+    def check_membership(self, source: str) -> MembershipResult:
+        """
+        Problema de la pertenencia: ¿el programa pertenece a L(G)?
+        
+        Reconoce la salida del Lexer con Earley y con CYK (sobre la FNC de la
+        gramática) y contrasta el veredicto con el Parser descendente
+        """
+        if self._membership_checker is None:
+            self._membership_checker = MembershipChecker(self.compiled_grammar)
+        return self._membership_checker.check(source)
+    
+    def reduced_grammar(self) -> Grammar:
+        """
+        Gramática equivalente sin símbolos inútiles ni las producciones
+        unitarias cuya eliminación no agranda el autómata LALR(1)
+        """
+        return reduce_grammar(self.grammar)
+    
+    def check_ll1_conflicts(self) -> List[LL1Conflict]:
+        """
+        Conflictos LL(1): producciones de un mismo no terminal cuyos
+        conjuntos de predicción (FIRST, y FOLLOW si son anulables) se cortan
+        """
+        return grammar_sets(self.compiled_grammar).ll1_conflicts()
+    
+    def check_lr_conflicts(self) -> List[LRConflict]:
+        """Conflictos de las tablas LALR(1) de la gramática (aumentada con S' → S)"""
+        productions = [Production(0, self.grammar.S + "'", [self.grammar.S])]
+        for lhs, rhs in self.grammar.P:
+            productions.append(Production(len(productions), lhs, rhs.split()))
+        return LALRTableBuilder(productions).conflicts
+    
     def analyze_all_properties(self) -> str:
         """
         Realiza un análisis completo de todas las propiedades formales
@@ -427,24 +434,42 @@ class FormalPropertiesAnalyzer:
         is_finite, explanation = self.check_language_finiteness()
         output += f"{explanation}\n\n"
         
-        # 7. Compatibilidad con herramientas formales
-        output += "7. COMPATIBILIDAD CON HERRAMIENTAS FORMALES\n"
+        # 7. Conflictos LL(1) y LR
+        output += "7. CONFLICTOS LL(1) Y LALR(1)\n"
+        output += "-" * 100 + "\n"
+        ll1_conflicts = self.check_ll1_conflicts()
+        lr_conflicts = self.check_lr_conflicts()
+        output += f"Conflictos LL(1): {len(ll1_conflicts)}\n"
+        for conflict in ll1_conflicts:
+            output += f"  {conflict}\n"
+        output += f"Conflictos LALR(1): {len(lr_conflicts)}\n"
+        for conflict in lr_conflicts:
+            output += f"  {conflict}\n"
+        output += "\n"
+        
+        # 8. Compatibilidad con herramientas formales
+        output += "8. COMPATIBILIDAD CON HERRAMIENTAS FORMALES\n"
         output += "-" * 100 + "\n"
-        output += "✓ Compatible con LEX/YACC: SÍ (gramática LALR)\n"
+        is_lalr = not lr_conflicts
+        output += f"{'✓' if is_lalr else '✗'} Compatible con LEX/YACC: {'SÍ' if is_lalr else 'NO'} (gramática LALR)\n"
         output += "✓ Compatible con ANTLR: SÍ (gramática LL(*))\n"
-        output += "✓ Compatible con Bison: SÍ (gramática LR)\n"
+        output += f"{'✓' if is_lalr else '✗'} Compatible con Bison: {'SÍ' if is_lalr else 'NO'} (gramática LR)\n"
         output += "✓ Expresiones regulares para tokens: SÍ\n\n"
         
-        # 8. Resumen
-        output += "8. RESUMEN\n"
+        # 9. Resumen
+        output += "9. RESUMEN\n"
         output += "-" * 100 + "\n"
         output += f"• Tipo de lenguaje: {lang_type.value}\n"
         output += f"• Número de no-terminales: {len(self.grammar.N)}\n"
         output += f"• Número de terminales: {len(self.grammar.Sigma)}\n"
         output += f"• Número de producciones: {len(self.grammar.P)}\n"
+        reduced = self.reduced_grammar()
+        output += f"• Gramática reducida: {len(reduced.N)} no-terminales, {len(reduced.P)} producciones\n"
         output += f"• Símbolo inicial: {self.grammar.S}\n"
         output += f"• Lenguaje vacío: {'SÍ' if is_empty else 'NO'}\n"
         output += f"• Lenguaje finito: {'SÍ' if is_finite else 'NO'}\n"
+        output += f"• Gramática LL(1): {'SÍ' if not ll1_conflicts else f'NO ({len(ll1_conflicts)} conflictos)'}\n"
+        output += f"• Gramática LALR(1): {'SÍ' if is_lalr else f'NO ({len(lr_conflicts)} conflictos)'}\n"
         
         output += "\n" + "=" * 100 + "\n"
         
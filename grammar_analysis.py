@@ -0,0 +1,556 @@
+"""
+Análisis de Gramáticas Libres de Contexto
+Compila una gramática a un grafo indexado (símbolos como enteros) y resuelve
+sobre él, en tiempo lineal, los problemas del vacío, la alcanzabilidad, la
+recursión y la finitud del lenguaje, los conjuntos anulables, FIRST y FOLLOW
+(como bitsets) y los conflictos LL(1)
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+# Marcador de fin de entrada en los conjuntos FOLLOW
+END_MARKER = '$'
+
+
+def _tarjan(edges: List[List[int]]) -> List[List[int]]:
+    """
+    Componentes fuertemente conexas de un grafo dado por listas de
+    adyacencia (Tarjan, iterativo para admitir cadenas de miles de nodos),
+    en orden topológico inverso
+    """
+    count = len(edges)
+    index_of = [-1] * count
+    lowlink = [0] * count
+    on_stack = [False] * count
+    stack = []
+    components = []
+    counter = 0
+    for root in range(count):
+        if index_of[root] != -1:
+            continue
+        # Marcos (nodo, próxima arista a visitar)
+        frames = [(root, 0)]
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while frames:
+            node, edge = frames[-1]
+            targets = edges[node]
+            if edge < len(targets):
+                frames[-1] = (node, edge + 1)
+                target = targets[edge]
+                if index_of[target] == -1:
+                    index_of[target] = lowlink[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack[target] = True
+                    frames.append((target, 0))
+                elif on_stack[target] and index_of[target] < lowlink[node]:
+                    lowlink[node] = index_of[target]
+                continue
+            frames.pop()
+            if frames:
+                parent = frames[-1][0]
+                if lowlink[node] < lowlink[parent]:
+                    lowlink[parent] = lowlink[node]
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+class CompiledGrammar:
+    """
+    Gramática compilada: cada símbolo es un entero
+
+    Los no terminales ocupan los códigos 0..nonterminal_count-1 (el símbolo
+    inicial es el 0) y los terminales los siguientes. Las producciones son
+    (lhs, rhs) con rhs como tupla de códigos, y se indexan por lado
+    izquierdo (`by_lhs`) y por aparición de cada no terminal en un lado
+    derecho (`occurrences`, una entrada por aparición). El grafo de
+    dependencias (`edges`) une cada no terminal con los no terminales de
+    sus lados derechos.
+
+    Los análisis se calculan una sola vez y se guardan en la instancia.
+    """
+
+    def __init__(self, productions: Iterable[Tuple[str, Sequence[str]]], start: str,
+                 nonterminals: Optional[Iterable[str]] = None):
+        """
+        Args:
+            productions: Pares (lhs, rhs), con rhs como secuencia de símbolos
+            start: Símbolo inicial
+            nonterminals: No terminales declarados; los lados izquierdos
+                siempre lo son y todo otro símbolo es terminal
+        """
+        productions = [(lhs, tuple(rhs)) for lhs, rhs in productions]
+        names = [start]
+        seen = {start}
+        for name in [lhs for lhs, _ in productions] + sorted(nonterminals or ()):
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+        self.nonterminal_count = len(names)
+        for _, rhs in productions:
+            for name in rhs:
+                if name not in seen:
+                    seen.add(name)
+                    names.append(name)
+        self.symbols: List[str] = names
+        self.codes: Dict[str, int] = {name: code for code, name in enumerate(names)}
+        self.start = 0
+
+        codes = self.codes
+        self.productions: List[Tuple[int, Tuple[int, ...]]] = [
+            (codes[lhs], tuple(codes[name] for name in rhs)) for lhs, rhs in productions
+        ]
+        count = self.nonterminal_count
+        self.by_lhs: List[List[int]] = [[] for _ in range(count)]
+        self.occurrences: List[List[int]] = [[] for _ in range(count)]
+        edges = [set() for _ in range(count)]
+        for index, (lhs, rhs) in enumerate(self.productions):
+            self.by_lhs[lhs].append(index)
+            for symbol in rhs:
+                if symbol < count:
+                    self.occurrences[symbol].append(index)
+                    edges[lhs].add(symbol)
+        self.edges: List[List[int]] = [sorted(targets) for targets in edges]
+
+        self._generating = None
+        self._reachable = None
+        self._components = None
+        self._digest = None
+
+    @classmethod
+    def from_grammar(cls, grammar) -> 'CompiledGrammar':
+        """Compila una Grammar de formal_properties (lados derechos como texto)"""
+        return cls(((lhs, rhs.split()) for lhs, rhs in grammar.P), grammar.S, grammar.N)
+
+    @classmethod
+    def from_productions(cls, productions) -> 'CompiledGrammar':
+        """Compila las Production de lr_parser (la 0 es la aumentada S' → S)"""
+        return cls(((production.lhs, production.rhs) for production in productions), productions[0].lhs)
+
+    @property
+    def terminal_count(self) -> int:
+        return len(self.symbols) - self.nonterminal_count
+
+    def is_nonterminal(self, symbol: int) -> bool:
+        return symbol < self.nonterminal_count
+
+    def names(self, symbols: Iterable[int]) -> List[str]:
+        """Nombres de un conjunto de códigos, en el orden de la gramática"""
+        return [self.symbols[symbol] for symbol in sorted(symbols)]
+
+    @property
+    def digest(self) -> bytes:
+        """SHA-256 de símbolos y producciones: identifica la gramática en las cachés"""
+        if self._digest is None:
+            digest = hashlib.sha256(f"{self.nonterminal_count}\0".encode('ascii'))
+            digest.update('\0'.join(self.symbols).encode('utf-8'))
+            for lhs, rhs in self.productions:
+                digest.update(f"\n{lhs}:{','.join(map(str, rhs))}".encode('ascii'))
+            self._digest = digest.digest()
+        return self._digest
+
+    def format_production(self, index: int) -> str:
+        lhs, rhs = self.productions[index]
+        return f"{self.symbols[lhs]} → {' '.join(self.symbols[symbol] for symbol in rhs) or 'ε'}"
+
+    # ----- Vacío y alcanzabilidad -----
+
+    def generating(self) -> List[bool]:
+        """
+        No terminales que derivan alguna cadena de terminales
+
+        Lista de trabajo: cada producción lleva la cuenta de apariciones de
+        no terminales aún no generadores en su lado derecho; al llegar a
+        cero su lado izquierdo pasa a ser generador. Cada aparición se
+        descuenta una sola vez: O(|G|).
+        """
+        if self._generating is None:
+            count = self.nonterminal_count
+            pending = [sum(1 for symbol in rhs if symbol < count) for _, rhs in self.productions]
+            generating = [False] * count
+            worklist = []
+            for index, (lhs, _) in enumerate(self.productions):
+                if pending[index] == 0 and not generating[lhs]:
+                    generating[lhs] = True
+                    worklist.append(lhs)
+            while worklist:
+                symbol = worklist.pop()
+                for index in self.occurrences[symbol]:
+                    pending[index] -= 1
+                    if pending[index] == 0:
+                        lhs = self.productions[index][0]
+                        if not generating[lhs]:
+                            generating[lhs] = True
+                            worklist.append(lhs)
+            self._generating = generating
+        return self._generating
+
+    def is_empty(self) -> bool:
+        """L(G) = ∅ si el símbolo inicial no genera ninguna cadena"""
+        return not self.generating()[self.start]
+
+    def reachable(self) -> List[bool]:
+        """
+        No terminales alcanzables desde el símbolo inicial usando solo
+        producciones cuyos símbolos son todos generadores (símbolos útiles)
+        """
+        if self._reachable is None:
+            count = self.nonterminal_count
+            generating = self.generating()
+            reachable = [False] * count
+            if generating[self.start]:
+                reachable[self.start] = True
+                worklist = [self.start]
+                while worklist:
+                    for index in self.by_lhs[worklist.pop()]:
+                        rhs = self.productions[index][1]
+                        if all(symbol >= count or generating[symbol] for symbol in rhs):
+                            for symbol in rhs:
+                                if symbol < count and not reachable[symbol]:
+                                    reachable[symbol] = True
+                                    worklist.append(symbol)
+            self._reachable = reachable
+        return self._reachable
+
+    def useful_productions(self) -> List[int]:
+        """Producciones cuyos símbolos son todos útiles (generadores y alcanzables)"""
+        count = self.nonterminal_count
+        reachable = self.reachable()
+        return [index for index, (lhs, rhs) in enumerate(self.productions)
+                if reachable[lhs] and all(symbol >= count or reachable[symbol] for symbol in rhs)]
+
+    # ----- Recursión y finitud -----
+
+    def strongly_connected_components(self) -> List[List[int]]:
+        """
+        Componentes fuertemente conexas del grafo de dependencias, en orden
+        topológico inverso
+        """
+        if self._components is None:
+            self._components = _tarjan(self.edges)
+        return self._components
+
+    def component_of(self) -> List[int]:
+        """Índice de la componente fuertemente conexa de cada no terminal"""
+        component_of = [0] * self.nonterminal_count
+        for number, component in enumerate(self.strongly_connected_components()):
+            for symbol in component:
+                component_of[symbol] = number
+        return component_of
+
+    def recursive_nonterminals(self) -> Set[int]:
+        """No terminales A con A ⇒+ αAβ (en una componente cíclica)"""
+        recursive = set()
+        for component in self.strongly_connected_components():
+            if len(component) > 1 or component[0] in self.edges[component[0]]:
+                recursive.update(component)
+        return recursive
+
+    def pumping_nonterminals(self) -> Set[int]:
+        """
+        No terminales útiles A con A ⇒+ αAβ y αβ ⇒+ w no vacía: cada uno hace
+        infinito el lenguaje
+
+        Las componentes se calculan sobre el grafo de las producciones
+        útiles: un ciclo que pasa por una producción inútil no se puede
+        recorrer en ninguna derivación. Se buscan aristas A → B dentro de
+        una misma componente cuya producción tenga, además de B, un
+        terminal o un no terminal que derive alguna cadena no vacía. Los
+        ciclos de producciones unitarias o anulables no agrandan las cadenas.
+        """
+        count = self.nonterminal_count
+        useful = self.useful_productions()
+        useful_edges = [set() for _ in range(count)]
+        for index in useful:
+            lhs, rhs = self.productions[index]
+            useful_edges[lhs].update(symbol for symbol in rhs if symbol < count)
+        component_of = [0] * count
+        for number, component in enumerate(_tarjan([sorted(targets) for targets in useful_edges])):
+            for symbol in component:
+                component_of[symbol] = number
+
+        # No terminales que derivan una cadena no vacía (lista de trabajo)
+        solid = [False] * count
+        worklist = []
+        for index in useful:
+            lhs, rhs = self.productions[index]
+            if not solid[lhs] and any(symbol >= count for symbol in rhs):
+                solid[lhs] = True
+                worklist.append(lhs)
+        useful_by_symbol = [[] for _ in range(count)]
+        for index in useful:
+            for symbol in set(self.productions[index][1]):
+                if symbol < count:
+                    useful_by_symbol[symbol].append(index)
+        while worklist:
+            for index in useful_by_symbol[worklist.pop()]:
+                lhs = self.productions[index][0]
+                if not solid[lhs]:
+                    solid[lhs] = True
+                    worklist.append(lhs)
+
+        components = set()
+        for index in useful:
+            lhs, rhs = self.productions[index]
+            component = component_of[lhs]
+            if component in components:
+                continue
+            for position, symbol in enumerate(rhs):
+                if symbol < count and component_of[symbol] == component:
+                    rest = rhs[:position] + rhs[position + 1:]
+                    if any(other >= count or solid[other] for other in rest):
+                        components.add(component)
+                        break
+        reachable = self.reachable()
+        return {symbol for symbol in range(count)
+                if component_of[symbol] in components and reachable[symbol]}
+
+    def is_finite(self) -> bool:
+        """L(G) es finito si ningún no terminal útil se puede bombear"""
+        return not self.pumping_nonterminals()
+
+
+# ============= ANULABLES, FIRST Y FOLLOW =============
+#
+# Los conjuntos de terminales son enteros usados como bitsets: el bit i es el
+# terminal de código nonterminal_count + i, y el bit terminal_count es el
+# marcador de fin de entrada. Unir conjuntos es un `|` sobre enteros.
+
+@dataclass
+class LL1Conflict:
+    """Dos producciones del mismo no terminal que predicen un mismo terminal"""
+    nonterminal: str
+    kind: str            # 'FIRST/FIRST' o 'FIRST/FOLLOW'
+    first: str
+    second: str
+    terminals: List[str]
+
+    def __str__(self):
+        return (f"{self.nonterminal}: conflicto {self.kind} entre '{self.first}' y "
+                f"'{self.second}' con {{{', '.join(self.terminals)}}}")
+
+
+class GrammarSets:
+    """
+    Anulables, FIRST y FOLLOW de una gramática compilada
+
+    Cada conjunto se calcula con una lista de trabajo sobre un grafo de
+    inclusiones: FIRST(B) ⊆ FIRST(A) si A → αBβ con α anulable, y
+    FOLLOW(A) ⊆ FOLLOW(B) si A → αBβ con β anulable. Un no terminal vuelve a
+    la lista solo cuando su conjunto crece.
+    """
+
+    def __init__(self, grammar: CompiledGrammar):
+        self.grammar = grammar
+        self.end_bit = 1 << grammar.terminal_count
+        self.nullable = self._compute_nullable()
+        self.first = self._compute_first()
+        self.follow = self._compute_follow()
+        self._suffixes = {}
+
+    def _compute_nullable(self) -> List[bool]:
+        # Como generating(), contando solo producciones sin terminales
+        grammar = self.grammar
+        count = grammar.nonterminal_count
+        pending = [len(rhs) if all(symbol < count for symbol in rhs) else None
+                   for _, rhs in grammar.productions]
+        nullable = [False] * count
+        worklist = []
+        for index, (lhs, _) in enumerate(grammar.productions):
+            if pending[index] == 0 and not nullable[lhs]:
+                nullable[lhs] = True
+                worklist.append(lhs)
+        while worklist:
+            for index in grammar.occurrences[worklist.pop()]:
+                if pending[index] is None:
+                    continue
+                pending[index] -= 1
+                if pending[index] == 0:
+                    lhs = grammar.productions[index][0]
+                    if not nullable[lhs]:
+                        nullable[lhs] = True
+                        worklist.append(lhs)
+        return nullable
+
+    @staticmethod
+    def _propagate(sets: List[int], supersets: List[List[int]]):
+        """Cierra `sets` bajo las inclusiones sets[a] ⊆ sets[b] para b en supersets[a]"""
+        worklist = [symbol for symbol, bits in enumerate(sets) if bits]
+        while worklist:
+            symbol = worklist.pop()
+            bits = sets[symbol]
+            for target in supersets[symbol]:
+                merged = sets[target] | bits
+                if merged != sets[target]:
+                    sets[target] = merged
+                    worklist.append(target)
+
+    def _compute_first(self) -> List[int]:
+        grammar = self.grammar
+        count = grammar.nonterminal_count
+        nullable = self.nullable
+        first = [0] * count
+        supersets = [set() for _ in range(count)]
+        for lhs, rhs in grammar.productions:
+            for symbol in rhs:
+                if symbol >= count:
+                    first[lhs] |= 1 << (symbol - count)
+                    break
+                if symbol != lhs:
+                    supersets[symbol].add(lhs)
+                if not nullable[symbol]:
+                    break
+        self._propagate(first, [list(targets) for targets in supersets])
+        return first
+
+    def _compute_follow(self) -> List[int]:
+        grammar = self.grammar
+        count = grammar.nonterminal_count
+        nullable = self.nullable
+        first = self.first
+        follow = [0] * count
+        follow[grammar.start] = self.end_bit
+        supersets = [set() for _ in range(count)]
+        for lhs, rhs in grammar.productions:
+            # De derecha a izquierda, con FIRST del sufijo ya recorrido
+            bits = 0
+            suffix_nullable = True
+            for symbol in reversed(rhs):
+                if symbol >= count:
+                    bits = 1 << (symbol - count)
+                    suffix_nullable = False
+                    continue
+                follow[symbol] |= bits
+                if suffix_nullable and symbol != lhs:
+                    supersets[lhs].add(symbol)
+                if nullable[symbol]:
+                    bits |= first[symbol]
+                else:
+                    bits = first[symbol]
+                    suffix_nullable = False
+        self._propagate(follow, [list(targets) for targets in supersets])
+        return follow
+
+    def first_of_sequence(self, symbols: Iterable[int]) -> Tuple[int, bool]:
+        """(FIRST de la secuencia, ¿es anulable?)"""
+        count = self.grammar.nonterminal_count
+        bits = 0
+        for symbol in symbols:
+            if symbol >= count:
+                return bits | 1 << (symbol - count), False
+            bits |= self.first[symbol]
+            if not self.nullable[symbol]:
+                return bits, False
+        return bits, True
+
+    def first_of_suffix(self, production: int, position: int) -> Tuple[int, bool]:
+        """first_of_sequence del lado derecho de `production` desde `position` (memoizado)"""
+        key = (production, position)
+        result = self._suffixes.get(key)
+        if result is None:
+            result = self._suffixes[key] = self.first_of_sequence(self.grammar.productions[production][1][position:])
+        return result
+
+    def terminal_names(self, bits: int) -> List[str]:
+        """Nombres de los terminales de un bitset, en el orden de la gramática"""
+        symbols = self.grammar.symbols
+        offset = self.grammar.nonterminal_count
+        names = []
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            names.append(END_MARKER if low == self.end_bit else symbols[offset + index])
+            bits ^= low
+        return names
+
+    def ll1_conflicts(self) -> List[LL1Conflict]:
+        """
+        Pares de producciones de un mismo no terminal cuyos conjuntos de
+        predicción (FIRST del lado derecho, más FOLLOW si es anulable) se cortan
+        """
+        grammar = self.grammar
+        conflicts = []
+        for lhs, indices in enumerate(grammar.by_lhs):
+            seen = 0
+            predicted = []
+            for index in indices:
+                bits, nullable = self.first_of_suffix(index, 0)
+                predict = bits | self.follow[lhs] if nullable else bits
+                if predict & seen:
+                    for other, other_bits, other_predict in predicted:
+                        overlap = predict & other_predict
+                        if overlap:
+                            kind = 'FIRST/FIRST' if bits & other_bits else 'FIRST/FOLLOW'
+                            conflicts.append(LL1Conflict(grammar.symbols[lhs], kind,
+                                                         grammar.format_production(other),
+                                                         grammar.format_production(index),
+                                                         self.terminal_names(overlap)))
+                seen |= predict
+                predicted.append((index, bits, predict))
+        return conflicts
+
+
+# Análisis compartidos por todo el proceso, por digest de la gramática
+_GRAMMAR_SETS = {}
+_GRAMMAR_SETS_LOCK = threading.Lock()
+
+
+def grammar_sets(grammar: CompiledGrammar) -> GrammarSets:
+    """
+    GrammarSets de la gramática; una gramática con el mismo digest (aunque
+    sea otra instancia) reutiliza el análisis ya calculado
+    """
+    digest = grammar.digest
+    with _GRAMMAR_SETS_LOCK:
+        sets = _GRAMMAR_SETS.get(digest)
+    if sets is None:
+        sets = GrammarSets(grammar)
+        with _GRAMMAR_SETS_LOCK:
+            sets = _GRAMMAR_SETS.setdefault(digest, sets)
+    return sets
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    grammar = CompiledGrammar([
+        ('S', ['A', 'B']),
+        ('A', ['a', 'A']),
+        ('A', ['a']),
+        ('B', ['b']),
+        ('B', []),
+        ('C', ['C', 'c']),   # No genera: solo se deriva a sí mismo
+        ('D', ['d']),        # Inalcanzable
+    ], 'S')
+
+    print("=" * 80)
+    print("ANÁLISIS DE GRAMÁTICAS")
+    print("=" * 80)
+    generating = grammar.generating()
+    reachable = grammar.reachable()
+    print(f"Generadores:  {grammar.names(s for s in range(grammar.nonterminal_count) if generating[s])}")
+    print(f"Alcanzables:  {grammar.names(s for s in range(grammar.nonterminal_count) if reachable[s])}")
+    print(f"Recursivos:   {grammar.names(grammar.recursive_nonterminals())}")
+    print(f"Vacío: {'SÍ' if grammar.is_empty() else 'NO'}   Finito: {'SÍ' if grammar.is_finite() else 'NO'}")
+
+    sets = grammar_sets(grammar)
+    for symbol in range(grammar.nonterminal_count):
+        print(f"  {grammar.symbols[symbol]:<3} anulable: {'SÍ' if sets.nullable[symbol] else 'NO'}   "
+              f"FIRST = {{{', '.join(sets.terminal_names(sets.first[symbol]))}}}   "
+              f"FOLLOW = {{{', '.join(sets.terminal_names(sets.follow[symbol]))}}}")
+    for conflict in sets.ll1_conflicts():
+        print(f"  {conflict}")
@@ -0,0 +1,275 @@
+"""
+Reducción de Gramáticas
+Elimina símbolos inútiles y producciones unitarias (A → B) sin cambiar el
+lenguaje, tanto de la gramática formal de FormalPropertiesAnalyzer como de
+las producciones de LRParser (componiendo sus acciones semánticas). Un
+parser LR generado a partir de la gramática reducida hace menos reducciones
+por token.
+"""
+
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+from grammar_analysis import CompiledGrammar
+from lr_parser import LALRTableBuilder, LRParser, Production, TRACE_REDUCE
+from python_compiler import Token
+
+
+# Regla genérica: (lado izquierdo, lado derecho, acción semántica o None)
+Rule = Tuple[str, Tuple[str, ...], Optional[Callable]]
+
+
+def remove_useless_symbols(rules: Sequence[Rule], start: str) -> List[Rule]:
+    """Reglas cuyos símbolos son todos generadores y alcanzables desde `start`"""
+    grammar = CompiledGrammar(((lhs, rhs) for lhs, rhs, _ in rules), start)
+    return [rules[index] for index in grammar.useful_productions()]
+
+
+def _compose(units: Tuple[Optional[Callable], ...], inner: Optional[Callable]) -> Optional[Callable]:
+    """
+    Acción de A → γ a partir de la cadena A → B1 → ... → Bk → γ: aplica la
+    de Bk → γ y luego las unitarias de adentro hacia afuera, todas sobre el
+    mismo rango de tokens
+    """
+    units = tuple(unit for unit in units if unit is not None)
+    if not units:
+        return inner
+
+    def semantic(context, values, start, end):
+        if inner is not None:
+            value = inner(context, values, start, end)
+        else:
+            value = values[0] if values else None
+        for unit in reversed(units):
+            value = unit(context, [value], start, end)
+        return value
+    return semantic
+
+
+def _split_units(rules: Sequence[Rule], keep: Iterable[str]):
+    """(no terminales en orden, unitarias {A: [(B, acción)]}, resto {A: [(rhs, acción)]})"""
+    nonterminals = {lhs for lhs, _, _ in rules}
+    keep = set(keep)
+    units = {}
+    proper = {}
+    order = []
+    for lhs, rhs, semantic in rules:
+        if lhs not in proper:
+            order.append(lhs)
+            proper[lhs] = []
+            units[lhs] = []
+        if len(rhs) == 1 and rhs[0] in nonterminals and lhs not in keep:
+            units[lhs].append((rhs[0], semantic))
+        else:
+            proper[lhs].append((rhs, semantic))
+    return order, units, proper
+
+
+def _expansion_sizes(order, units, proper):
+    """Producciones que se copiarían al eliminar A → B, para cada B"""
+    sizes = {}
+    for nonterminal in order:
+        reached = {nonterminal}
+        pending = [nonterminal]
+        size = 0
+        while pending:
+            current = pending.pop()
+            size += len(proper[current])
+            for target, _ in units[current]:
+                if target not in reached:
+                    reached.add(target)
+                    pending.append(target)
+        sizes[nonterminal] = size
+    return sizes
+
+
+def eliminate_unit_productions(rules: Sequence[Rule], keep: Iterable[str] = (),
+                               limit: Optional[int] = None) -> List[Rule]:
+    """
+    Reemplaza cada A → B por las producciones no unitarias de B (y de lo
+    que B alcanza por unitarias), con la acción semántica compuesta
+
+    Args:
+        rules: Reglas de la gramática
+        keep: No terminales cuyas producciones unitarias se conservan (p. ej.
+            el símbolo inicial aumentado S' → S de un parser LR)
+        limit: Si se indica, A → B solo se elimina cuando B se expande a lo
+            sumo en `limit` producciones
+    """
+    order, units, proper = _split_units(rules, keep)
+    if limit is not None:
+        sizes = _expansion_sizes(order, units, proper)
+        for lhs in order:
+            inlined = []
+            for target, semantic in units[lhs]:
+                if sizes[target] <= limit:
+                    inlined.append((target, semantic))
+                else:
+                    proper[lhs].append(((target,), semantic))
+            units[lhs] = inlined
+
+    reduced = []
+    for lhs in order:
+        body = list(proper[lhs])
+        seen = {body_rhs for body_rhs, _ in body}
+        # Recorrido en anchura por las unitarias, con la cadena de acciones de cada camino
+        reached = {lhs}
+        pending = [(target, (semantic,)) for target, semantic in units[lhs]]
+        while pending:
+            following = []
+            for target, chain in pending:
+                if target in reached:
+                    continue
+                reached.add(target)
+                for rhs, semantic in proper[target]:
+                    if rhs not in seen:
+                        seen.add(rhs)
+                        body.append((rhs, _compose(chain, semantic)))
+                following.extend((inner, chain + (semantic,)) for inner, semantic in units[target])
+            pending = following
+        reduced.extend((lhs, rhs, semantic) for rhs, semantic in body)
+    return reduced
+
+
+def lalr_state_count(rules: Sequence[Rule], start: str, keep: Iterable[str] = ()) -> int:
+    """Estados LALR(1) de las reglas (aumentadas con S' → S salvo que `start` esté en `keep`)"""
+    return len(LALRTableBuilder(_productions(rules, start, keep)).states)
+
+
+def _productions(rules: Sequence[Rule], start: str, keep: Iterable[str] = ()) -> List[Production]:
+    productions = [] if start in set(keep) else [Production(0, start + "'", [start])]
+    for lhs, rhs, semantic in rules:
+        productions.append(Production(len(productions), lhs, list(rhs), semantic))
+    return productions
+
+
+def choose_unit_limit(rules: Sequence[Rule], start: str, keep: Iterable[str] = ()) -> int:
+    """
+    Mayor límite de eliminate_unit_productions con el que el autómata
+    LALR(1) no tiene más estados que el de la gramática original
+
+    Eliminar unitarias siempre ahorra reducciones, pero copiar cadenas
+    largas (como las de precedencia de expresiones) multiplica los estados.
+    Se prueba cada tamaño de expansión distinto, de menor a mayor.
+    """
+    keep = tuple(keep)
+    baseline = lalr_state_count(rules, start, keep)
+    order, units, proper = _split_units(rules, keep)
+    sizes = _expansion_sizes(order, units, proper)
+    best = 0
+    for limit in sorted({sizes[target] for lhs in order for target, _ in units[lhs]}):
+        reduced = remove_useless_symbols(eliminate_unit_productions(rules, keep, limit), start)
+        if lalr_state_count(reduced, start, keep) <= baseline:
+            best = limit
+    return best
+
+
+def reduce_rules(rules: Sequence[Rule], start: str, keep: Iterable[str] = (),
+                 limit: Union[int, str, None] = 'auto') -> List[Rule]:
+    """
+    Símbolos inútiles, producciones unitarias y de nuevo símbolos inútiles
+    (los no terminales a los que solo se llegaba por unitarias quedan
+    inalcanzables)
+
+    Args:
+        limit: Límite de eliminate_unit_productions; 'auto' usa
+            choose_unit_limit() y None elimina todas las unitarias
+    """
+    keep = tuple(keep)
+    rules = remove_useless_symbols(rules, start)
+    if limit == 'auto':
+        limit = choose_unit_limit(rules, start, keep)
+    rules = eliminate_unit_productions(rules, keep, limit)
+    return remove_useless_symbols(rules, start)
+
+
+def reduce_grammar(grammar, limit: Union[int, str, None] = 'auto'):
+    """Gramática de formal_properties reducida (misma clase, lados derechos como texto)"""
+    rules = reduce_rules([(lhs, tuple(rhs.split()), None) for lhs, rhs in grammar.P], grammar.S, limit=limit)
+    P = [(lhs, ' '.join(rhs)) for lhs, rhs, _ in rules]
+    N = {lhs for lhs, _ in P} | {grammar.S}
+    Sigma = {symbol for _, rhs, _ in rules for symbol in rhs if symbol not in N}
+    return type(grammar)(N, Sigma, P, grammar.S)
+
+
+def reduce_lr_productions(productions: List[Production],
+                          limit: Union[int, str, None] = 'auto') -> List[Production]:
+    """
+    Producciones de LRParser reducidas y renumeradas; la 0 sigue siendo la
+    aumentada S' → S y las acciones semánticas construyen el mismo AST
+    """
+    start = productions[0].lhs
+    rules = reduce_rules([(production.lhs, tuple(production.rhs), production.semantic)
+                          for production in productions], start, keep=(start,), limit=limit)
+    return _productions(rules, start, keep=(start,))
+
+
+# ============= REPORTE =============
+
+def count_reductions(parser: LRParser, tokens: List[Token]) -> int:
+    """Reducciones que hace el autómata de pila para analizar los tokens (traza 'summary' o 'full')"""
+    context = parser.new_context()
+    parser.parse(tokens, context)
+    return sum(1 for event in context.trace if event[0] == TRACE_REDUCE)
+
+
+def reduction_report(grammar, tokens: List[Token]) -> str:
+    """
+    Tamaño de la gramática formal y de la del LRParser antes y después de
+    reducirlas (con el límite automático y sin ninguna unitaria), estados
+    LALR(1) y reducciones por token al analizar `tokens` con el LRParser
+    """
+    header = f"  {'':<28} {'Original':>10} {'Reducida':>10} {'Sin unit.':>10}\n"
+
+    def row(name, values, digits=0):
+        return f"  {name:<28}" + "".join(f" {value:>10.{digits}f}" for value in values) + "\n"
+
+    formal = [grammar, reduce_grammar(grammar), reduce_grammar(grammar, None)]
+    builders = [LALRTableBuilder(_productions([(lhs, tuple(rhs.split()), None) for lhs, rhs in variant.P],
+                                              variant.S)) for variant in formal]
+    output = "GRAMÁTICA FORMAL\n"
+    output += "-" * 100 + "\n" + header
+    output += row("No terminales", [len(variant.N) for variant in formal])
+    output += row("Producciones", [len(variant.P) for variant in formal])
+    output += row("Estados LALR(1)", [len(builder.states) for builder in builders])
+    output += row("Conflictos LALR(1)", [len(builder.conflicts) for builder in builders])
+    output += "\n"
+
+    original = LRParser(table_cache=None, trace='summary')
+    parsers = [original] + [LRParser(table_cache=None, trace='summary',
+                                     productions=reduce_lr_productions(original.productions, limit))
+                            for limit in ('auto', None)]
+    reductions = [count_reductions(parser, tokens) for parser in parsers]
+    output += f"GRAMÁTICA DEL LRParser ({len(tokens)} tokens)\n"
+    output += "-" * 100 + "\n" + header
+    output += row("No terminales", [len(parser.tables.nonterminals) for parser in parsers])
+    output += row("Producciones", [len(parser.productions) for parser in parsers])
+    output += row("Estados LALR(1)", [parser.tables.state_count for parser in parsers])
+    output += row("Celdas ACTION/GOTO", [len(parser.tables.action_table) + len(parser.tables.goto_table)
+                                         for parser in parsers])
+    output += row("Reducciones", reductions)
+    output += row("Reducciones por token", [count / len(tokens) for count in reductions], 2)
+    return output
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    from formal_properties import FormalPropertiesAnalyzer
+    from python_compiler import Lexer
+
+    code = """
+x = 2 * (y - 1)
+if x >= 4:
+    print(x)
+elif x < 0:
+    print(-x)
+for i in range(len(lista)):
+    total = total + lista[i] % 3
+"""
+
+    print("=" * 80)
+    print("REDUCCIÓN DE GRAMÁTICAS")
+    print("=" * 80)
+    analyzer = FormalPropertiesAnalyzer()
+    print(reduce_grammar(analyzer.grammar))
+    print()
+    print(reduction_report(analyzer.grammar, Lexer(code).tokenize()))
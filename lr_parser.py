@@ -4,10 +4,24 @@ Implementa autómata de pila para análisis sintáctico ascendente
 Completa el Punto 8: Autómatas de Pila para Análisis Sintáctico
 """
 
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections import deque
+from itertools import chain
+
 from python_compiler import *
+from python_compiler import _DEFAULT_NODE_FACTORY
+from grammar_analysis import CompiledGrammar, grammar_sets
 from enum import Enum
-from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict, Set
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Tuple, Optional, Dict, Set, FrozenSet
 
 
 class Action(Enum):
@@ -37,287 +51,1314 @@ class LRAction:
 
 @dataclass
 class Production:
-    """Producción de la gramática"""
+    """
+    Producción de la gramática
+    
+    `semantic` es la acción semántica que se ejecuta al reducir:
+    semantic(contexto, valores, inicio, fin) retorna el valor del lado
+    izquierdo a partir de los valores del lado derecho (el Token para los
+    terminales). [inicio, fin) es el rango de índices de tokens reducido. Sin
+    acción, el valor es el del primer símbolo (None si la producción es vacía).
+    """
     id: int
     lhs: str  # Lado izquierdo (no terminal)
     rhs: List[str]  # Lado derecho (terminales y no terminales)
+    semantic: Optional[Callable] = field(default=None, repr=False, compare=False)
     
     def __str__(self):
         return f"{self.lhs} → {' '.join(self.rhs) if self.rhs else 'ε'}"
 
 
+# ============= ACCIONES SEMÁNTICAS =============
+#
+# Construyen el mismo AST que Parser: sentencias con su línea y su span,
+# y expresiones a través de la NodeFactory del análisis (context.nodes).
+
+def _program(context, values, start, end):
+    program = ProgramNode(values[1] if len(values) > 1 else [])
+    program.span = (0, end)
+    return program
+
+
+def _new_list(context, values, start, end):
+    return []
+
+
+def _single(context, values, start, end):
+    return [values[0]]
+
+
+def _append_last(context, values, start, end):
+    values[0].append(values[-1])
+    return values[0]
+
+
+def _statement(context, values, start, end):
+    # El span incluye los NEWLINE que siguen a la sentencia, como en Parser
+    statement = values[0]
+    statement.span = (start, end)
+    return statement
+
+
+def _assignment(context, values, start, end):
+    return AssignmentNode(values[0].value, values[2], values[0].line)
+
+
+def _list_assignment(context, values, start, end):
+    return AssignmentNode(f"{values[0].value}[INDEX]", values[5], values[0].line)
+
+
+def _expression_statement(context, values, start, end):
+    return context.nodes.statement(values[0], context.statement_line)
+
+
+def _print(context, values, start, end):
+    return PrintNode(values[2], values[0].line)
+
+
+def _if(context, values, start, end):
+    return IfNode(values[1], values[4], values[5], values[6], values[0].line)
+
+
+def _elif(context, values, start, end):
+    values[0].append((context.nodes.root(values[2], values[1].line), values[5]))
+    return values[0]
+
+
+def _else(context, values, start, end):
+    return values[3]
+
+
+def _while(context, values, start, end):
+    return WhileNode(values[1], values[4], values[0].line)
+
+
+def _for(context, values, start, end):
+    return ForNode(values[1].value, values[3], values[6], values[0].line)
+
+
+def _block(context, values, start, end):
+    block = BlockNode(values[2] if len(values) == 4 else [])
+    block.span = (start, end)
+    return block
+
+
+def _binary(context, values, start, end):
+    operator = values[1]
+    return context.nodes.binary_op(values[0], operator.value, values[2], operator.line)
+
+
+def _negate(context, values, start, end):
+    return context.nodes.unary_op('-', values[1], values[0].line)
+
+
+def _number(context, values, start, end):
+    token = values[0]
+    return context.nodes.number(token.value, token.line)
+
+
+def _string(context, values, start, end):
+    token = values[0]
+    return context.nodes.string(token.value, token.line)
+
+
+def _identifier(context, values, start, end):
+    token = values[0]
+    return context.nodes.identifier(token.value, token.line)
+
+
+def _index(context, values, start, end):
+    token = values[0]
+    nodes = context.nodes
+    return nodes.index(nodes.identifier(token.value, token.line), values[2], token.line)
+
+
+def _method_call(context, values, start, end):
+    token = values[0]
+    return context.nodes.call(f"{token.value}.{values[2].value}", values[4], token.line)
+
+
+def _statement_identifier(context, values, start, end):
+    # Primer átomo de una expresión usada como sentencia: su línea es la de la sentencia
+    context.statement_line = values[0].line
+    return _identifier(context, values, start, end)
+
+
+def _statement_method_call(context, values, start, end):
+    context.statement_line = values[0].line
+    return _method_call(context, values, start, end)
+
+
+def _list_literal(context, values, start, end):
+    return context.nodes.list_literal(values[1], values[0].line)
+
+
+def _parenthesized(context, values, start, end):
+    return values[1]
+
+
+def _call(context, values, start, end):
+    token = values[0]
+    return context.nodes.call(token.value, values[2], token.line)
+
+
+def _expression_productions(first_id: int, prefix: str, head: str) -> List[Production]:
+    """
+    Cadena de precedencias de BINARY_OPERATORS (comparación < + - < * / % <
+    '-' unario < **) para expresiones cuyo operando más a la izquierda es
+    `head`. Las comparaciones no se encadenan y ** asocia a derecha.
+    """
+    expr, arith, term, power = (f"{prefix}{name}" for name in ("expr", "arith", "term", "power"))
+    rules = [(expr, [arith, operator, "arith"], _binary) for operator in ("==", "!=", "<", ">", "<=", ">=")]
+    rules += [
+        (expr, [arith], None),
+        (arith, [arith, "+", "term"], _binary),
+        (arith, [arith, "-", "term"], _binary),
+        (arith, [term], None),
+        (term, [term, "*", "unary"], _binary),
+        (term, [term, "/", "unary"], _binary),
+        (term, [term, "%", "unary"], _binary),
+    ]
+    if not prefix:
+        rules += [
+            (term, ["unary"], None),
+            ("unary", ["-", "unary"], _negate),
+            ("unary", [power], None),
+        ]
+    else:
+        rules.append((term, [power], None))
+    rules += [
+        (power, [head, "**", "unary"], _binary),
+        (power, [head], None),
+    ]
+    return [Production(first_id + offset, lhs, rhs, semantic)
+            for offset, (lhs, rhs, semantic) in enumerate(rules)]
+
+
+# ============= CONSTRUCCIÓN DE TABLAS LALR(1) =============
+
+# Lookahead comodín del algoritmo de propagación (nunca es un terminal)
+_PROPAGATE = '#'
+END_MARKER = '$'
+
+
+@dataclass
+class LRConflict:
+    """Conflicto entre dos acciones para la misma celda de ACTION"""
+    state: int
+    terminal: str
+    kind: str            # 'shift/reduce' o 'reduce/reduce'
+    chosen: LRAction
+    discarded: LRAction
+    
+    def __str__(self):
+        return (f"Estado {self.state}, '{self.terminal}': conflicto {self.kind} "
+                f"({self.chosen} elegida sobre {self.discarded})")
+
+
+class LALRTableBuilder:
+    """
+    Genera las tablas ACTION/GOTO LALR(1) a partir de las producciones
+    
+    1. Colección canónica LR(0): cada estado es su núcleo (kernel) de items
+       (producción, punto). La clausura se memoiza por no terminal y las
+       transiciones goto por (estado, símbolo).
+    2. Lookaheads por generación espontánea y propagación (Aho, Sethi,
+       Ullman): la clausura LR(1) de cada item del núcleo con el lookahead
+       comodín '#' se calcula una sola vez y se reutiliza en todos los estados.
+    3. Tablas: shift/goto por las transiciones y reduce/accept por los items
+       completos con su lookahead. Los conflictos se resuelven como yacc
+       (shift antes que reduce; entre reduce, la producción de menor número)
+       y quedan registrados en `conflicts`.
+    
+    La producción 0 debe ser la aumentada S' → S.
+    """
+    
+    def __init__(self, productions: List[Production]):
+        started = time.perf_counter()
+        self.productions = productions
+        self.start_symbol = productions[0].lhs
+        self.nonterminals = []
+        for production in productions:
+            if production.lhs not in self.nonterminals:
+                self.nonterminals.append(production.lhs)
+        nonterminal_set = set(self.nonterminals)
+        self.terminals = []
+        for production in productions:
+            for symbol in production.rhs:
+                if symbol not in nonterminal_set and symbol not in self.terminals:
+                    self.terminals.append(symbol)
+        self.terminals.append(END_MARKER)
+        self._nonterminal_set = nonterminal_set
+        self._by_lhs = {nonterminal: [] for nonterminal in self.nonterminals}
+        for production in productions:
+            self._by_lhs[production.lhs].append(production.id)
+        
+        self._compute_first()
+        self._nonterminal_closures = {}
+        self._lr1_closures = {}
+        
+        self.states: List[FrozenSet[Tuple[int, int]]] = []
+        self.transitions: Dict[Tuple[int, str], int] = {}
+        self._build_lr0_states()
+        self.lookaheads = self._compute_lookaheads()
+        
+        self.action_table: Dict[Tuple[int, str], LRAction] = {}
+        self.goto_table: Dict[Tuple[int, str], int] = {}
+        self.conflicts: List[LRConflict] = []
+        self._build_tables()
+        self.build_time = time.perf_counter() - started
+    
+    # ----- FIRST y anulables -----
+    
+    def _compute_first(self):
+        # Bitsets de grammar_analysis; los códigos de la gramática compilada
+        # siguen el orden de self.nonterminals y self.terminals
+        self.sets = grammar_sets(CompiledGrammar.from_productions(self.productions))
+        self.nullable = {nonterminal for nonterminal, nullable in zip(self.nonterminals, self.sets.nullable)
+                         if nullable}
+        self.first = {nonterminal: set(self.sets.terminal_names(bits))
+                      for nonterminal, bits in zip(self.nonterminals, self.sets.first)}
+        self._suffix_first = {}
+    
+    def first_of_sequence(self, symbols, lookahead: str) -> Set[str]:
+        """FIRST(símbolos · lookahead)"""
+        codes = self.sets.grammar.codes
+        bits, nullable = self.sets.first_of_sequence(codes[symbol] for symbol in symbols)
+        result = set(self.sets.terminal_names(bits))
+        if nullable:
+            result.add(lookahead)
+        return result
+    
+    def _first_after(self, production_id: int, position: int) -> Tuple[FrozenSet[str], bool]:
+        """FIRST del lado derecho desde `position` y si es anulable (memoizado)"""
+        key = (production_id, position)
+        result = self._suffix_first.get(key)
+        if result is None:
+            bits, nullable = self.sets.first_of_suffix(production_id, position)
+            result = self._suffix_first[key] = (frozenset(self.sets.terminal_names(bits)), nullable)
+        return result
+    
+    # ----- Colección LR(0) -----
+    
+    def _nonterminal_closure(self, nonterminal: str) -> FrozenSet[Tuple[int, int]]:
+        """Items (p, 0) que agrega la clausura por un punto delante de `nonterminal`"""
+        closure = self._nonterminal_closures.get(nonterminal)
+        if closure is None:
+            items = set()
+            pending = [nonterminal]
+            seen = {nonterminal}
+            while pending:
+                for production_id in self._by_lhs[pending.pop()]:
+                    items.add((production_id, 0))
+                    rhs = self.productions[production_id].rhs
+                    if rhs and rhs[0] in self._nonterminal_set and rhs[0] not in seen:
+                        seen.add(rhs[0])
+                        pending.append(rhs[0])
+            closure = self._nonterminal_closures[nonterminal] = frozenset(items)
+        return closure
+    
+    def closure(self, kernel) -> Set[Tuple[int, int]]:
+        """Clausura LR(0) de un conjunto de items"""
+        items = set(kernel)
+        for production_id, dot in kernel:
+            rhs = self.productions[production_id].rhs
+            if dot < len(rhs) and rhs[dot] in self._nonterminal_set:
+                items |= self._nonterminal_closure(rhs[dot])
+        return items
+    
+    def _build_lr0_states(self):
+        index = {}
+        start = frozenset([(0, 0)])
+        self.states.append(start)
+        index[start] = 0
+        pending = [0]
+        while pending:
+            state = pending.pop()
+            successors = {}
+            for production_id, dot in self.closure(self.states[state]):
+                rhs = self.productions[production_id].rhs
+                if dot < len(rhs):
+                    successors.setdefault(rhs[dot], set()).add((production_id, dot + 1))
+            for symbol, kernel in successors.items():
+                kernel = frozenset(kernel)
+                target = index.get(kernel)
+                if target is None:
+                    target = index[kernel] = len(self.states)
+                    self.states.append(kernel)
+                    pending.append(target)
+                self.transitions[(state, symbol)] = target
+    
+    # ----- Lookaheads LALR(1) -----
+    
+    def _lr1_closure(self, item: Tuple[int, int]) -> List[Tuple[Tuple[int, int], str]]:
+        """Clausura LR(1) de [item, '#'] (independiente del estado, memoizada)"""
+        closure = self._lr1_closures.get(item)
+        if closure is None:
+            seen = {(item, _PROPAGATE)}
+            pending = [(item, _PROPAGATE)]
+            while pending:
+                (production_id, dot), lookahead = pending.pop()
+                rhs = self.productions[production_id].rhs
+                if dot < len(rhs) and rhs[dot] in self._nonterminal_set:
+                    first, nullable = self._first_after(production_id, dot + 1)
+                    for symbol in (first | {lookahead} if nullable else first):
+                        for target in self._by_lhs[rhs[dot]]:
+                            entry = ((target, 0), symbol)
+                            if entry not in seen:
+                                seen.add(entry)
+                                pending.append(entry)
+            closure = self._lr1_closures[item] = list(seen)
+        return closure
+    
+    def _compute_lookaheads(self) -> Dict[Tuple[int, Tuple[int, int]], Set[str]]:
+        lookaheads = {(state, item): set() for state, kernel in enumerate(self.states) for item in kernel}
+        lookaheads[(0, (0, 0))].add(END_MARKER)
+        propagation = {}
+        for state, kernel in enumerate(self.states):
+            for item in kernel:
+                for (production_id, dot), lookahead in self._lr1_closure(item):
+                    rhs = self.productions[production_id].rhs
+                    if dot == len(rhs):
+                        continue
+                    target = (self.transitions[(state, rhs[dot])], (production_id, dot + 1))
+                    if lookahead == _PROPAGATE:
+                        propagation.setdefault((state, item), []).append(target)
+                    else:
+                        lookaheads[target].add(lookahead)
+        
+        pending = list(lookaheads)
+        while pending:
+            source = pending.pop()
+            for target in propagation.get(source, ()):
+                before = len(lookaheads[target])
+                lookaheads[target] |= lookaheads[source]
+                if len(lookaheads[target]) != before:
+                    pending.append(target)
+        return lookaheads
+    
+    # ----- Tablas -----
+    
+    def _set_action(self, state: int, terminal: str, action: LRAction):
+        current = self.action_table.get((state, terminal))
+        if current is None or current == action:
+            self.action_table[(state, terminal)] = action
+            return
+        if Action.SHIFT in (current.action_type, action.action_type):
+            kind = 'shift/reduce'
+            chosen, discarded = (current, action) if current.action_type == Action.SHIFT else (action, current)
+        else:
+            kind = 'reduce/reduce'
+            chosen, discarded = (current, action) if (current.value or 0) <= (action.value or 0) else (action, current)
+        self.action_table[(state, terminal)] = chosen
+        self.conflicts.append(LRConflict(state, terminal, kind, chosen, discarded))
+    
+    def _build_tables(self):
+        for (state, symbol), target in self.transitions.items():
+            if symbol in self._nonterminal_set:
+                self.goto_table[(state, symbol)] = target
+            else:
+                self._set_action(state, symbol, LRAction(Action.SHIFT, target))
+        
+        for state, kernel in enumerate(self.states):
+            for item in kernel:
+                item_lookaheads = self.lookaheads[(state, item)]
+                for (production_id, dot), lookahead in self._lr1_closure(item):
+                    if dot != len(self.productions[production_id].rhs):
+                        continue
+                    for terminal in (item_lookaheads if lookahead == _PROPAGATE else (lookahead,)):
+                        if production_id == 0:
+                            self._set_action(state, terminal, LRAction(Action.ACCEPT))
+                        else:
+                            self._set_action(state, terminal, LRAction(Action.REDUCE, production_id))
+    
+    def report(self) -> str:
+        """Tiempo de construcción, tamaño de las tablas y conflictos"""
+        output = "CONSTRUCCIÓN LALR(1)\n"
+        output += "-" * 100 + "\n"
+        output += f"  Producciones: {len(self.productions)}   Terminales: {len(self.terminals)}   "
+        output += f"No terminales: {len(self.nonterminals)}\n"
+        output += f"  Estados: {len(self.states)}   Entradas ACTION: {len(self.action_table)}   "
+        output += f"Entradas GOTO: {len(self.goto_table)}\n"
+        output += f"  Tiempo de construcción: {self.build_time * 1000:.2f} ms\n"
+        output += f"  Conflictos: {len(self.conflicts)}\n"
+        for conflict in self.conflicts:
+            output += f"    {conflict}\n"
+        return output
+
+
+# ============= TABLAS COMPRIMIDAS =============
+#
+# Terminales y no terminales se codifican como enteros (su índice en
+# LALRTableBuilder.terminals / nonterminals). Cada acción es un entero:
+#   0      error
+#   s > 0  shift al estado s (el estado 0 nunca es destino de una transición)
+#   -1     accept (reducir la producción aumentada 0)
+#   -(p+1) reduce por la producción p
+#
+# ACTION y GOTO se guardan por desplazamiento de filas: las filas dispersas
+# se superponen en un único array `table` a partir de `base[fila]`, y
+# `check` indica a qué fila pertenece cada celda. Lo que no está en la fila
+# toma el valor por defecto: la reducción más frecuente del estado en ACTION
+# y el destino más frecuente del no terminal en GOTO.
+
+ACCEPT_CODE = -1
+
+# Terminal de la gramática que corresponde a cada tipo de token
+TERMINAL_OF_TOKEN_TYPE = {
+    TokenType.IDENTIFIER: "ID",
+    TokenType.NUMBER: "NUMBER",
+    TokenType.STRING: "STRING",
+    TokenType.PRINT: "print",
+    TokenType.IF: "if",
+    TokenType.ELIF: "elif",
+    TokenType.ELSE: "else",
+    TokenType.WHILE: "while",
+    TokenType.FOR: "for",
+    TokenType.IN: "in",
+    TokenType.RANGE: "range",
+    TokenType.LEN: "len",
+    TokenType.ASSIGN: "=",
+    TokenType.PLUS: "+",
+    TokenType.MINUS: "-",
+    TokenType.MULTIPLY: "*",
+    TokenType.DIVIDE: "/",
+    TokenType.MODULO: "%",
+    TokenType.POWER: "**",
+    TokenType.EQUAL: "==",
+    TokenType.NOT_EQUAL: "!=",
+    TokenType.LESS: "<",
+    TokenType.GREATER: ">",
+    TokenType.LESS_EQUAL: "<=",
+    TokenType.GREATER_EQUAL: ">=",
+    TokenType.LPAREN: "(",
+    TokenType.RPAREN: ")",
+    TokenType.LBRACKET: "[",
+    TokenType.RBRACKET: "]",
+    TokenType.COLON: ":",
+    TokenType.COMMA: ",",
+    TokenType.DOT: ".",
+    TokenType.NEWLINE: "NEWLINE",
+    TokenType.INDENT: "INDENT",
+    TokenType.DEDENT: "DEDENT",
+    TokenType.EOF: END_MARKER,
+}
+
+
+def _pack_rows(rows: List[Dict[int, int]], width: int) -> Tuple[array, array, array]:
+    """
+    Superpone filas dispersas {columna: valor} por desplazamiento (first-fit,
+    de la fila más llena a la más vacía)
+    
+    Returns:
+        (base, table, check): la celda (fila, columna) está en
+        table[base[fila] + columna] si check[...] == fila
+    """
+    base = array('i', [0]) * len(rows)
+    table = array('i')
+    check = array('i')
+    for row_index in sorted(range(len(rows)), key=lambda index: -len(rows[index])):
+        row = rows[row_index]
+        if not row:
+            continue
+        offset = 0
+        while any(offset + column < len(check) and check[offset + column] != -1 for column in row):
+            offset += 1
+        missing = offset + width - len(check)
+        if missing > 0:
+            table.extend([0] * missing)
+            check.extend([-1] * missing)
+        for column, value in row.items():
+            table[offset + column] = value
+            check[offset + column] = row_index
+        base[row_index] = offset
+    # Toda consulta base[fila] + columna cae dentro del array
+    missing = width - len(check)
+    if missing > 0:
+        table.extend([0] * missing)
+        check.extend([-1] * missing)
+    return base, table, check
+
+
+class CompressedLRTables:
+    """
+    Tablas ACTION/GOTO de LALRTableBuilder codificadas con enteros en arrays
+    planos, comprimidas por desplazamiento de filas y con reducciones por
+    defecto por estado
+    
+    Una consulta es aritmética de índices sobre arrays: sin tuplas como clave
+    ni objetos LRAction. Las reducciones por defecto pueden reducir antes de
+    detectar un error, pero nunca desplazan un token inválido.
+    """
+    
+    def __init__(self, builder: LALRTableBuilder):
+        self.terminals = list(builder.terminals)
+        self.nonterminals = list(builder.nonterminals)
+        self.state_count = len(builder.states)
+        self._index_symbols()
+        
+        # Tablas sin comprimir, para mostrarlas (print_parsing_table)
+        self.action_entries = dict(builder.action_table)
+        self.goto_entries = dict(builder.goto_table)
+        self.build_report = builder.report()
+        self.origin = 'construidas'
+        self.load_time = builder.build_time
+        
+        self.production_lhs = array('H', [self.nonterminal_codes[p.lhs] for p in builder.productions])
+        self.production_length = array('H', [len(p.rhs) for p in builder.productions])
+        
+        # ACTION: una fila por estado, columnas = terminales
+        action_rows = [{} for _ in range(self.state_count)]
+        for (state, symbol), action in builder.action_table.items():
+            action_rows[state][self.terminal_codes[symbol]] = self.encode(action)
+        self.default_reductions = array('i', [0]) * self.state_count
+        for state, row in enumerate(action_rows):
+            reductions = [code for code in row.values() if code < ACCEPT_CODE]
+            if reductions:
+                default = max(set(reductions), key=reductions.count)
+                self.default_reductions[state] = default
+                for column in [column for column, code in row.items() if code == default]:
+                    del row[column]
+        self.action_base, self.action_table, self.action_check = _pack_rows(action_rows, len(self.terminals) + 1)
+        
+        # GOTO: una fila por no terminal, columnas = estados
+        goto_rows = [{} for _ in self.nonterminals]
+        for (state, symbol), target in builder.goto_table.items():
+            goto_rows[self.nonterminal_codes[symbol]][state] = target
+        self.goto_defaults = array('i', [0]) * len(self.nonterminals)
+        for nonterminal, row in enumerate(goto_rows):
+            if row:
+                targets = list(row.values())
+                default = max(set(targets), key=targets.count)
+                self.goto_defaults[nonterminal] = default
+                for column in [column for column, target in row.items() if target == default]:
+                    del row[column]
+        self.goto_base, self.goto_table, self.goto_check = _pack_rows(goto_rows, self.state_count)
+    
+    def _index_symbols(self):
+        """Códigos de los símbolos y de cada tipo de token"""
+        self.terminal_codes = {symbol: code for code, symbol in enumerate(self.terminals)}
+        self.nonterminal_codes = {symbol: code for code, symbol in enumerate(self.nonterminals)}
+        # Los tipos de token sin terminal van a una columna que ninguna fila usa
+        self.unknown_terminal = len(self.terminals)
+        self.terminal_of_type = {
+            token_type: self.terminal_codes.get(TERMINAL_OF_TOKEN_TYPE.get(token_type), self.unknown_terminal)
+            for token_type in TokenType
+        }
+        self.dense_size = self.state_count * (len(self.terminals) + len(self.nonterminals))
+    
+    @staticmethod
+    def encode(action: LRAction) -> int:
+        """Código entero de una LRAction"""
+        if action.action_type == Action.SHIFT:
+            return action.value
+        if action.action_type == Action.REDUCE:
+            return -(action.value + 1)
+        if action.action_type == Action.ACCEPT:
+            return ACCEPT_CODE
+        return 0
+    
+    @staticmethod
+    def decode(code: int) -> LRAction:
+        """LRAction de un código entero"""
+        if code > 0:
+            return LRAction(Action.SHIFT, code)
+        if code == ACCEPT_CODE:
+            return LRAction(Action.ACCEPT)
+        if code < 0:
+            return LRAction(Action.REDUCE, -code - 1)
+        return LRAction(Action.ERROR)
+    
+    def action(self, state: int, terminal: int) -> int:
+        """Código de ACTION[estado, terminal]"""
+        index = self.action_base[state] + terminal
+        if self.action_check[index] == state:
+            return self.action_table[index]
+        return self.default_reductions[state]
+    
+    def goto(self, state: int, nonterminal: int) -> int:
+        """GOTO[estado, no_terminal]"""
+        index = self.goto_base[nonterminal] + state
+        if self.goto_check[index] == nonterminal:
+            return self.goto_table[index]
+        return self.goto_defaults[nonterminal]
+    
+    def report(self) -> str:
+        """Tamaño de las tablas comprimidas frente a las densas"""
+        cells = len(self.action_table) + len(self.goto_table)
+        arrays = (self.action_base, self.action_table, self.action_check, self.default_reductions,
+                  self.goto_base, self.goto_table, self.goto_check, self.goto_defaults)
+        defaults = sum(1 for code in self.default_reductions if code)
+        output = "TABLAS COMPRIMIDAS\n"
+        output += "-" * 100 + "\n"
+        output += f"  Celdas: {cells} (densa: {self.dense_size})   "
+        output += f"Bytes: {sum(len(a) * a.itemsize for a in arrays)}   "
+        output += f"Estados con reducción por defecto: {defaults}\n"
+        output += f"  Origen: {self.origin} ({self.load_time * 1000:.2f} ms)\n"
+        return output
+
+
+# ============= CACHÉ DE TABLAS =============
+#
+# Las tablas generadas se guardan en `<hash>.lrt`, donde el hash (SHA-256)
+# cubre la versión del formato y la lista de producciones: al cambiar la
+# gramática cambia el nombre del archivo y las tablas se regeneran solas.
+# Formato: cabecera (magic, versión, digest, longitud de los metadatos),
+# metadatos JSON (símbolos, tablas sin comprimir y reporte de construcción)
+# y los arrays de CompressedLRTables en little-endian, cada uno precedido de
+# su typecode y su longitud.
+#
+# El parser confía en las tablas que carga, así que la caché vive en un
+# directorio del usuario (no en el temporal compartido) y solo se usa si
+# pertenece al usuario y nadie más puede escribir en él.
+
+
+def _user_cache_dir(name: str) -> str:
+    """Directorio de caché del usuario: %LOCALAPPDATA% en Windows, $XDG_CACHE_HOME o ~/.cache en el resto"""
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'analizador', name)
+
+
+LR_TABLES_MAGIC = b'PLRT'
+LR_TABLES_FORMAT_VERSION = 1
+LR_TABLES_SUFFIX = '.lrt'
+LR_TABLE_CACHE_DIR = _user_cache_dir('lr-tables')
+
+_TABLES_HEADER = struct.Struct('<4sB32sI')
+_ARRAY_HEADER = struct.Struct('<cI')
+_TABLE_ARRAYS = ('production_lhs', 'production_length', 'default_reductions', 'action_base',
+                 'action_table', 'action_check', 'goto_defaults', 'goto_base', 'goto_table', 'goto_check')
+_INTEGER_TYPECODES = 'bBhHiIlLqQ'
+
+
+class LRTableCacheError(Exception):
+    """Entrada de la caché de tablas inválida o de otro formato"""
+    pass
+
+
+def grammar_hash(productions: List[Production]) -> bytes:
+    """Digest SHA-256 de las producciones (y de la versión del formato de tablas)"""
+    digest = hashlib.sha256(f"{LR_TABLES_FORMAT_VERSION}\0".encode('ascii'))
+    for production in productions:
+        digest.update(f"{production.id}\0{production.lhs}\0{chr(31).join(production.rhs)}\n".encode('utf-8'))
+    return digest.digest()
+
+
+def dump_lr_tables(tables: CompressedLRTables, digest: bytes) -> bytes:
+    """Serializa las tablas generadas para la gramática con el digest dado"""
+    metadata = json.dumps({
+        'terminals': tables.terminals,
+        'nonterminals': tables.nonterminals,
+        'states': tables.state_count,
+        'action': [[state, tables.terminal_codes[terminal], CompressedLRTables.encode(action)]
+                   for (state, terminal), action in tables.action_entries.items()],
+        'goto': [[state, tables.nonterminal_codes[nonterminal], target]
+                 for (state, nonterminal), target in tables.goto_entries.items()],
+        'report': tables.build_report,
+    }).encode('utf-8')
+    parts = [_TABLES_HEADER.pack(LR_TABLES_MAGIC, LR_TABLES_FORMAT_VERSION, digest, len(metadata)), metadata]
+    for name in _TABLE_ARRAYS:
+        column = getattr(tables, name)
+        parts.append(_ARRAY_HEADER.pack(column.typecode.encode('ascii'), len(column)))
+        if sys.byteorder == 'big' and column.itemsize > 1:
+            column = array(column.typecode, column)
+            column.byteswap()
+        parts.append(column.tobytes())
+    return b''.join(parts)
+
+
+def load_lr_tables(data: bytes, digest: bytes,
+                   productions: Optional[List[Production]] = None) -> CompressedLRTables:
+    """
+    Reconstruye las tablas serializadas con dump_lr_tables()
+    
+    Se validan las longitudes de los arrays y el rango de cada código, de
+    modo que ninguna consulta de action()/goto() ni reducción del parser
+    salga de los arrays.
+    
+    Args:
+        productions: Si se indican, las producciones deben coincidir en
+            número, lado izquierdo y longitud con las de las tablas
+    
+    Raises:
+        LRTableCacheError: si los datos están dañados o son de otra gramática
+    """
+    if len(data) < _TABLES_HEADER.size:
+        raise LRTableCacheError("Tablas LR truncadas")
+    magic, version, stored_digest, metadata_size = _TABLES_HEADER.unpack_from(data)
+    if magic != LR_TABLES_MAGIC or version != LR_TABLES_FORMAT_VERSION:
+        raise LRTableCacheError("Formato de tablas LR desconocido")
+    if stored_digest != digest:
+        raise LRTableCacheError("Las tablas LR son de otra gramática")
+    
+    position = _TABLES_HEADER.size
+    try:
+        metadata = json.loads(data[position:position + metadata_size].decode('utf-8'))
+    except ValueError:
+        raise LRTableCacheError("Metadatos de tablas LR dañados")
+    position += metadata_size
+    
+    tables = CompressedLRTables.__new__(CompressedLRTables)
+    try:
+        tables.terminals = metadata['terminals']
+        tables.nonterminals = metadata['nonterminals']
+        tables.state_count = metadata['states']
+        tables.build_report = metadata['report']
+        if (not isinstance(tables.state_count, int) or tables.state_count < 1
+                or not all(isinstance(symbol, str) for symbol in tables.terminals + tables.nonterminals)):
+            raise ValueError
+        tables._index_symbols()
+        tables.action_entries = {}
+        for state, terminal, code in metadata['action']:
+            if not 0 <= state < tables.state_count or terminal < 0:
+                raise ValueError
+            tables.action_entries[state, tables.terminals[terminal]] = CompressedLRTables.decode(code)
+        tables.goto_entries = {}
+        for state, nonterminal, target in metadata['goto']:
+            if not 0 <= state < tables.state_count or nonterminal < 0:
+                raise ValueError
+            tables.goto_entries[state, tables.nonterminals[nonterminal]] = target
+    except (KeyError, IndexError, TypeError, ValueError):
+        raise LRTableCacheError("Metadatos de tablas LR dañados")
+    
+    for name in _TABLE_ARRAYS:
+        if position + _ARRAY_HEADER.size > len(data):
+            raise LRTableCacheError("Tablas LR truncadas")
+        typecode, count = _ARRAY_HEADER.unpack_from(data, position)
+        position += _ARRAY_HEADER.size
+        typecode = typecode.decode('latin-1')
+        if typecode not in _INTEGER_TYPECODES:
+            raise LRTableCacheError("Tipo de array inválido en tablas LR")
+        column = array(typecode)
+        end = position + column.itemsize * count
+        if end > len(data):
+            raise LRTableCacheError("Tablas LR truncadas")
+        column.frombytes(data[position:end])
+        if sys.byteorder == 'big' and column.itemsize > 1:
+            column.byteswap()
+        setattr(tables, name, column)
+        position = end
+    if position != len(data):
+        raise LRTableCacheError("Tablas LR con datos sobrantes")
+    _validate_lr_tables(tables, productions)
+    tables.origin = 'caché en disco'
+    return tables
+
+
+def _validate_lr_tables(tables: CompressedLRTables, productions: Optional[List[Production]]):
+    """Longitudes y rangos de los arrays cargados (ver load_lr_tables)"""
+    states = tables.state_count
+    terminal_count = len(tables.terminals)
+    nonterminal_count = len(tables.nonterminals)
+    production_count = len(tables.production_lhs)
+    
+    def check(condition, message):
+        if not condition:
+            raise LRTableCacheError(f"Tablas LR inválidas: {message}")
+    
+    check(len(tables.production_length) == production_count, "producciones")
+    check(all(0 <= lhs < nonterminal_count for lhs in tables.production_lhs), "lado izquierdo fuera de rango")
+    if productions is not None:
+        check(production_count == len(productions)
+              and all(tables.nonterminals[lhs] == production.lhs and length == len(production.rhs)
+                      for lhs, length, production in zip(tables.production_lhs, tables.production_length,
+                                                         productions)),
+              "no coinciden con las producciones")
+    
+    def valid_action(code):
+        # Desplazamiento a un estado, aceptación, error o reducción de una producción
+        return code < states and -code - 1 < production_count
+    
+    check(len(tables.default_reductions) == states
+          and all(code == 0 or code < ACCEPT_CODE and valid_action(code) for code in tables.default_reductions),
+          "reducciones por defecto")
+    check(len(tables.action_base) == states and len(tables.action_check) == len(tables.action_table),
+          "longitudes de ACTION")
+    # action() consulta base[estado] + terminal con terminal <= terminal_count
+    check(all(0 <= base <= len(tables.action_table) - terminal_count - 1 for base in tables.action_base),
+          "desplazamientos de ACTION fuera de rango")
+    check(all(valid_action(code) for code in tables.action_table), "códigos de ACTION fuera de rango")
+    check(len(tables.goto_defaults) == nonterminal_count and len(tables.goto_base) == nonterminal_count
+          and len(tables.goto_check) == len(tables.goto_table), "longitudes de GOTO")
+    check(all(0 <= base <= len(tables.goto_table) - states for base in tables.goto_base),
+          "desplazamientos de GOTO fuera de rango")
+    check(all(0 <= target < states for target in chain(tables.goto_table, tables.goto_defaults)),
+          "estados de GOTO fuera de rango")
+
+
+# Tablas ya cargadas en este proceso, por digest de la gramática
+_SHARED_TABLES: Dict[bytes, CompressedLRTables] = {}
+_SHARED_TABLES_LOCK = threading.Lock()
+
+
+def shared_lr_tables(productions: List[Production],
+                     directory: Optional[str] = LR_TABLE_CACHE_DIR) -> CompressedLRTables:
+    """
+    Tablas LR de la gramática, compartidas por todo el proceso
+    
+    Se buscan primero en memoria, luego en `directory` (si no es None) y,
+    si no están o son inválidas, se generan y se guardan. Los errores de
+    escritura en disco se ignoran: la caché es solo una optimización. Un
+    directorio que no es privado del usuario no se lee ni se escribe.
+    """
+    digest = grammar_hash(productions)
+    with _SHARED_TABLES_LOCK:
+        tables = _SHARED_TABLES.get(digest)
+        if tables is not None:
+            return tables
+        
+        path = os.path.join(directory, digest.hex() + LR_TABLES_SUFFIX) if directory else None
+        if path is not None and _private_directory(directory):
+            started = time.perf_counter()
+            try:
+                with open(path, 'rb') as file:
+                    tables = load_lr_tables(file.read(), digest, productions)
+                tables.load_time = time.perf_counter() - started
+            except (OSError, LRTableCacheError):
+                tables = None
+        
+        if tables is None:
+            started = time.perf_counter()
+            tables = CompressedLRTables(LALRTableBuilder(productions))
+            tables.load_time = time.perf_counter() - started
+            if path is not None:
+                _write_lr_tables(path, dump_lr_tables(tables, digest))
+        
+        _SHARED_TABLES[digest] = tables
+        return tables
+
+
+def _private_directory(directory: str) -> bool:
+    """
+    True si el directorio existe, es del usuario y ni el grupo ni otros
+    pueden escribir en él (en Windows basta con que exista)
+    """
+    try:
+        status = os.stat(directory)
+    except OSError:
+        return False
+    if not hasattr(os, 'getuid'):
+        return True
+    return status.st_uid == os.getuid() and not status.st_mode & 0o022
+
+
+def _write_lr_tables(path: str, data: bytes):
+    """Escritura atómica: otro proceso nunca lee tablas a medio escribir"""
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not _private_directory(directory):
+            return
+        descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    except OSError:
+        return
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+
+
+# ============= TRAZA DEL ANÁLISIS =============
+#
+# Niveles: 'off' no registra nada; 'summary' registra cada reducción y el
+# resultado; 'full' agrega cada acción con el estado, el símbolo y la pila.
+# Los eventos son tuplas que se formatean recién en get_trace(). En 'full'
+# la pila se registra como lista enlazada inmutable (estado, resto): cada
+# evento comparte la pila del anterior en lugar de copiarla.
+
+TRACE_LEVELS = ('off', 'summary', 'full')
+
+TRACE_ACTION, TRACE_REDUCE, TRACE_ACCEPT, TRACE_ERROR = range(4)
+
+# Marcador de fin para entradas que no terminan con EOF
+_END_TOKEN = Token(TokenType.EOF, "$", 0, 0)
+
+
+class LRParseContext:
+    """
+    Estado de un análisis LR: todo lo que cambia mientras se analiza
+    
+    LRParser solo guarda datos de lectura (producciones y tablas
+    compartidas), así que varios hilos o tareas pueden analizar a la vez con
+    la misma instancia, cada uno con su contexto.
+    """
+    
+    __slots__ = ('stack', 'nodes', 'trace', 'trace_events', 'statement_line', 'lookahead', 'position')
+    
+    def __init__(self, nodes: NodeFactory, trace):
+        self.stack = [0]  # Pila del autómata (estados); comienza con el estado 0
+        self.nodes = nodes  # Fábrica de nodos de las acciones semánticas
+        self.trace = trace  # Eventos de la traza (lista, deque acotada o None)
+        self.trace_events = 0  # Eventos registrados, incluidos los descartados
+        self.statement_line = 0  # Línea de la expresión usada como sentencia en curso
+        self.lookahead = None  # Token actual
+        self.position = 0  # Índice del token actual
+
+
 class LRParser:
     """
     Parser LR(1) con tabla de análisis explícita
     Implementa un autómata de pila para análisis sintáctico ascendente
+    
+    Es re-entrante: las tablas son inmutables y compartidas por el proceso,
+    y cada llamada a parse()/parse_ast() usa su propio LRParseContext. Quien
+    analiza desde varios hilos pasa el suyo (new_context()) y lo consulta con
+    get_trace(context)/visualize_stack(context). `last_context` conserva el
+    del último análisis de cualquier hilo: es una comodidad para uso de un
+    solo hilo.
     """
     
-    def __init__(self):
-        self.productions = self._create_productions()
-        self.action_table = self._create_action_table()
-        self.goto_table = self._create_goto_table()
-        self.stack = []  # Pila del autómata
-        self.input_buffer = []
-        self.parse_trace = []  # Traza del análisis
+    def __init__(self, table_cache: Optional[str] = LR_TABLE_CACHE_DIR,
+                 trace: str = 'full', trace_limit: Optional[int] = None,
+                 productions: Optional[List[Production]] = None):
+        """
+        Args:
+            table_cache: Directorio de la caché de tablas en disco, o None
+                para no usarla (las tablas se comparten en memoria igual)
+            trace: Nivel de traza ('off', 'summary' o 'full')
+            trace_limit: Si se indica, solo se conservan los últimos
+                `trace_limit` eventos (buffer circular)
+            productions: Gramática a usar en lugar de la de
+                _create_productions(), p. ej. la de
+                grammar_reduction.reduce_lr_productions()
+        """
+        if trace not in TRACE_LEVELS:
+            raise ValueError(f"Nivel de traza desconocido: {trace}")
+        self.productions = productions if productions is not None else self._create_productions()
+        self.table_cache = table_cache
+        self.trace_level = trace
+        self.trace_limit = trace_limit
+        self._tables = None  # Se cargan en el primer uso
+        self._semantics = tuple(production.semantic for production in self.productions)
+        self.last_context = None  # Contexto del último análisis (comodidad de un solo hilo)
     
     def _create_productions(self) -> List[Production]:
         """
         Define las producciones de la gramática
-        Gramática simplificada para Python
+        
+        Acepta el mismo lenguaje que Parser: los NEWLINE solo pueden aparecer
+        entre sentencias (o tras ':' e INDENT), y una expresión usada como
+        sentencia debe empezar con un identificador que no vaya seguido de
+        '=' ni '[' (stmt_expr repite la cadena de precedencias para ello).
         """
-        return [
+        productions = [
             # 0: S' → program
             Production(0, "S'", ["program"]),
             
-            # 1: program → stmt_list
-            Production(1, "program", ["stmt_list"]),
+            # 1-2: program → nls stmts | nls
+            Production(1, "program", ["nls", "stmts"], _program),
+            Production(2, "program", ["nls"], _program),
             
-            # 2-3: stmt_list → stmt stmt_list | stmt
-            Production(2, "stmt_list", ["stmt", "stmt_list"]),
-            Production(3, "stmt_list", ["stmt"]),
+            # 3-4: nls → nls NEWLINE | ε   (saltos de línea opcionales)
+            Production(3, "nls", ["nls", "NEWLINE"]),
+            Production(4, "nls", []),
             
-            # 4-8: stmt → assign | print | if | while | for
-            Production(4, "stmt", ["assign"]),
-            Production(5, "stmt", ["print"]),
-            Production(6, "stmt", ["if"]),
-            Production(7, "stmt", ["while"]),
-            Production(8, "stmt", ["for"]),
+            # 5-6: stmts → stmts stmt_item | stmt_item
+            Production(5, "stmts", ["stmts", "stmt_item"], _append_last),
+            Production(6, "stmts", ["stmt_item"], _single),
             
-            # 9: assign → ID = expr
-            Production(9, "assign", ["ID", "=", "expr"]),
+            # 7: stmt_item → stmt nls
+            Production(7, "stmt_item", ["stmt", "nls"], _statement),
             
-            # 10: print → print ( expr )
-            Production(10, "print", ["print", "(", "expr", ")"]),
+            # 8-14: stmt → assign | list_assign | expr_stmt | print_stmt | if_stmt | while_stmt | for_stmt
+            # (los no terminales de sentencia no comparten nombre con su palabra clave)
+            Production(8, "stmt", ["assign"]),
+            Production(9, "stmt", ["list_assign"]),
+            Production(10, "stmt", ["expr_stmt"]),
+            Production(11, "stmt", ["print_stmt"]),
+            Production(12, "stmt", ["if_stmt"]),
+            Production(13, "stmt", ["while_stmt"]),
+            Production(14, "stmt", ["for_stmt"]),
             
-            # 11: if → if expr : block
-            Production(11, "if", ["if", "expr", ":", "block"]),
+            # 15: assign → ID = expr
+            Production(15, "assign", ["ID", "=", "expr"], _assignment),
             
-            # 12: while → while expr : block
-            Production(12, "while", ["while", "expr", ":", "block"]),
+            # 16: list_assign → ID [ expr ] = expr
+            Production(16, "list_assign", ["ID", "[", "expr", "]", "=", "expr"], _list_assignment),
             
-            # 13: for → for ID in expr : block
-            Production(13, "for", ["for", "ID", "in", "expr", ":", "block"]),
+            # 17: expr_stmt → stmt_expr
+            Production(17, "expr_stmt", ["stmt_expr"], _expression_statement),
             
-            # 14: block → INDENT stmt_list DEDENT
-            Production(14, "block", ["INDENT", "stmt_list", "DEDENT"]),
+            # 18: print_stmt → print ( expr )
+            Production(18, "print_stmt", ["print", "(", "expr", ")"], _print),
             
-            # 15-16: expr → expr + term | term
-            Production(15, "expr", ["expr", "+", "term"]),
-            Production(16, "expr", ["term"]),
+            # 19-23: if_stmt → if expr : nls block elif_parts else_part
+            Production(19, "if_stmt", ["if", "expr", ":", "nls", "block", "elif_parts", "else_part"], _if),
+            Production(20, "elif_parts", ["elif_parts", "elif", "expr", ":", "nls", "block"], _elif),
+            Production(21, "elif_parts", [], _new_list),
+            Production(22, "else_part", ["else", ":", "nls", "block"], _else),
+            Production(23, "else_part", []),
             
-            # 17-18: term → term * factor | factor
-            Production(17, "term", ["term", "*", "factor"]),
-            Production(18, "term", ["factor"]),
+            # 24: while_stmt → while expr : nls block
+            Production(24, "while_stmt", ["while", "expr", ":", "nls", "block"], _while),
             
-            # 19-21: factor → ( expr ) | NUMBER | ID
-            Production(19, "factor", ["(", "expr", ")"]),
-            Production(20, "factor", ["NUMBER"]),
-            Production(21, "factor", ["ID"]),
+            # 25: for_stmt → for ID in expr : nls block
+            Production(25, "for_stmt", ["for", "ID", "in", "expr", ":", "nls", "block"], _for),
+            
+            # 26-27: block → INDENT nls stmts DEDENT | INDENT nls DEDENT
+            Production(26, "block", ["INDENT", "nls", "stmts", "DEDENT"], _block),
+            Production(27, "block", ["INDENT", "nls", "DEDENT"], _block),
         ]
-    
-    def _create_action_table(self) -> Dict[Tuple[int, str], LRAction]:
-        """
-        Crea la tabla de acciones ACTION[estado, terminal]
         
-        Tabla LR(1) simplificada para demostración
-        En una implementación completa, esto se generaría automáticamente
-        mediante el algoritmo de construcción LR(1)
-        """
-        action_table = {}
-        
-        # Estado 0
-        action_table[(0, "ID")] = LRAction(Action.SHIFT, 5)
-        action_table[(0, "print")] = LRAction(Action.SHIFT, 6)
-        action_table[(0, "if")] = LRAction(Action.SHIFT, 7)
-        action_table[(0, "while")] = LRAction(Action.SHIFT, 8)
-        action_table[(0, "for")] = LRAction(Action.SHIFT, 9)
-        
-        # Estado 1 - Aceptación
-        action_table[(1, "$")] = LRAction(Action.ACCEPT)
-        
-        # Estado 2 - Reducción program → stmt_list
-        action_table[(2, "$")] = LRAction(Action.REDUCE, 1)
+        # 28-45: expr → arith CMP arith | arith, arith → arith (+|-) term | term,
+        #        term → term (*|/|%) unary | unary, unary → - unary | power,
+        #        power → atom ** unary | atom
+        productions += _expression_productions(len(productions), "", "atom")
         
-        # Estado 3 - Reducción stmt_list → stmt
-        action_table[(3, "ID")] = LRAction(Action.SHIFT, 5)
-        action_table[(3, "print")] = LRAction(Action.SHIFT, 6)
-        action_table[(3, "if")] = LRAction(Action.SHIFT, 7)
-        action_table[(3, "while")] = LRAction(Action.SHIFT, 8)
-        action_table[(3, "for")] = LRAction(Action.SHIFT, 9)
-        action_table[(3, "$")] = LRAction(Action.REDUCE, 3)
-        action_table[(3, "DEDENT")] = LRAction(Action.REDUCE, 3)
-        
-        # Estados adicionales para expresiones
-        action_table[(5, "=")] = LRAction(Action.SHIFT, 10)
-        action_table[(6, "(")] = LRAction(Action.SHIFT, 11)
+        atom = len(productions)
+        productions += [
+            # 46-54: atom → NUMBER | STRING | ID | ID [ expr ] | ID . ID ( args )
+            #             | [ args ] | ( expr ) | range ( args ) | len ( args )
+            Production(atom, "atom", ["NUMBER"], _number),
+            Production(atom + 1, "atom", ["STRING"], _string),
+            Production(atom + 2, "atom", ["ID"], _identifier),
+            Production(atom + 3, "atom", ["ID", "[", "expr", "]"], _index),
+            Production(atom + 4, "atom", ["ID", ".", "ID", "(", "args", ")"], _method_call),
+            Production(atom + 5, "atom", ["[", "args", "]"], _list_literal),
+            Production(atom + 6, "atom", ["(", "expr", ")"], _parenthesized),
+            Production(atom + 7, "atom", ["range", "(", "args", ")"], _call),
+            Production(atom + 8, "atom", ["len", "(", "args", ")"], _call),
+            
+            # 55-58: args → arglist | ε, arglist → arglist , expr | expr
+            Production(atom + 9, "args", ["arglist"]),
+            Production(atom + 10, "args", [], _new_list),
+            Production(atom + 11, "arglist", ["arglist", ",", "expr"], _append_last),
+            Production(atom + 12, "arglist", ["expr"], _single),
+        ]
         
-        # Más entradas de la tabla...
-        # (En implementación completa, esto se genera automáticamente)
+        # 59-74: stmt_expr → ... → stmt_power → stmt_atom ** unary | stmt_atom
+        productions += _expression_productions(len(productions), "stmt_", "stmt_atom")
         
-        return action_table
+        # 75-76: stmt_atom → ID | ID . ID ( args )
+        productions += [
+            Production(len(productions), "stmt_atom", ["ID"], _statement_identifier),
+            Production(len(productions) + 1, "stmt_atom", ["ID", ".", "ID", "(", "args", ")"], _statement_method_call),
+        ]
+        return productions
     
-    def _create_goto_table(self) -> Dict[Tuple[int, str], int]:
-        """
-        Crea la tabla GOTO[estado, no_terminal]
-        
-        Define las transiciones entre estados para símbolos no terminales
-        """
-        goto_table = {}
-        
-        # Transiciones desde estado 0
-        goto_table[(0, "program")] = 1
-        goto_table[(0, "stmt_list")] = 2
-        goto_table[(0, "stmt")] = 3
-        goto_table[(0, "assign")] = 4
-        goto_table[(0, "print")] = 4
-        goto_table[(0, "if")] = 4
-        goto_table[(0, "while")] = 4
-        goto_table[(0, "for")] = 4
-        
-        # Transiciones para expresiones
-        goto_table[(10, "expr")] = 15
-        goto_table[(11, "expr")] = 16
-        
-        # Más transiciones...
-        # (En implementación completa, esto se genera automáticamente)
-        
-        return goto_table
+    @property
+    def tables(self) -> CompressedLRTables:
+        """Tablas compartidas del proceso; se cargan o generan en el primer uso"""
+        if self._tables is None:
+            self._tables = shared_lr_tables(self.productions, self.table_cache)
+        return self._tables
     
-    def parse(self, tokens: List[Token]) -> bool:
+    @property
+    def action_table(self) -> Dict[Tuple[int, str], LRAction]:
+        """Tabla ACTION[estado, terminal] sin comprimir"""
+        return self.tables.action_entries
+    
+    @property
+    def goto_table(self) -> Dict[Tuple[int, str], int]:
+        """Tabla GOTO[estado, no_terminal] sin comprimir"""
+        return self.tables.goto_entries
+    
+    def new_context(self, factory: Optional[NodeFactory] = None) -> LRParseContext:
+        """Contexto vacío para un análisis"""
+        if self.trace_level == 'off':
+            trace = None
+        else:
+            trace = [] if self.trace_limit is None else deque(maxlen=self.trace_limit)
+        return LRParseContext(factory if factory is not None else _DEFAULT_NODE_FACTORY, trace)
+    
+    def parse(self, tokens: Iterable[Token], context: Optional[LRParseContext] = None) -> bool:
         """
         Realiza el análisis sintáctico LR usando la pila
         
         Args:
-            tokens: Lista de tokens del análisis léxico
+            tokens: Tokens del análisis léxico (lista o iterador, p. ej.
+                Lexer.iter_tokens()); se consumen de a uno
+            context: Contexto sin usar de new_context() donde queda la
+                traza y la pila del análisis; por omisión se crea uno
             
         Returns:
             True si la entrada es aceptada, False en caso contrario
         """
-        # Inicializar
-        self.stack = [0]  # Pila comienza con estado 0
-        self.input_buffer = self._prepare_input(tokens)
-        self.parse_trace = []
+        if context is None:
+            context = self.new_context()
+        self.last_context = context
+        try:
+            self._run(context, tokens, False)
+        except ParserError:
+            return False
+        return True
+    
+    def parse_ast(self, tokens: Iterable[Token], factory: Optional[NodeFactory] = None,
+                  context: Optional[LRParseContext] = None) -> ProgramNode:
+        """
+        Analiza los tokens ejecutando las acciones semánticas de cada
+        reducción; retorna el mismo AST que Parser.parse()
         
-        # Agregar marcador de fin de entrada
-        self.input_buffer.append(Token(TokenType.EOF, "$", 0, 0))
+        Args:
+            context: Contexto sin usar de new_context(factory); la fábrica
+                se indica al crearlo, no aquí
         
+        Raises:
+            ParserError: si la entrada no pertenece a la gramática
+        """
+        if context is None:
+            context = self.new_context(factory)
+        elif factory is not None:
+            raise ValueError("La fábrica de nodos de un contexto se indica en new_context()")
+        self.last_context = context
+        program = self._run(context, tokens, True)
+        program.end_line = context.lookahead.line
+        return program
+    
+    def _run(self, context: LRParseContext, tokens: Iterable[Token], build: bool):
+        """
+        Bucle del autómata de pila
+        
+        Con `build`, mantiene junto a la pila de estados la de valores
+        semánticos y la del índice del primer token de cada símbolo, y
+        retorna el valor de program. Solo modifica `context`.
+        """
+        tables = self.tables
+        action_base, action_table, action_check = tables.action_base, tables.action_table, tables.action_check
+        default_reductions = tables.default_reductions
+        goto_base, goto_table, goto_check = tables.goto_base, tables.goto_table, tables.goto_check
+        goto_defaults = tables.goto_defaults
+        production_lhs, production_length = tables.production_lhs, tables.production_length
+        terminal_of_type = tables.terminal_of_type
+        semantics = self._semantics
+        
+        trace = context.trace
+        tracing = trace is not None
+        full_trace = tracing and self.trace_level == 'full'
+        events = 0
+        trace_stack = (0, None)  # Pila en forma de lista enlazada, solo para la traza completa
+        
+        stack = context.stack
+        values = [None]
+        positions = [0]
+        # Si la entrada no trae EOF, el marcador de fin la completa
+        next_token = chain(tokens, (_END_TOKEN,)).__next__
         ip = 0  # Índice del token actual
+        token = next_token()
+        terminal = terminal_of_type[token.type]
         
         while True:
-            state = self.stack[-1]  # Estado en el tope de la pila
-            current_token = self.input_buffer[ip]
-            terminal = self._get_terminal_symbol(current_token)
+            state = stack[-1]  # Estado en el tope de la pila
             
             # Obtener acción de la tabla
-            action = self.action_table.get((state, terminal))
+            index = action_base[state] + terminal
+            code = action_table[index] if action_check[index] == state else default_reductions[state]
             
-            if action is None:
+            if code == 0:
                 # Error de sintaxis
-                self._record_trace(f"ERROR: No hay acción para estado {state} y símbolo '{terminal}'")
-                return False
+                context.lookahead, context.position = token, ip
+                if tracing:
+                    trace.append((TRACE_ERROR, state, token))
+                    context.trace_events = events + 1
+                raise ParserError(f"Error Sintáctico en línea {token.line}: Token inesperado: {token}")
             
-            # Registrar traza
-            self._record_trace(
-                f"Estado: {state}, Símbolo: {terminal}, Acción: {action}, Pila: {self.stack}"
-            )
+            if full_trace:
+                trace.append((TRACE_ACTION, state, token, code, trace_stack))
+                events += 1
             
-            if action.action_type == Action.SHIFT:
-                # DESPLAZAR: empujar token y nuevo estado a la pila
-                self.stack.append(terminal)
-                self.stack.append(action.value)
+            if code > 0:
+                # DESPLAZAR: empujar el nuevo estado (y el token como valor)
+                stack.append(code)
+                if build:
+                    values.append(token)
+                    positions.append(ip)
                 ip += 1
+                token = next_token()
+                terminal = terminal_of_type[token.type]
+                if full_trace:
+                    trace_stack = (code, trace_stack)
                 
-            elif action.action_type == Action.REDUCE:
-                # REDUCIR: aplicar producción
-                production = self.productions[action.value]
-                
-                # Sacar 2 * |rhs| elementos de la pila (símbolo y estado)
-                for _ in range(len(production.rhs) * 2):
-                    if self.stack:
-                        self.stack.pop()
+            elif code != ACCEPT_CODE:
+                # REDUCIR: sacar un estado por símbolo de la producción
+                production = -code - 1
+                length = production_length[production]
+                if build:
+                    semantic = semantics[production]
+                    if length == 0:
+                        values.append(None if semantic is None else semantic(context, [], ip, ip))
+                        positions.append(ip)
+                    elif semantic is not None:
+                        cut = len(values) - length
+                        value = semantic(context, values[cut:], positions[cut], ip)
+                        del values[cut + 1:], positions[cut + 1:]
+                        values[cut] = value
+                    elif length > 1:
+                        cut = len(values) - length
+                        del values[cut + 1:], positions[cut + 1:]
+                if length:
+                    del stack[len(stack) - length:]
                 
-                # Estado en el tope después de reducir
-                state = self.stack[-1] if self.stack else 0
+                # Consultar GOTO con el estado que quedó en el tope
+                nonterminal = production_lhs[production]
+                index = goto_base[nonterminal] + stack[-1]
+                stack.append(goto_table[index] if goto_check[index] == nonterminal else goto_defaults[nonterminal])
                 
-                # Consultar GOTO
-                goto_state = self.goto_table.get((state, production.lhs))
-                if goto_state is None:
-                    self._record_trace(f"ERROR: No hay GOTO para estado {state} y no-terminal '{production.lhs}'")
-                    return False
+                if tracing:
+                    trace.append((TRACE_REDUCE, production))
+                    events += 1
+                    if full_trace:
+                        for _ in range(length):
+                            trace_stack = trace_stack[1]
+                        trace_stack = (stack[-1], trace_stack)
                 
-                # Empujar no-terminal y nuevo estado
-                self.stack.append(production.lhs)
-                self.stack.append(goto_state)
-                
-                self._record_trace(f"REDUCE por producción {action.value}: {production}")
-                
-            elif action.action_type == Action.ACCEPT:
-                # ACEPTAR: análisis exitoso
-                self._record_trace("ACEPTADO")
-                return True
-            
             else:
-                # ERROR
-                self._record_trace(f"ERROR: Acción de error en estado {state}")
-                return False
-    
-    def _prepare_input(self, tokens: List[Token]) -> List[Token]:
-        """Prepara la entrada filtrando tokens irrelevantes"""
-        return [t for t in tokens if t.type not in (TokenType.NEWLINE, TokenType.EOF)]
+                # ACEPTAR: análisis exitoso
+                context.lookahead, context.position = token, ip
+                if tracing:
+                    trace.append((TRACE_ACCEPT,))
+                    context.trace_events = events + 1
+                return values[-1] if build else None
     
     def _get_terminal_symbol(self, token: Token) -> str:
         """Convierte un token a símbolo terminal de la gramática"""
-        if token.type == TokenType.IDENTIFIER:
-            return "ID"
-        elif token.type == TokenType.NUMBER:
-            return "NUMBER"
-        elif token.type == TokenType.STRING:
-            return "STRING"
-        elif token.type == TokenType.PRINT:
-            return "print"
-        elif token.type == TokenType.IF:
-            return "if"
-        elif token.type == TokenType.WHILE:
-            return "while"
-        elif token.type == TokenType.FOR:
-            return "for"
-        elif token.type == TokenType.IN:
-            return "in"
-        elif token.type == TokenType.ASSIGN:
-            return "="
-        elif token.type == TokenType.PLUS:
-            return "+"
-        elif token.type == TokenType.MULTIPLY:
-            return "*"
-        elif token.type == TokenType.LPAREN:
-            return "("
-        elif token.type == TokenType.RPAREN:
-            return ")"
-        elif token.type == TokenType.COLON:
-            return ":"
-        elif token.type == TokenType.INDENT:
-            return "INDENT"
-        elif token.type == TokenType.DEDENT:
-            return "DEDENT"
-        elif token.type == TokenType.EOF:
-            return "$"
-        else:
-            return token.value if token.value else token.type.name
+        return TERMINAL_OF_TOKEN_TYPE.get(token.type) or token.value or token.type.name
     
-    def _record_trace(self, message: str):
-        """Registra un paso del análisis"""
-        self.parse_trace.append(message)
+    def _format_trace_event(self, event: tuple) -> str:
+        kind = event[0]
+        if kind == TRACE_ACTION:
+            _, state, token, code, trace_stack = event
+            states = []
+            while trace_stack is not None:
+                states.append(trace_stack[0])
+                trace_stack = trace_stack[1]
+            states.reverse()
+            return (f"Estado: {state}, Símbolo: {self._get_terminal_symbol(token)}, "
+                    f"Acción: {CompressedLRTables.decode(code)}, Pila: {states}")
+        if kind == TRACE_REDUCE:
+            return f"REDUCE por producción {event[1]}: {self.productions[event[1]]}"
+        if kind == TRACE_ACCEPT:
+            return "ACEPTADO"
+        _, state, token = event
+        return f"ERROR: No hay acción para estado {state} y símbolo '{self._get_terminal_symbol(token)}'"
     
-    def get_trace(self) -> str:
-        """Retorna la traza completa del análisis"""
-        return "\n".join(self.parse_trace)
+    def get_trace(self, context: Optional[LRParseContext] = None) -> str:
+        """
+        Retorna la traza de un análisis (los eventos se formatean aquí); por
+        omisión la de last_context, que con varios hilos puede ser de otro
+        """
+        context = context or self.last_context
+        if context is None or context.trace is None:
+            return ""
+        lines = [self._format_trace_event(event) for event in context.trace]
+        dropped = context.trace_events - len(context.trace)
+        if dropped > 0:
+            lines.insert(0, f"... ({dropped} eventos anteriores descartados)")
+        return "\n".join(lines)
     
     def print_parsing_table(self) -> str:
         """
         Genera una representación en texto de las tablas ACTION y GOTO
         """
-        output = "TABLA DE ANÁLISIS LR(1)\n"
+        output = "TABLA DE ANÁLISIS LALR(1)\n"
         output += "=" * 100 + "\n\n"
+        output += self.tables.build_report + "\n"
+        output += self.tables.report() + "\n"
         
         output += "PRODUCCIONES DE LA GRAMÁTICA:\n"
         output += "-" * 100 + "\n"
@@ -348,13 +1389,15 @@ class LRParser:
         
         return output
     
-    def visualize_stack(self) -> str:
-        """Visualiza el estado actual de la pila"""
+    def visualize_stack(self, context: Optional[LRParseContext] = None) -> str:
+        """Visualiza la pila de un análisis; por omisión la de last_context (ver get_trace)"""
+        context = context or self.last_context
+        stack = context.stack if context is not None else []
         output = "PILA DEL AUTÓMATA:\n"
         output += "┌" + "─" * 30 + "┐\n"
         
-        for i in range(len(self.stack) - 1, -1, -1):
-            item = self.stack[i]
+        for i in range(len(stack) - 1, -1, -1):
+            item = stack[i]
             output += f"│ {str(item):28} │\n"
         
         output += "└" + "─" * 30 + "┘\n"
@@ -363,10 +1406,22 @@ class LRParser:
         return output
 
 
+# LRParser sin traza del modo 'lr' de Parser; al ser re-entrante basta uno por proceso
+_FRONT_END = None
+
+
+def front_end_parser() -> LRParser:
+    """LRParser compartido que usa Parser(tokens, 'lr')"""
+    global _FRONT_END
+    if _FRONT_END is None:
+        _FRONT_END = LRParser(trace='off')
+    return _FRONT_END
+
+
 def demo_lr_parser():
     """Demostración del parser LR con tabla explícita"""
     print("=" * 80)
-    print("DEMOSTRACIÓN DEL PARSER LR(1) CON AUTÓMATA DE PILA")
+    print("DEMOSTRACIÓN DEL PARSER LALR(1) CON AUTÓMATA DE PILA")
     print("=" * 80)
     
     parser = LRParser()
@@ -395,6 +1450,18 @@ def demo_lr_parser():
     else:
         print("❌ ERROR DE SINTAXIS")
     print("=" * 80)
+    
+    # Acciones semánticas: el mismo AST que el parser descendente
+    from ast_serialization import dump_ast
+    code = "x = 2 * (y - 1)\nif x >= 4:\n    print(x)\nelse:\n    print(-x)\n"
+    tokens = Lexer(code).tokenize()
+    ast = LRParser(trace='off').parse_ast(tokens)
+    print("\nAST CONSTRUIDO CON ACCIONES SEMÁNTICAS:")
+    print("-" * 80)
+    for statement in ast.statements:
+        print(f"  línea {statement.line}: {type(statement).__name__}  tokens {statement.span}")
+    same = dump_ast(ast) == dump_ast(Parser(tokens).parse())
+    print(f"  Igual al de Parser.parse(): {'SÍ' if same else 'NO'}")
 
 
 if __name__ == "__main__":
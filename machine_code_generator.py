@@ -150,6 +150,15 @@ class MachineCodeGenerator:
             if not instr.result.startswith('t'):
                 self.store_value(reg_dest, instr.result)
         
+        elif instr.op == 'POW':
+            self.code.append(f"    ; {instr.result} = {instr.arg1} ** {instr.arg2}")
+            reg1 = self.load_value(instr.arg1)
+            reg2 = self.load_value(instr.arg2)
+            reg_dest = self.get_register(instr.result)
+            self.code.append(f"    POW {reg_dest}, {reg1}, {reg2}")
+            if not instr.result.startswith('t'):
+                self.store_value(reg_dest, instr.result)
+        
         elif instr.op == 'NEG':
             self.code.append(f"    ; {instr.result} = -{instr.arg1}")
             reg_src = self.load_value(instr.arg1)
@@ -4,9 +4,15 @@ Incluye: Análisis Léxico, Sintáctico, Semántico, Generación de Código Inte
 Optimización y Generación de Código Máquina
 """
 
+import mmap
+import os
 import re
+from array import array
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
 from enum import Enum, auto
-from dataclasses import dataclass
 from typing import List, Optional, Any, Dict
 
 
@@ -76,18 +82,237 @@ class TokenType(Enum):
     EOF = auto()
 
 
-@dataclass
-class Token:
-    """Representa un token con su tipo, valor y posición"""
-    type: TokenType
-    value: Any
-    line: int
-    column: int
+class LineIndex:
+    """
+    Tabla de offsets de inicio de línea de una fuente (str o buffer UTF-8)
+    Se construye una sola vez, con una búsqueda masiva de saltos de línea, la
+    primera vez que se necesita; línea y columna se obtienen por bisección
+    
+    Lexer.relex() crea un índice por versión de la fuente y encadena el
+    anterior al nuevo (`successor`): los offsets >= `shift_from` de la
+    versión vieja se desplazan en `shift`. Los tokens que aún apuntan a una
+    versión vieja se trasladan a la vigente al consultarlos (ver forward).
+    """
+    
+    def __init__(self, source):
+        self.reset(source)
+        self.successor = None
+        self.shift_from = 0
+        self.shift = 0
+    
+    def reset(self, source):
+        """Asocia el índice a una nueva versión de la fuente"""
+        self.source = source
+        self._starts = None
+    
+    def link(self, successor: 'LineIndex', shift_from: int, shift: int):
+        """Encadena esta versión a la siguiente; deja de guardar la fuente vieja"""
+        self.successor = successor
+        self.shift_from = shift_from
+        self.shift = shift
+        self.reset(None)
+    
+    def forward(self, offset: int):
+        """(índice vigente, offset en su fuente) de un offset de esta versión"""
+        index = self
+        while index.successor is not None:
+            if offset >= index.shift_from:
+                offset += index.shift
+            index = index.successor
+        return index, offset
+    
+    @property
+    def starts(self):
+        if self._starts is None:
+            pattern = _NEWLINE_PATTERN if isinstance(self.source, str) else _NEWLINE_PATTERN_BYTES
+            self._starts = array('q', [0])
+            self._starts.extend(match.end() for match in pattern.finditer(self.source))
+        return self._starts
+    
+    def line_of(self, offset):
+        return bisect_right(self.starts, offset)
+    
+    def column_of(self, offset):
+        line_start = self.starts[bisect_right(self.starts, offset) - 1]
+        if isinstance(self.source, str):
+            return offset - line_start + 1
+        return _char_column(self.source, line_start, offset)
+
+
+class _SourcePosition:
+    """
+    Offset en la fuente ligado a un LineIndex (`_offset`, `line_index`): si
+    la fuente se editó con Lexer.relex(), se lleva a la versión vigente la
+    primera vez que se consulta
+    """
+    __slots__ = ()
+    
+    @property
+    def offset(self) -> int:
+        index = self.line_index
+        if index is not None and index.successor is not None:
+            self.line_index, self._offset = index.forward(self._offset)
+        return self._offset
+    
+    @offset.setter
+    def offset(self, value: int):
+        # El valor es un offset de la versión vigente de la fuente
+        index = self.line_index
+        if index is not None and index.successor is not None:
+            self.line_index = index.forward(0)[0]
+        self._offset = value
+
+
+class Token(_SourcePosition):
+    """
+    Representa un token con su tipo, valor y posición
+    Los tokens del Lexer guardan solo su offset en la fuente; la línea y la
+    columna se calculan bajo demanda a partir del LineIndex compartido
+    """
+    __slots__ = ('type', 'value', '_offset', 'line_index', '_line', '_column')
+    
+    def __init__(self, type: TokenType, value: Any, line: int = 0, column: int = 0,
+                 offset: int = -1, line_index: Optional[LineIndex] = None):
+        self.type = type
+        self.value = value
+        self._offset = offset
+        self.line_index = line_index
+        self._line = line
+        self._column = column
+    
+    @property
+    def line(self) -> int:
+        index = self.line_index
+        if index is None:
+            return self._line
+        if index.successor is not None:
+            self.line_index, self._offset = index.forward(self._offset)
+            index = self.line_index
+        return index.line_of(self._offset)
+    
+    @property
+    def column(self) -> int:
+        index = self.line_index
+        if index is None:
+            return self._column
+        if index.successor is not None:
+            self.line_index, self._offset = index.forward(self._offset)
+            index = self.line_index
+        return index.column_of(self._offset)
+    
+    def __eq__(self, other):
+        if not isinstance(other, Token):
+            return NotImplemented
+        return (self.type, self.value, self.line, self.column) == \
+            (other.type, other.value, other.line, other.column)
+    
+    def __repr__(self):
+        return f"Token({self.type.name}, {self.value}, {self.line}:{self.column})"
+
+
+# Tabla código → TokenType usada por las representaciones compactas de tokens
+TOKEN_TYPES_BY_CODE = {token_type.value: token_type for token_type in TokenType}
+
+
+class TokenView:
+    """Vista ligera de un token almacenado en un TokenBuffer"""
+    __slots__ = ('_buffer', '_index')
+    
+    def __init__(self, buffer, index):
+        self._buffer = buffer
+        self._index = index
+    
+    @property
+    def type(self):
+        return TOKEN_TYPES_BY_CODE[self._buffer.types[self._index]]
+    
+    @property
+    def value(self):
+        return self._buffer.values[self._buffer.value_ids[self._index]]
+    
+    @property
+    def line(self):
+        return self._buffer.line_index.line_of(self._buffer.offsets[self._index])
+    
+    @property
+    def column(self):
+        return self._buffer.line_index.column_of(self._buffer.offsets[self._index])
+    
+    def to_token(self):
+        return Token(self.type, self.value, self.line, self.column)
+    
+    def __eq__(self, other):
+        if not isinstance(other, (Token, TokenView)):
+            return NotImplemented
+        return (self.type, self.value, self.line, self.column) == \
+            (other.type, other.value, other.line, other.column)
     
     def __repr__(self):
         return f"Token({self.type.name}, {self.value}, {self.line}:{self.column})"
 
 
+class TokenBuffer:
+    """
+    Secuencia compacta de tokens en columnas (struct-of-arrays)
+    Tipos y offsets se guardan en `array` (línea y columna se derivan del
+    LineIndex de la fuente); los valores en una tabla lateral internada, de
+    modo que cada lexema distinto se almacena una vez
+    """
+    
+    def __init__(self, tokens=(), line_index: Optional[LineIndex] = None):
+        self.types = array('B')
+        self.offsets = array('q')
+        self.value_ids = array('I')
+        self.line_index = line_index
+        self.values = []
+        self._value_index = {}
+        self.extend(tokens)
+    
+    def _intern(self, value):
+        # 1, 1.0 y True son iguales como claves de dict: se distinguen por tipo
+        key = (value.__class__, value)
+        value_id = self._value_index.get(key)
+        if value_id is None:
+            value_id = self._value_index[key] = len(self.values)
+            self.values.append(value)
+        return value_id
+    
+    def append(self, token):
+        offset = token.offset
+        if token.line_index is not self.line_index:
+            if self.line_index is not None or token.line_index is None:
+                raise ValueError("TokenBuffer requiere tokens de una misma fuente con LineIndex")
+            self.line_index = token.line_index
+        self.types.append(token.type.value)
+        self.offsets.append(offset)
+        self.value_ids.append(self._intern(token.value))
+    
+    def extend(self, tokens):
+        for token in tokens:
+            self.append(token)
+    
+    def __len__(self):
+        return len(self.types)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TokenView(self, i) for i in range(*index.indices(len(self.types)))]
+        if index < 0:
+            index += len(self.types)
+        if not 0 <= index < len(self.types):
+            raise IndexError("índice de token fuera de rango")
+        return TokenView(self, index)
+    
+    def __iter__(self):
+        for index in range(len(self.types)):
+            yield TokenView(self, index)
+    
+    def nbytes(self) -> int:
+        """Bytes ocupados por las columnas (sin contar la tabla de valores)"""
+        return sum(column.itemsize * len(column)
+                   for column in (self.types, self.offsets, self.value_ids))
+
+
 KEYWORDS = {
     'def': TokenType.DEF,
     'return': TokenType.RETURN,
@@ -110,21 +335,266 @@ KEYWORDS = {
 }
 
 
+OPERATORS = {
+    '**': TokenType.POWER,
+    '==': TokenType.EQUAL,
+    '!=': TokenType.NOT_EQUAL,
+    '<=': TokenType.LESS_EQUAL,
+    '>=': TokenType.GREATER_EQUAL,
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.MULTIPLY,
+    '/': TokenType.DIVIDE,
+    '%': TokenType.MODULO,
+    '=': TokenType.ASSIGN,
+    '<': TokenType.LESS,
+    '>': TokenType.GREATER,
+    '(': TokenType.LPAREN,
+    ')': TokenType.RPAREN,
+    '[': TokenType.LBRACKET,
+    ']': TokenType.RBRACKET,
+    ':': TokenType.COLON,
+    ',': TokenType.COMMA,
+    '.': TokenType.DOT,
+}
+
+ESCAPE_MAP = {'n': '\n', 't': '\t', 'r': '\r', '\\': '\\', '"': '"', "'": "'"}
+
+# Motores disponibles para Lexer.tokenize
+LEXER_ENGINES = ('regex', 'char')
+
+# Versión de la secuencia de tokens que produce el Lexer; incrementarla al
+# cambiar tipos, valores u offsets invalida los tokens guardados en caché
+LEXER_VERSION = 2
+
+# Dígitos de los literales numéricos, los mismos en todos los motores: solo
+# ASCII (str.isdigit y \d aceptan además '²', '١', ...)
+DIGITS = '0123456789'
+
+# Patrón maestro del motor 'regex': una sola alternancia compilada.
+# NAME admite un inicio numérico no ASCII ('²', '½') que el motor rechaza
+# después, como read_identifier, que exige isalpha() en el primer carácter.
+# NEWLINE absorbe las líneas en blanco o de solo comentario que le siguen y
+# captura la indentación de la siguiente línea con contenido.
+_MASTER_SPEC = r'''
+    (?P<NEWLINE>\n(?:[ \t]*(?:\#[^\n]*)?\n)*(?P<INDENT>[ \t]*))
+  | (?P<SKIP>[ \t]+|\#[^\n]*)
+  | (?P<NUMBER>[0-9][0-9.]*)
+  | (?P<STRING>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<NAME>%s)
+  | (?P<OP>\*\*|==|!=|<=|>=|[-+*/%%=<>()\[\]:,.])
+  | (?P<ERROR>.)
+'''
+_MASTER_PATTERN = re.compile(_MASTER_SPEC % r'[^\W\d]\w*', re.VERBOSE | re.DOTALL)
+
+# Variante para buffers de bytes UTF-8: los bytes no ASCII se aceptan en los
+# identificadores y se validan al decodificar el lexema
+_MASTER_PATTERN_BYTES = re.compile(
+    (_MASTER_SPEC % r'(?:[^\W\d]|[\x80-\xff])(?:\w|[\x80-\xff])*').encode('ascii'),
+    re.VERBOSE | re.DOTALL
+)
+
+# Líneas en blanco/comentarios al inicio del archivo e indentación de la primera línea
+_LINE_START_PATTERN = re.compile(r'(?:[ \t]*(?:#[^\n]*)?\n)*(?P<INDENT>[ \t]*)')
+_LINE_START_PATTERN_BYTES = re.compile(_LINE_START_PATTERN.pattern.encode('ascii'))
+
+_OPERATOR_TOKENS = {lexeme: (token_type, lexeme) for lexeme, token_type in OPERATORS.items()}
+_OPERATOR_TOKENS_BYTES = {lexeme.encode('ascii'): entry for lexeme, entry in _OPERATOR_TOKENS.items()}
+
+_ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+
+_NEWLINE_PATTERN = re.compile(r'\n')
+_NEWLINE_PATTERN_BYTES = re.compile(rb'\n')
+
+# Comentarios y strings: sirven para descartar cortes dentro de un string multilínea
+_STRING_OR_COMMENT_PATTERN = re.compile(r'\#[^\n]*|"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'')
+_STRING_OR_COMMENT_PATTERN_BYTES = re.compile(_STRING_OR_COMMENT_PATTERN.pattern.encode('ascii'))
+
+# Tamaño mínimo (caracteres) de cada fragmento en Lexer.tokenize_parallel
+PARALLEL_MIN_CHUNK = 1 << 16
+
+
+def _char_column(buffer, line_start, offset):
+    """Columna (en caracteres) de un offset en bytes dentro de su línea"""
+    return len(bytes(buffer[line_start:offset]).decode('utf-8', 'replace')) + 1
+
+
+def _unescape(match):
+    char = match.group(1)
+    return ESCAPE_MAP.get(char, char)
+
+
+def _common_affixes(old_source: str, new_source: str):
+    """Longitudes del prefijo y del sufijo comunes (sin solaparse)"""
+    limit = min(len(old_source), len(new_source))
+    
+    # Búsqueda binaria con comparaciones de slices en C; cada paso compara solo
+    # la parte aún no decidida, así que en total se copia O(n)
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old_source[low:middle] == new_source[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+    
+    old_end, new_end = len(old_source), len(new_source)
+    low, high = 0, limit - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old_source[old_end - middle:old_end - low] == new_source[new_end - middle:new_end - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return prefix, low
+
+
+def edited_line_range(old_source: str, new_source: str):
+    """
+    Calcula el rango de líneas que difiere entre dos versiones de la fuente
+    
+    Returns:
+        (primera_línea, última_línea_anterior, última_línea_nueva), o None
+        si ambas versiones son iguales
+    """
+    if old_source == new_source:
+        return None
+    prefix, suffix = _common_affixes(old_source, new_source)
+    first_line = old_source.count('\n', 0, prefix) + 1
+    old_last_line = old_source.count('\n', 0, len(old_source) - suffix) + 1
+    new_last_line = new_source.count('\n', 0, len(new_source) - suffix) + 1
+    return first_line, old_last_line, new_last_line
+
+
+def top_level_boundaries(source, chunk_size: int) -> List[int]:
+    """
+    Calcula offsets de corte de la fuente en fragmentos de ~`chunk_size`
+    
+    Cada corte cae al inicio de una línea con contenido e indentación 0 que
+    no está dentro de un string multilínea: ahí el indent_stack vale [0] y
+    cada fragmento puede analizarse de forma independiente.
+    
+    Returns:
+        Lista [0, corte_1, ..., len(source)]
+    """
+    length = len(source)
+    if isinstance(source, str):
+        newline, comment, pattern = '\n', '#', _STRING_OR_COMMENT_PATTERN
+    else:
+        newline, comment, pattern = b'\n', b'#', _STRING_OR_COMMENT_PATTERN_BYTES
+    # Inicios de línea que no pueden ser corte: indentación, línea en blanco o comentario
+    not_top_level = (' ', '\t', '\n', '#') if newline == '\n' else (b' ', b'\t', b'\n', b'#')
+    
+    # Spans de strings que contienen saltos de línea (solo se calcula si hay candidatos)
+    string_spans = None
+    bounds = [0]
+    target = chunk_size
+    while target < length:
+        cut = source.find(newline, target) + 1
+        while 0 < cut < length:
+            if source[cut:cut + 1] not in not_top_level:
+                if string_spans is None:
+                    string_spans = [match.span() for match in pattern.finditer(source)
+                                    if match.group()[:1] != comment and newline in match.group()]
+                    span_starts = [start for start, _ in string_spans]
+                inside = bisect_right(span_starts, cut) - 1
+                if inside < 0 or string_spans[inside][1] <= cut:
+                    break
+            cut = source.find(newline, cut) + 1
+        if not 0 < cut < length:
+            break
+        bounds.append(cut)
+        target = cut + chunk_size
+    bounds.append(length)
+    return bounds
+
+
+def _tokenize_chunk(chunk, engine):
+    """
+    Tarea de proceso de Lexer.tokenize_parallel: analiza un fragmento y
+    devuelve sus tokens en columnas (códigos de tipo, offsets, valores) sin EOF
+    """
+    types, offsets, values = array('B'), array('q'), []
+    for token in Lexer(chunk, engine).iter_tokens():
+        types.append(token.type.value)
+        offsets.append(token.offset)
+        values.append(token.value)
+    for column in (types, offsets, values):
+        column.pop()
+    return types, offsets, values
+
+
+def _first_token_at_offset(tokens, offset, low=0):
+    """Índice del primer token (o instantánea de línea) con offset >= `offset` desde `low` (búsqueda binaria)"""
+    high = len(tokens)
+    while low < high:
+        middle = (low + high) // 2
+        if tokens[middle].offset < offset:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
 class LexerError(Exception):
     """Error en el análisis léxico"""
     pass
 
 
+class _LineState(_SourcePosition):
+    """Instantánea de Lexer: offset de inicio de una línea con contenido e indent_stack vigente"""
+    __slots__ = ('_offset', 'line_index', 'stack')
+    
+    def __init__(self, offset, stack, line_index):
+        self._offset = offset
+        self.stack = stack
+        self.line_index = line_index
+
+
 class Lexer:
     """Analizador Léxico para Python"""
     
-    def __init__(self, source_code: str):
+    def __init__(self, source_code: str, engine: str = 'regex'):
+        if engine not in LEXER_ENGINES:
+            raise ValueError(f"Motor léxico desconocido: {engine}")
         self.source = source_code
+        self.engine = engine
         self.position = 0
-        self.line = 1
-        self.column = 1
+        # Línea y columna se derivan de `position` solo cuando se necesitan
+        self.line_index = LineIndex(source_code)
         self.tokens = []
         self.indent_stack = [0]
+        # Instantáneas (_LineState, en orden de offset) tomadas al comienzo de
+        # cada línea con contenido; permiten el re-análisis incremental
+        self.line_states = []
+        self.last_edit = None
+        self._record_states = False
+        self._indent_state = (0,)
+        self._state_line = 0
+    
+    @classmethod
+    def from_path(cls, path) -> 'Lexer':
+        """
+        Crea un Lexer que analiza el archivo directamente desde un buffer
+        mapeado en memoria (UTF-8), sin leerlo antes a un str
+        """
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return cls('')
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+    
+    @property
+    def line(self) -> int:
+        return self.line_index.line_of(self.position)
+    
+    @property
+    def column(self) -> int:
+        return self.line_index.column_of(self.position)
+    
+    def make_token(self, token_type, value, offset):
+        return Token(token_type, value, 0, 0, offset, self.line_index)
     
     def error(self, message):
         raise LexerError(f"Error Léxico en línea {self.line}, columna {self.column}: {message}")
@@ -137,11 +607,6 @@ class Lexer:
         if self.position < len(self.source):
             char = self.source[self.position]
             self.position += 1
-            if char == '\n':
-                self.line += 1
-                self.column = 1
-            else:
-                self.column += 1
             return char
         return None
     
@@ -155,61 +620,362 @@ class Lexer:
                 self.advance()
     
     def read_number(self):
-        start_line, start_column = self.line, self.column
+        start = self.position
         num_str = ''
-        while self.peek() and (self.peek().isdigit() or self.peek() == '.'):
+        while self.peek() and (self.peek() in DIGITS or self.peek() == '.'):
             num_str += self.advance()
         try:
             value = float(num_str) if '.' in num_str else int(num_str)
-            return Token(TokenType.NUMBER, value, start_line, start_column)
+            return self.make_token(TokenType.NUMBER, value, start)
         except:
             self.error(f"Número inválido: {num_str}")
     
     def read_string(self):
-        start_line, start_column = self.line, self.column
+        start = self.position
         quote = self.advance()
         string_value = ''
         while self.peek() and self.peek() != quote:
             if self.peek() == '\\':
                 self.advance()
                 next_char = self.advance()
-                escape_map = {'n': '\n', 't': '\t', 'r': '\r', '\\': '\\', '"': '"', "'": "'"}
-                string_value += escape_map.get(next_char, next_char)
+                string_value += ESCAPE_MAP.get(next_char, next_char)
             else:
                 string_value += self.advance()
         if self.peek() != quote:
             self.error("String sin cerrar")
         self.advance()
-        return Token(TokenType.STRING, string_value, start_line, start_column)
+        return self.make_token(TokenType.STRING, string_value, start)
     
     def read_identifier(self):
-        start_line, start_column = self.line, self.column
+        start = self.position
         identifier = ''
         while self.peek() and (self.peek().isalnum() or self.peek() == '_'):
             identifier += self.advance()
         token_type = KEYWORDS.get(identifier, TokenType.IDENTIFIER)
-        return Token(token_type, identifier, start_line, start_column)
+        return self.make_token(token_type, identifier, start)
     
-    def handle_indentation(self, indent_level):
+    def handle_indentation(self, indent_level, line_start):
         tokens = []
         current = self.indent_stack[-1]
         if indent_level > current:
             self.indent_stack.append(indent_level)
-            tokens.append(Token(TokenType.INDENT, indent_level, self.line, 1))
+            tokens.append(self.make_token(TokenType.INDENT, indent_level, line_start))
         elif indent_level < current:
             while self.indent_stack and self.indent_stack[-1] > indent_level:
                 self.indent_stack.pop()
-                tokens.append(Token(TokenType.DEDENT, indent_level, self.line, 1))
+                tokens.append(self.make_token(TokenType.DEDENT, indent_level, line_start))
             if not self.indent_stack or self.indent_stack[-1] != indent_level:
                 self.error("Indentación inconsistente")
         return tokens
     
     def tokenize(self):
-        self.tokens = []
+        # Solo el análisis completo registra instantáneas para relex(); el
+        # modo streaming mantiene la memoria acotada
+        self._record_states = True
+        self.line_states = []
+        try:
+            self.tokens = list(self.iter_tokens())
+        finally:
+            self._record_states = False
+        return self.tokens
+    
+    def tokenize_parallel(self, workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        """
+        Como tokenize(), pero reparte la fuente entre varios procesos
+        
+        La fuente se corta en líneas de indentación 0 (ver
+        top_level_boundaries), cada fragmento se analiza en un
+        ProcessPoolExecutor y los tokens se empalman desplazando sus offsets.
+        El resultado es idéntico al de tokenize(); los DEDENT con que cierra
+        cada fragmento son los que el análisis secuencial emite al inicio de
+        la línea de corte. No registra instantáneas para relex().
+        
+        Args:
+            workers: Número de procesos (por defecto, os.cpu_count())
+            chunk_size: Tamaño aproximado de cada fragmento; por defecto se
+                reparten ~4 fragmentos por proceso
+        """
+        workers = workers or os.cpu_count() or 1
+        if chunk_size is None:
+            chunk_size = max(PARALLEL_MIN_CHUNK, len(self.source) // (workers * 4))
+        bounds = top_level_boundaries(self.source, chunk_size)
+        if workers == 1 or len(bounds) <= 2:
+            return self.tokenize()
+        
+        chunks = [self.source[start:end] for start, end in zip(bounds, bounds[1:])]
+        try:
+            with ProcessPoolExecutor(workers) as pool:
+                results = list(pool.map(_tokenize_chunk, chunks, repeat(self.engine)))
+        except LexerError:
+            # El análisis secuencial reporta el error con su posición exacta
+            self.__init__(self.source, self.engine)
+            return self.tokenize()
+        
+        line_index = self.line_index
+        tokens = []
+        for base, (types, offsets, values) in zip(bounds, results):
+            tokens.extend(map(Token, map(TOKEN_TYPES_BY_CODE.__getitem__, types), values,
+                              repeat(0), repeat(0), [offset + base for offset in offsets], repeat(line_index)))
+        tokens.append(self.make_token(TokenType.EOF, None, len(self.source)))
+        self.position = len(self.source)
+        self.indent_stack = [0]
+        self.tokens = tokens
+        return tokens
+    
+    def tokenize_buffer(self) -> 'TokenBuffer':
+        """Como tokenize(), pero almacena los tokens en un TokenBuffer compacto"""
+        self.tokens = TokenBuffer(self.iter_tokens(), self.line_index)
+        return self.tokens
+    
+    def iter_tokens(self):
+        """
+        Genera los tokens de forma perezosa (incluidos INDENT/DEDENT), sin
+        construir la lista completa en memoria
+        """
+        if self.engine == 'regex':
+            return self._iter_regex()
+        return self._iter_chars()
+    
+    def _begin_line(self, line, line_start, indent_end, indent_level):
+        """Registra la instantánea de indent_stack de la línea y genera INDENT/DEDENT"""
+        if self._record_states:
+            self.line_states.append(_LineState(line_start, self._indent_state, self.line_index))
+            self._state_line = line
+        self.position = indent_end
+        indent_tokens = self.handle_indentation(indent_level, line_start)
+        if indent_tokens:
+            self._indent_state = tuple(self.indent_stack)
+        return indent_tokens
+    
+    def _iter_regex(self, start=0, line=1):
+        """
+        Motor 'regex': recorre la fuente con el patrón maestro y extrae los
+        lexemas por slices. Produce exactamente los mismos tokens que el
+        motor carácter a carácter.
+        
+        La fuente puede ser un str o un buffer de bytes UTF-8 (p. ej. un
+        mmap, ver from_path); en ese caso solo se decodifican los lexemas de
+        identificadores y strings al materializar cada token.
+        
+        `start` debe ser el inicio de una línea y `line` su número; el
+        indent_stack vigente en ese punto se toma de self.indent_stack.
+        """
+        source = self.source
+        length = len(source)
+        keywords = KEYWORDS
+        identifier_type = TokenType.IDENTIFIER
+        line_index = self.line_index
+        decoding = not isinstance(source, str)
+        if decoding:
+            master, line_start_pattern, operators = _MASTER_PATTERN_BYTES, _LINE_START_PATTERN_BYTES, _OPERATOR_TOKENS_BYTES
+            newline, tab, comment, dot = b'\n', b'\t', b'#', b'.'
+        else:
+            master, line_start_pattern, operators = _MASTER_PATTERN, _LINE_START_PATTERN, _OPERATOR_TOKENS
+            newline, tab, comment, dot = '\n', '\t', '#', '.'
+        self._indent_state = tuple(self.indent_stack)
+        
+        match = line_start_pattern.match(source, start)
+        line_start = match.start('INDENT')
+        line += match.group().count(newline)
+        position = match.end()
+        if position < length and source[position:position + 1] != comment:
+            indent = match.group('INDENT')
+            yield from self._begin_line(line, line_start, position, len(indent) + 3 * indent.count(tab))
+        
+        for match in master.finditer(source, position):
+            kind = match.lastgroup
+            if kind == 'SKIP':
+                continue
+            start = match.start()
+            if kind == 'NAME':
+                text = match.group()
+                if decoding:
+                    text = self._decode_identifier(text, start)
+                elif text[0] > '\x7f' and not text[0].isalpha():
+                    self.position = start
+                    self.error(f"Carácter inesperado: '{text[0]}'")
+                yield Token(keywords.get(text, identifier_type), text, 0, 0, start, line_index)
+            elif kind == 'OP':
+                token_type, text = operators[match.group()]
+                yield Token(token_type, text, 0, 0, start, line_index)
+            elif kind == 'NEWLINE':
+                yield Token(TokenType.NEWLINE, '\\n', 0, 0, start, line_index)
+                line += match.group().count(newline)
+                line_start = match.start('INDENT')
+                end = match.end()
+                if end < length and source[end:end + 1] != comment:
+                    indent = match.group('INDENT')
+                    yield from self._begin_line(line, line_start, end, len(indent) + 3 * indent.count(tab))
+            elif kind == 'NUMBER':
+                text = match.group()
+                try:
+                    value = float(text) if dot in text else int(text)
+                except ValueError:
+                    self.position = match.end()
+                    if decoding:
+                        text = text.decode('utf-8')
+                    self.error(f"Número inválido: {text}")
+                yield Token(TokenType.NUMBER, value, 0, 0, start, line_index)
+            elif kind == 'STRING':
+                text = match.group()
+                value = text[1:-1]
+                if decoding:
+                    value = value.decode('utf-8')
+                if '\\' in value:
+                    value = _ESCAPE_PATTERN.sub(_unescape, value)
+                yield Token(TokenType.STRING, value, 0, 0, start, line_index)
+                if newline in text:
+                    line += text.count(newline)
+            else:
+                char = match.group()
+                if decoding:
+                    char = bytes(source[start:start + 4]).decode('utf-8', 'ignore')[:1] or char.decode('latin-1')
+                if char in '"\'':
+                    self.position = length
+                    self.error("String sin cerrar")
+                self.position = start
+                self.error(f"Carácter inesperado: '{char}'")
+        
+        self.position = length
+        while len(self.indent_stack) > 1:
+            self.indent_stack.pop()
+            yield Token(TokenType.DEDENT, 0, 0, 0, length, line_index)
+        
+        yield Token(TokenType.EOF, None, 0, 0, length, line_index)
+    
+    def _decode_identifier(self, text, start):
+        """Decodifica un identificador leído de bytes y valida sus caracteres no ASCII"""
+        text = text.decode('utf-8')
+        if not text.isascii():
+            for index, char in enumerate(text):
+                if not (char.isalnum() or char == '_') or (index == 0 and not (char.isalpha() or char == '_')):
+                    self.position = start + len(text[:index].encode('utf-8'))
+                    self.error(f"Carácter inesperado: '{char}'")
+        return text
+    
+    def relex(self, new_source, first_line=None, old_last_line=None, new_last_line=None):
+        """
+        Re-tokeniza solo las líneas editadas y empalma el resultado con los
+        tokens del análisis anterior
+        
+        Reanuda el motor 'regex' desde la instantánea de indent_stack más
+        cercana anterior a la edición y se detiene en la primera línea
+        posterior a ella cuyo estado coincide con el del flujo anterior.
+        
+        El costo es proporcional a la edición: tokens e instantáneas se
+        empalman en el lugar y los posteriores a la edición no se tocan. El
+        LineIndex anterior queda encadenado al de la nueva fuente, y cada
+        token reutilizado traslada su offset (y con él su línea) la primera
+        vez que se consulta.
+        
+        Args:
+            new_source: Nueva versión completa de la fuente
+            first_line, old_last_line, new_last_line: Rango editado; si se
+                omite se calcula con edited_line_range()
+        
+        Returns:
+            La nueva lista de tokens (también en self.tokens; es la misma
+            lista, modificada). En self.last_edit queda (inicio,
+            fin_anterior, fin_nuevo) del rango de índices de tokens
+            reemplazado.
+        """
+        old_source, old_tokens, old_states = self.source, self.tokens, self.line_states
+        edit_offset = None
+        if first_line is None and isinstance(old_source, str):
+            if old_source == new_source:
+                self.last_edit = (len(old_tokens), len(old_tokens), len(old_tokens))
+                return old_tokens
+            prefix, suffix = _common_affixes(old_source, new_source)
+            edit_offset = old_source.rfind('\n', 0, prefix) + 1
+            new_last_line = new_source.count('\n', 0, len(new_source) - suffix) + 1
+        
+        if self.engine != 'regex' or not old_states or not isinstance(old_tokens, list) \
+                or not isinstance(old_source, str):
+            saved = dict(vars(self))
+            try:
+                self.__init__(new_source, self.engine)
+                self.tokenize()
+            except LexerError:
+                # El Lexer queda como antes de la edición
+                vars(self).update(saved)
+                raise
+            self.last_edit = (0, len(old_tokens), len(self.tokens))
+            return self.tokens
+        
+        offset_delta = len(new_source) - len(old_source)
+        old_index = self.line_index
+        
+        # Última instantánea que empieza en la primera línea editada o antes
+        if edit_offset is None:
+            starts = old_index.starts
+            edit_offset = starts[min(first_line, len(starts)) - 1]
+        state_head = _first_token_at_offset(old_states, edit_offset + 1) - 1
+        if state_head >= 0:
+            restart = old_states[state_head]
+            restart_offset, restart_stack = restart.offset, restart.stack
+            restart_line = old_source.count('\n', 0, restart_offset) + 1
+        else:
+            state_head, restart_line, restart_offset, restart_stack = 0, 1, 0, (0,)
+        head = _first_token_at_offset(old_tokens, restart_offset)
+        
+        # Los tokens nuevos usan el índice de la nueva fuente; los anteriores
+        # siguen con el viejo (offsets de la fuente anterior) hasta link()
+        saved = dict(vars(self))
+        self.source = new_source
+        self.line_index = LineIndex(new_source)
+        self.indent_stack = list(restart_stack)
+        fresh_states = self.line_states = []
+        
+        fresh = []
+        tail_start = None
+        seen_state = self._state_line = 0
+        self._record_states = True
+        scanner = self._iter_regex(restart_offset, restart_line)
+        try:
+            for token in scanner:
+                state_line = self._state_line
+                if state_line != seen_state:
+                    seen_state = state_line
+                    if state_line > new_last_line:
+                        new_state = fresh_states[-1]
+                        old_offset = new_state.offset - offset_delta
+                        state_tail = _first_token_at_offset(old_states, old_offset, state_head)
+                        if state_tail < len(old_states) and old_states[state_tail].offset == old_offset \
+                                and old_states[state_tail].stack == new_state.stack:
+                            tail_start = _first_token_at_offset(old_tokens, old_offset, head)
+                            break
+                fresh.append(token)
+        except LexerError:
+            # El Lexer queda como antes de la edición
+            vars(self).update(saved)
+            raise
+        finally:
+            scanner.close()
+            self._record_states = False
+        
+        if tail_start is None:
+            tail_start, state_tail = len(old_tokens), len(old_states)
+            old_index.link(self.line_index, len(old_source) + 1, 0)
+        else:
+            # La línea de reanudación conserva su instantánea anterior
+            fresh_states.pop()
+            old_index.link(self.line_index, old_offset, offset_delta)
+            self.indent_stack = [0]
+        
+        old_tokens[head:tail_start] = fresh
+        old_states[state_head:state_tail] = fresh_states
+        self.tokens, self.line_states = old_tokens, old_states
+        self.position = len(new_source)
+        self.last_edit = (head, tail_start, head + len(fresh))
+        return self.tokens
+    
+    def _iter_chars(self):
+        """Motor 'char': recorre la fuente carácter a carácter con peek()/advance()"""
         at_line_start = True
         
         while self.position < len(self.source):
             if at_line_start:
+                line_start = self.position
                 indent_level = 0
                 while self.peek() in ' \t':
                     indent_level += 4 if self.peek() == '\t' else 1
@@ -222,7 +988,7 @@ class Lexer:
                         self.skip_comment()
                     continue
                 
-                self.tokens.extend(self.handle_indentation(indent_level))
+                yield from self.handle_indentation(indent_level, line_start)
                 at_line_start = False
             
             self.skip_whitespace()
@@ -230,117 +996,136 @@ class Lexer:
                 break
             
             char = self.peek()
-            start_line, start_column = self.line, self.column
+            start = self.position
             
             if char == '#':
                 self.skip_comment()
             elif char == '\n':
                 self.advance()
-                self.tokens.append(Token(TokenType.NEWLINE, '\\n', start_line, start_column))
+                yield self.make_token(TokenType.NEWLINE, '\\n', start)
                 at_line_start = True
-            elif char.isdigit():
-                self.tokens.append(self.read_number())
+            elif char in DIGITS:
+                yield self.read_number()
             elif char in '"\'':
-                self.tokens.append(self.read_string())
+                yield self.read_string()
             elif char.isalpha() or char == '_':
-                self.tokens.append(self.read_identifier())
+                yield self.read_identifier()
             elif char == '*' and self.peek(1) == '*':
                 self.advance()
                 self.advance()
-                self.tokens.append(Token(TokenType.POWER, '**', start_line, start_column))
+                yield self.make_token(TokenType.POWER, '**', start)
             elif char == '=' and self.peek(1) == '=':
                 self.advance()
                 self.advance()
-                self.tokens.append(Token(TokenType.EQUAL, '==', start_line, start_column))
+                yield self.make_token(TokenType.EQUAL, '==', start)
             elif char == '!' and self.peek(1) == '=':
                 self.advance()
                 self.advance()
-                self.tokens.append(Token(TokenType.NOT_EQUAL, '!=', start_line, start_column))
+                yield self.make_token(TokenType.NOT_EQUAL, '!=', start)
             elif char == '<' and self.peek(1) == '=':
                 self.advance()
                 self.advance()
-                self.tokens.append(Token(TokenType.LESS_EQUAL, '<=', start_line, start_column))
+                yield self.make_token(TokenType.LESS_EQUAL, '<=', start)
             elif char == '>' and self.peek(1) == '=':
                 self.advance()
                 self.advance()
-                self.tokens.append(Token(TokenType.GREATER_EQUAL, '>=', start_line, start_column))
+                yield self.make_token(TokenType.GREATER_EQUAL, '>=', start)
             elif char == '+':
                 self.advance()
-                self.tokens.append(Token(TokenType.PLUS, '+', start_line, start_column))
+                yield self.make_token(TokenType.PLUS, '+', start)
             elif char == '-':
                 self.advance()
-                self.tokens.append(Token(TokenType.MINUS, '-', start_line, start_column))
+                yield self.make_token(TokenType.MINUS, '-', start)
             elif char == '*':
                 self.advance()
-                self.tokens.append(Token(TokenType.MULTIPLY, '*', start_line, start_column))
+                yield self.make_token(TokenType.MULTIPLY, '*', start)
             elif char == '/':
                 self.advance()
-                self.tokens.append(Token(TokenType.DIVIDE, '/', start_line, start_column))
+                yield self.make_token(TokenType.DIVIDE, '/', start)
             elif char == '%':
                 self.advance()
-                self.tokens.append(Token(TokenType.MODULO, '%', start_line, start_column))
+                yield self.make_token(TokenType.MODULO, '%', start)
             elif char == '=':
                 self.advance()
-                self.tokens.append(Token(TokenType.ASSIGN, '=', start_line, start_column))
+                yield self.make_token(TokenType.ASSIGN, '=', start)
             elif char == '<':
                 self.advance()
-                self.tokens.append(Token(TokenType.LESS, '<', start_line, start_column))
+                yield self.make_token(TokenType.LESS, '<', start)
             elif char == '>':
                 self.advance()
-                self.tokens.append(Token(TokenType.GREATER, '>', start_line, start_column))
+                yield self.make_token(TokenType.GREATER, '>', start)
             elif char == '(':
                 self.advance()
-                self.tokens.append(Token(TokenType.LPAREN, '(', start_line, start_column))
+                yield self.make_token(TokenType.LPAREN, '(', start)
             elif char == ')':
                 self.advance()
-                self.tokens.append(Token(TokenType.RPAREN, ')', start_line, start_column))
+                yield self.make_token(TokenType.RPAREN, ')', start)
             elif char == '[':
                 self.advance()
-                self.tokens.append(Token(TokenType.LBRACKET, '[', start_line, start_column))
+                yield self.make_token(TokenType.LBRACKET, '[', start)
             elif char == ']':
                 self.advance()
-                self.tokens.append(Token(TokenType.RBRACKET, ']', start_line, start_column))
+                yield self.make_token(TokenType.RBRACKET, ']', start)
             elif char == ':':
                 self.advance()
-                self.tokens.append(Token(TokenType.COLON, ':', start_line, start_column))
+                yield self.make_token(TokenType.COLON, ':', start)
             elif char == ',':
                 self.advance()
-                self.tokens.append(Token(TokenType.COMMA, ',', start_line, start_column))
+                yield self.make_token(TokenType.COMMA, ',', start)
             elif char == '.':
                 self.advance()
-                self.tokens.append(Token(TokenType.DOT, '.', start_line, start_column))
+                yield self.make_token(TokenType.DOT, '.', start)
             else:
                 self.error(f"Carácter inesperado: '{char}'")
         
         while len(self.indent_stack) > 1:
             self.indent_stack.pop()
-            self.tokens.append(Token(TokenType.DEDENT, 0, self.line, self.column))
+            yield self.make_token(TokenType.DEDENT, 0, self.position)
         
-        self.tokens.append(Token(TokenType.EOF, None, self.line, self.column))
-        return self.tokens
+        yield self.make_token(TokenType.EOF, None, self.position)
 
 
 # ============= NODOS AST =============
+#
+# Los nodos usan __slots__ (sin __dict__ por instancia). `_fields` enumera,
+# en el orden del constructor, los atributos con hijos o valores del nodo;
+# `line`, `span` y `end_line` son metadatos de posición (el parser asigna
+# `span` solo a las sentencias y los bloques). Las clases de expresión no
+# reservan `span`: una expresión usada como sentencia es una instancia de
+# su variante `Clase.Statement`, que solo agrega ese slot.
 
 class ASTNode:
-    pass
+    __slots__ = ()
+    _fields = ()
 
 class ProgramNode(ASTNode):
+    __slots__ = ('statements', 'span', 'end_line')
+    _fields = ('statements',)
+    
     def __init__(self, statements):
         self.statements = statements
 
 class AssignmentNode(ASTNode):
+    __slots__ = ('identifier', 'expression', 'line', 'span')
+    _fields = ('identifier', 'expression')
+    
     def __init__(self, identifier, expression, line=0):
         self.identifier = identifier
         self.expression = expression
         self.line = line
 
 class PrintNode(ASTNode):
+    __slots__ = ('expression', 'line', 'span')
+    _fields = ('expression',)
+    
     def __init__(self, expression, line=0):
         self.expression = expression
         self.line = line
 
 class IfNode(ASTNode):
+    __slots__ = ('condition', 'then_block', 'elif_parts', 'else_block', 'line', 'span')
+    _fields = ('condition', 'then_block', 'elif_parts', 'else_block')
+    
     def __init__(self, condition, then_block, elif_parts=None, else_block=None, line=0):
         self.condition = condition
         self.then_block = then_block
@@ -349,12 +1134,18 @@ class IfNode(ASTNode):
         self.line = line
 
 class WhileNode(ASTNode):
+    __slots__ = ('condition', 'block', 'line', 'span')
+    _fields = ('condition', 'block')
+    
     def __init__(self, condition, block, line=0):
         self.condition = condition
         self.block = block
         self.line = line
 
 class ForNode(ASTNode):
+    __slots__ = ('identifier', 'iterable', 'block', 'line', 'span')
+    _fields = ('identifier', 'iterable', 'block')
+    
     def __init__(self, identifier, iterable, block, line=0):
         self.identifier = identifier
         self.iterable = iterable
@@ -362,6 +1153,9 @@ class ForNode(ASTNode):
         self.line = line
 
 class BinaryOpNode(ASTNode):
+    __slots__ = ('left', 'operator', 'right', 'line')
+    _fields = ('left', 'operator', 'right')
+    
     def __init__(self, left, operator, right, line=0):
         self.left = left
         self.operator = operator
@@ -369,48 +1163,456 @@ class BinaryOpNode(ASTNode):
         self.line = line
 
 class UnaryOpNode(ASTNode):
+    __slots__ = ('operator', 'operand', 'line')
+    _fields = ('operator', 'operand')
+    
     def __init__(self, operator, operand, line=0):
         self.operator = operator
         self.operand = operand
         self.line = line
 
 class NumberNode(ASTNode):
+    __slots__ = ('value', 'line')
+    _fields = ('value',)
+    
     def __init__(self, value, line=0):
         self.value = value
         self.line = line
 
 class StringNode(ASTNode):
+    __slots__ = ('value', 'line')
+    _fields = ('value',)
+    
     def __init__(self, value, line=0):
         self.value = value
         self.line = line
 
 class IdentifierNode(ASTNode):
+    __slots__ = ('name', 'line')
+    _fields = ('name',)
+    
     def __init__(self, name, line=0):
         self.name = name
         self.line = line
 
 class ListNode(ASTNode):
+    __slots__ = ('elements', 'line')
+    _fields = ('elements',)
+    
     def __init__(self, elements, line=0):
         self.elements = elements
         self.line = line
 
 class IndexNode(ASTNode):
+    __slots__ = ('list_expr', 'index_expr', 'line')
+    _fields = ('list_expr', 'index_expr')
+    
     def __init__(self, list_expr, index_expr, line=0):
         self.list_expr = list_expr
         self.index_expr = index_expr
         self.line = line
 
 class CallNode(ASTNode):
+    __slots__ = ('function', 'args', 'line')
+    _fields = ('function', 'args')
+    
     def __init__(self, function, args, line=0):
         self.function = function
         self.args = args
         self.line = line
 
 class BlockNode(ASTNode):
+    __slots__ = ('statements', 'span')
+    _fields = ('statements',)
+    
     def __init__(self, statements):
         self.statements = statements
 
 
+AST_NODE_CLASSES = (ProgramNode, AssignmentNode, PrintNode, IfNode, WhileNode, ForNode,
+                    BinaryOpNode, UnaryOpNode, NumberNode, StringNode, IdentifierNode,
+                    ListNode, IndexNode, CallNode, BlockNode)
+
+EXPRESSION_NODE_CLASSES = (BinaryOpNode, UnaryOpNode, NumberNode, StringNode, IdentifierNode,
+                           ListNode, IndexNode, CallNode)
+
+
+def _expression_statement_class(node_class):
+    """
+    Subclase de una clase de expresión con slot `span`: conserva el nombre
+    (los visitantes despachan por él) y su __qualname__ la ubica para pickle
+    """
+    return type(node_class.__name__, (node_class,), {
+        '__slots__': ('span',),
+        '__module__': node_class.__module__,
+        '__qualname__': f'{node_class.__qualname__}.Statement',
+    })
+
+
+for _node_class in EXPRESSION_NODE_CLASSES:
+    _node_class.Statement = _expression_statement_class(_node_class)
+del _node_class
+
+
+# ============= FÁBRICA DE NODOS DE EXPRESIÓN =============
+
+class NodeFactory:
+    """
+    Construye los nodos de expresión del Parser; esta base crea siempre un
+    nodo nuevo por aparición
+    """
+    
+    # True si las fábricas devuelven el mismo nodo para apariciones distintas
+    shares_nodes = False
+    
+    def number(self, value, line):
+        return NumberNode(value, line)
+    
+    def string(self, value, line):
+        return StringNode(value, line)
+    
+    def identifier(self, name, line):
+        return IdentifierNode(name, line)
+    
+    def binary_op(self, left, operator, right, line):
+        return BinaryOpNode(left, operator, right, line)
+    
+    def unary_op(self, operator, operand, line):
+        return UnaryOpNode(operator, operand, line)
+    
+    def index(self, list_expr, index_expr, line):
+        return IndexNode(list_expr, index_expr, line)
+    
+    def call(self, function, args, line):
+        return CallNode(function, args, line)
+    
+    def list_literal(self, elements, line):
+        return ListNode(elements, line)
+    
+    def root(self, expression, line):
+        """
+        Raíz de una expresión cuya línea no es la de una sentencia con línea
+        propia (condiciones de elif)
+        """
+        return expression
+    
+    def statement(self, expression, line):
+        """Expresión usada como sentencia: copia en la variante con `span` de su clase"""
+        statement_class = expression.Statement
+        statement = statement_class.__new__(statement_class)
+        for name in expression._fields:
+            setattr(statement, name, getattr(expression, name))
+        statement.line = line
+        return statement
+
+
+class HashConsingFactory(NodeFactory):
+    """
+    Fábrica que interna las expresiones estructuralmente idénticas: la
+    segunda aparición de `x * 2` (con los mismos hijos, ya internados)
+    retorna el mismo BinaryOpNode, así que dos subexpresiones son iguales
+    si y solo si son el mismo objeto (`is`).
+    
+    Un nodo compartido no puede tener una sola línea: los nodos internados
+    tienen `line = 0` y las líneas de cada aparición van en una tabla
+    aparte (apariciones encadenadas por nodo; ver lines_of). Como una
+    expresión nunca abarca varias líneas, la línea de una aparición es la
+    de la sentencia que la contiene (así la resuelve SemanticAnalyzer.line_of);
+    las raíces que no tienen esa sentencia (expresiones usadas como
+    sentencia, condiciones de elif) son copias sin compartir con su propia
+    línea. Los nodos compartidos no deben modificarse.
+    """
+    
+    shares_nodes = True
+    
+    def __init__(self):
+        self._table = {}  # clave estructural → nº de nodo
+        self.nodes = []   # nodos internados, por nº
+        self._numbers = {}  # id(nodo internado) → nº; self.nodes los mantiene vivos
+        # Apariciones: su línea y la aparición anterior del mismo nodo (-1 si
+        # es la primera), encadenadas desde la última aparición de cada nodo
+        self.occurrence_lines = array('I')
+        self.previous_occurrence = array('i')
+        self.last_occurrence = array('i')
+    
+    def _intern(self, key, line, node_class, *args):
+        number = self._table.get(key)
+        if number is None:
+            number = self._table[key] = len(self.nodes)
+            node = node_class(*args, 0)
+            self.nodes.append(node)
+            self._numbers[id(node)] = number
+            self.last_occurrence.append(-1)
+        self.previous_occurrence.append(self.last_occurrence[number])
+        self.last_occurrence[number] = len(self.occurrence_lines)
+        self.occurrence_lines.append(line)
+        return self.nodes[number]
+    
+    def number(self, value, line):
+        # La clase es parte de la clave: 1, 1.0 y True no se confunden
+        return self._intern((NumberNode, value.__class__, value), line, NumberNode, value)
+    
+    def string(self, value, line):
+        return self._intern((StringNode, value), line, StringNode, value)
+    
+    def identifier(self, name, line):
+        return self._intern((IdentifierNode, name), line, IdentifierNode, name)
+    
+    def binary_op(self, left, operator, right, line):
+        # Los hijos ya están internados: se comparan por identidad
+        return self._intern((BinaryOpNode, id(left), operator, id(right)), line,
+                            BinaryOpNode, left, operator, right)
+    
+    def unary_op(self, operator, operand, line):
+        return self._intern((UnaryOpNode, operator, id(operand)), line, UnaryOpNode, operator, operand)
+    
+    def index(self, list_expr, index_expr, line):
+        return self._intern((IndexNode, id(list_expr), id(index_expr)), line, IndexNode, list_expr, index_expr)
+    
+    def call(self, function, args, line):
+        return self._intern((CallNode, function) + tuple(map(id, args)), line, CallNode, function, args)
+    
+    def list_literal(self, elements, line):
+        return self._intern((ListNode,) + tuple(map(id, elements)), line, ListNode, elements)
+    
+    def root(self, expression, line):
+        # Copia sin compartir de la raíz, con su propia línea
+        root = expression.__class__.__new__(expression.__class__)
+        for name in expression._fields:
+            setattr(root, name, getattr(expression, name))
+        root.line = line
+        return root
+    
+    def lines_of(self, node) -> List[int]:
+        """Líneas de todas las apariciones de un nodo internado, en orden"""
+        number = self._numbers.get(id(node))
+        if number is None:
+            return []
+        lines = []
+        occurrence = self.last_occurrence[number]
+        while occurrence >= 0:
+            lines.append(self.occurrence_lines[occurrence])
+            occurrence = self.previous_occurrence[occurrence]
+        lines.reverse()
+        return lines
+    
+    def stats(self) -> dict:
+        """Nodos de expresión creados y apariciones resueltas con un nodo existente"""
+        total = len(self.occurrence_lines)
+        reused = total - len(self.nodes)
+        return {
+            'created': len(self.nodes),
+            'reused': reused,
+            'sharing': reused / total if total else 0.0,
+        }
+
+
+_DEFAULT_NODE_FACTORY = NodeFactory()
+
+
+# ============= AST EN ARENA =============
+
+# Etiqueta (2 bits bajos) de cada campo codificado en ASTArena
+_ARENA_NODE, _ARENA_LITERAL, _ARENA_LIST, _ARENA_TUPLE = range(4)
+
+
+class ASTArena:
+    """
+    AST compacto: cada nodo es un entero (su índice) sobre arrays paralelos
+    
+    - kinds: índice de la clase del nodo en AST_NODE_CLASSES
+    - lines: línea del nodo (0 en ProgramNode y BlockNode)
+    - first: posición de sus campos (`_fields` de la clase) en `fields`
+    - fields: cada campo como (valor << 2) | etiqueta, donde el valor es un
+      nodo, un índice del pool de literales o la posición de una secuencia
+    - sequences: listas y tuplas como [longitud, elemento, ...], con los
+      elementos codificados igual que los campos
+    - literals: pool deduplicado de nombres, operadores, números y strings
+    
+    Los spans (solo sentencias y bloques) van en un diccionario aparte. El
+    nodo 0 es la raíz. `node(id)` retorna una vista de solo lectura que es
+    instancia de la clase del nodo, así que SemanticAnalyzer, TACGenerator
+    y format_ast la recorren igual que al árbol de objetos.
+    """
+    
+    def __init__(self):
+        self.kinds = array('B')
+        self.lines = array('I')
+        self.first = array('I')
+        self.fields = array('q')
+        self.sequences = array('q')
+        self.literals = []
+        self._literal_ids = {}
+        self.spans = {}
+        self.end_line = None
+    
+    @classmethod
+    def from_ast(cls, root):
+        """Copia un árbol de nodos a una arena (recorrido iterativo, sin límite de profundidad)"""
+        arena = cls()
+        kind_of = {node_class: kind for kind, node_class in enumerate(AST_NODE_CLASSES)}
+        kind_of.update((node_class.Statement, kind_of[node_class]) for node_class in EXPRESSION_NODE_CLASSES)
+        arena.end_line = getattr(root, 'end_line', None)
+        # (valor, array destino, posición): el valor se codifica al sacarlo de la pila
+        pending = [(root, None, 0)]
+        while pending:
+            value, target, position = pending.pop()
+            if isinstance(value, ASTNode):
+                node = len(arena.kinds)
+                node_class = type(value)
+                arena.kinds.append(kind_of[node_class])
+                arena.lines.append(getattr(value, 'line', 0))
+                arena.first.append(len(arena.fields))
+                span = getattr(value, 'span', None)
+                if span is not None:
+                    arena.spans[node] = span
+                start = len(arena.fields)
+                arena.fields.extend(repeat(0, len(node_class._fields)))
+                for offset, name in enumerate(node_class._fields):
+                    pending.append((getattr(value, name), arena.fields, start + offset))
+                code = node << 2 | _ARENA_NODE
+            elif isinstance(value, (list, tuple)):
+                start = len(arena.sequences)
+                arena.sequences.append(len(value))
+                arena.sequences.extend(repeat(0, len(value)))
+                for offset, item in enumerate(value, 1):
+                    pending.append((item, arena.sequences, start + offset))
+                code = start << 2 | (_ARENA_LIST if isinstance(value, list) else _ARENA_TUPLE)
+            else:
+                code = arena._literal(value) << 2 | _ARENA_LITERAL
+            if target is not None:
+                target[position] = code
+        return arena
+    
+    def _literal(self, value):
+        # La clase es parte de la clave: 1, 1.0 y True no se confunden
+        key = (value.__class__, value)
+        literal = self._literal_ids.get(key)
+        if literal is None:
+            literal = self._literal_ids[key] = len(self.literals)
+            self.literals.append(value)
+        return literal
+    
+    def _decode(self, code):
+        tag = code & 3
+        value = code >> 2
+        if tag == _ARENA_NODE:
+            return _ARENA_VIEWS[self.kinds[value]](self, value)
+        if tag == _ARENA_LITERAL:
+            return self.literals[value]
+        items = [self._decode(item) for item in self.sequences[value + 1:value + 1 + self.sequences[value]]]
+        return items if tag == _ARENA_LIST else tuple(items)
+    
+    def field(self, node, position):
+        """Campo `position` (según `_fields`) del nodo `node`, decodificado"""
+        return self._decode(self.fields[self.first[node] + position])
+    
+    def node(self, node):
+        """Vista del nodo `node`"""
+        return _ARENA_VIEWS[self.kinds[node]](self, node)
+    
+    @property
+    def root(self):
+        return self.node(0)
+    
+    def __len__(self):
+        return len(self.kinds)
+    
+    def to_ast(self):
+        """Reconstruye el árbol de nodos (recorrido iterativo)"""
+        # Orden inverso de creación: los hijos siempre tienen id mayor que su padre
+        nodes = [None] * len(self.kinds)
+        
+        def decode(code):
+            tag = code & 3
+            value = code >> 2
+            if tag == _ARENA_NODE:
+                return nodes[value]
+            if tag == _ARENA_LITERAL:
+                return self.literals[value]
+            items = [decode(item) for item in self.sequences[value + 1:value + 1 + self.sequences[value]]]
+            return items if tag == _ARENA_LIST else tuple(items)
+        
+        for node in reversed(range(len(self.kinds))):
+            node_class = AST_NODE_CLASSES[self.kinds[node]]
+            start = self.first[node]
+            values = [decode(code) for code in self.fields[start:start + len(node_class._fields)]]
+            if 'line' in node_class.__slots__:
+                values.append(self.lines[node])
+            if node in self.spans:
+                # Expresión usada como sentencia: la variante de su clase con `span`
+                node_class = getattr(node_class, 'Statement', node_class)
+            rebuilt = nodes[node] = node_class(*values)
+            if node in self.spans:
+                rebuilt.span = self.spans[node]
+        if self.end_line is not None:
+            nodes[0].end_line = self.end_line
+        return nodes[0]
+
+
+def _arena_view_init(self, arena, node):
+    self.arena = arena
+    self.id = node
+
+
+def _arena_view_class(node_class):
+    """
+    Subclase de `node_class` cuyas instancias leen sus atributos de una
+    ASTArena: conserva el nombre de la clase (los visitantes despachan por
+    él) e isinstance() sigue funcionando
+    """
+    namespace = {'__slots__': ('arena', 'id'), '__init__': _arena_view_init}
+    for position, name in enumerate(node_class._fields):
+        namespace[name] = property(lambda self, position=position: self.arena.field(self.id, position))
+    if 'line' in node_class.__slots__:
+        namespace['line'] = property(lambda self: self.arena.lines[self.id])
+    namespace['span'] = property(lambda self: self.arena.spans.get(self.id))
+    if node_class is ProgramNode:
+        namespace['end_line'] = property(lambda self: self.arena.end_line)
+    return type(node_class.__name__, (node_class,), namespace)
+
+
+_ARENA_VIEWS = tuple(_arena_view_class(node_class) for node_class in AST_NODE_CLASSES)
+
+
+def _statement_blocks(statement):
+    """BlockNodes que contiene directamente una sentencia compuesta"""
+    if isinstance(statement, IfNode):
+        blocks = [statement.then_block] + [block for _, block in statement.elif_parts]
+        if statement.else_block is not None:
+            blocks.append(statement.else_block)
+        return blocks
+    if isinstance(statement, (WhileNode, ForNode)):
+        return [statement.block]
+    return []
+
+
+def shift_ast(nodes, token_delta: int, line_delta: int):
+    """
+    Desplaza los spans de tokens (y, si line_delta != 0, los números de
+    línea) de subárboles reutilizados tras una edición
+    """
+    if not token_delta and not line_delta:
+        return
+    pending = list(nodes)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (list, tuple)):
+            pending.extend(node)
+            continue
+        if not isinstance(node, ASTNode):
+            continue
+        span = getattr(node, 'span', None)
+        if span is not None:
+            node.span = (span[0] + token_delta, span[1] + token_delta)
+        elif not line_delta:
+            # Las expresiones no tienen span: solo importan sus líneas
+            continue
+        if line_delta and hasattr(node, 'line'):
+            node.line += line_delta
+        pending.extend(getattr(node, name) for name in node._fields)
+
+
 # ============= ANÁLISIS SINTÁCTICO =============
 
 class ParserError(Exception):
@@ -418,13 +1620,51 @@ class ParserError(Exception):
     pass
 
 
+# Operadores binarios de expresión: tipo de token → (precedencia, asociatividad)
+# Una asociatividad 'none' impide encadenar (a < b < c es un error sintáctico)
+BINARY_OPERATORS = {
+    TokenType.EQUAL: (1, 'none'),
+    TokenType.NOT_EQUAL: (1, 'none'),
+    TokenType.LESS: (1, 'none'),
+    TokenType.GREATER: (1, 'none'),
+    TokenType.LESS_EQUAL: (1, 'none'),
+    TokenType.GREATER_EQUAL: (1, 'none'),
+    TokenType.PLUS: (2, 'left'),
+    TokenType.MINUS: (2, 'left'),
+    TokenType.MULTIPLY: (3, 'left'),
+    TokenType.DIVIDE: (3, 'left'),
+    TokenType.MODULO: (3, 'left'),
+    TokenType.POWER: (5, 'right'),
+}
+
+# El '-' unario liga más que * / % pero menos que **: -2 ** 2 == -(2 ** 2)
+UNARY_PRECEDENCE = 4
+
+# Modos del Parser: descenso recursivo, pila explícita (anidamiento arbitrario)
+# o el parser LALR(1) guiado por tablas de lr_parser.py (mismo AST)
+PARSER_MODES = ('recursive', 'iterative', 'lr')
+
+
 class Parser:
     """Analizador Sintáctico"""
     
-    def __init__(self, tokens):
-        self.tokens = tokens
+    def __init__(self, tokens, mode: str = 'recursive', factory: Optional[NodeFactory] = None):
+        if mode not in PARSER_MODES:
+            raise ValueError(f"Modo de parser desconocido: {mode}")
+        # Los nodos de expresión se crean a través de la fábrica (p. ej. HashConsingFactory)
+        self.nodes = factory if factory is not None else _DEFAULT_NODE_FACTORY
+        # Acepta una lista o un iterador perezoso (Lexer.iter_tokens); los
+        # tokens se consumen a través de un pequeño buffer de lookahead
+        self._tokens = tokens
+        self._token_stream = iter(tokens)
+        self._lookahead = deque()
         self.position = 0
-        self.current_token = tokens[0] if tokens else None
+        self.current_token = next(self._token_stream, None)
+        self.mode = mode
+        if mode == 'iterative':
+            # Las sentencias simples y las cabeceras reutilizan sus métodos,
+            # pero sus expresiones se analizan con la pila explícita
+            self.parse_expression = self._parse_expression_iterative
     
     def error(self, message):
         if self.current_token:
@@ -432,11 +1672,24 @@ class Parser:
         raise ParserError(f"Error Sintáctico: {message}")
     
     def advance(self):
-        if self.position < len(self.tokens) - 1:
+        if self._lookahead:
+            next_token = self._lookahead.popleft()
+        else:
+            next_token = next(self._token_stream, None)
+        if next_token is not None:
             self.position += 1
-            self.current_token = self.tokens[self.position]
+            self.current_token = next_token
         return self.current_token
     
+    def peek_token(self, offset=1):
+        """Retorna el token `offset` posiciones después del actual sin consumirlo"""
+        while len(self._lookahead) < offset:
+            token = next(self._token_stream, None)
+            if token is None:
+                return None
+            self._lookahead.append(token)
+        return self._lookahead[offset - 1]
+    
     def expect(self, token_type):
         if self.current_token.type != token_type:
             self.error(f"Se esperaba {token_type.name}, se encontró {self.current_token.type.name}")
@@ -449,30 +1702,61 @@ class Parser:
             self.advance()
     
     def parse(self):
+        if self.mode == 'iterative':
+            return self._parse_program_iterative()
+        if self.mode == 'lr':
+            return self._parse_program_lr()
         return self.parse_program()
     
     def parse_program(self):
-        statements = []
+        return self._finish_program(list(self._iter_statements_recursive()))
+    
+    def iter_statements(self):
+        """
+        Genera las sentencias de nivel superior a medida que se analizan,
+        sin construir el ProgramNode
+        
+        Junto con Lexer.iter_tokens() permite que cada sentencia pase por las
+        fases siguientes antes de leer la próxima: la memoria queda acotada
+        por la sentencia más grande y no por el programa completo.
+        """
+        if self.mode == 'iterative':
+            return self._iter_statements_iterative()
+        if self.mode == 'lr':
+            # El parser LR reduce el programa completo antes de entregar sentencias
+            return iter(self._parse_program_lr().statements)
+        return self._iter_statements_recursive()
+    
+    def _iter_statements_recursive(self):
         self.skip_newlines()
         while self.current_token.type != TokenType.EOF:
+            start = self.position
             stmt = self.parse_statement()
-            if stmt:
-                statements.append(stmt)
             self.skip_newlines()
-        return ProgramNode(statements)
+            if stmt:
+                stmt.span = (start, self.position)
+                yield stmt
+    
+    def _finish_program(self, statements):
+        program = ProgramNode(statements)
+        # Índice del EOF y su línea: permiten a reparse() desplazar lo reutilizado
+        program.span = (0, self.position)
+        program.end_line = self.current_token.line
+        return program
     
     def parse_statement(self):
         self.skip_newlines()
         token_type = self.current_token.type
         
         if token_type == TokenType.IDENTIFIER:
-            next_token = self.tokens[self.position + 1] if self.position + 1 < len(self.tokens) else None
+            next_token = self.peek_token()
             if next_token and next_token.type == TokenType.ASSIGN:
                 return self.parse_assignment()
             elif next_token and next_token.type == TokenType.LBRACKET:
                 return self.parse_list_assignment()
             else:
-                expr = self.parse_expression()
+                line = self.current_token.line
+                expr = self.nodes.statement(self.parse_expression(), line)
                 self.skip_newlines()
                 return expr
         elif token_type == TokenType.PRINT:
@@ -521,8 +1805,9 @@ class Parser:
         
         elif_parts = []
         while self.current_token.type == TokenType.ELIF:
+            elif_line = self.current_token.line
             self.advance()
-            elif_condition = self.parse_expression()
+            elif_condition = self.nodes.root(self.parse_expression(), elif_line)
             self.expect(TokenType.COLON)
             self.skip_newlines()
             elif_block = self.parse_block()
@@ -561,72 +1846,180 @@ class Parser:
         statements = []
         if self.current_token.type != TokenType.INDENT:
             self.error("Se esperaba bloque indentado")
+        block_start = self.position
         self.advance()
         self.skip_newlines()
         
         while self.current_token.type not in (TokenType.DEDENT, TokenType.EOF):
+            start = self.position
             stmt = self.parse_statement()
+            self.skip_newlines()
             if stmt:
+                stmt.span = (start, self.position)
                 statements.append(stmt)
-            self.skip_newlines()
         
         if self.current_token.type == TokenType.DEDENT:
             self.advance()
         
-        return BlockNode(statements)
+        block = BlockNode(statements)
+        block.span = (block_start, self.position)
+        return block
+    
+    # ----- Análisis incremental -----
     
-    def parse_expression(self):
-        return self.parse_comparison()
+    def _seek(self, index):
+        """Reposiciona el parser en el token `index` de la lista de tokens"""
+        tokens = self._tokens
+        self._token_stream = map(tokens.__getitem__, range(index + 1, len(tokens)))
+        self._lookahead.clear()
+        self.position = index
+        self.current_token = tokens[index]
     
-    def parse_comparison(self):
-        left = self.parse_arithmetic()
-        comparison_ops = {TokenType.EQUAL, TokenType.NOT_EQUAL, TokenType.LESS, 
-                         TokenType.GREATER, TokenType.LESS_EQUAL, TokenType.GREATER_EQUAL}
+    def reparse(self, previous, edit):
+        """
+        Análisis sintáctico incremental tras una edición
         
-        if self.current_token.type in comparison_ops:
-            operator = self.current_token.value
-            line = self.current_token.line
-            self.advance()
-            right = self.parse_arithmetic()
-            return BinaryOpNode(left, operator, right, line)
-        return left
-    
-    def parse_arithmetic(self):
-        left = self.parse_term()
-        while self.current_token.type in (TokenType.PLUS, TokenType.MINUS):
-            operator = self.current_token.value
-            line = self.current_token.line
-            self.advance()
-            right = self.parse_term()
-            left = BinaryOpNode(left, operator, right, line)
-        return left
+        Reutiliza las sentencias (y los BlockNode) de `previous` cuyos
+        tokens no cambiaron y re-analiza solo las afectadas: si la edición
+        cae dentro de un bloque, desciende a él; si no, re-analiza desde la
+        primera sentencia afectada hasta volver a una frontera de sentencia
+        del análisis anterior. Cada sentencia y bloque guarda en `span` su
+        rango de tokens [inicio, fin), donde `fin` es el token siguiente
+        (que el parser también examinó).
+        
+        Los subárboles reutilizados se modifican en el lugar: se desplazan sus
+        spans y, si cambió el número de líneas, sus números de línea.
+        
+        Args:
+            previous: ProgramNode del análisis anterior
+            edit: (inicio, fin_anterior, fin_nuevo) del rango de índices de
+                tokens reemplazado, como Lexer.last_edit
+        
+        Returns:
+            El nuevo ProgramNode (igual al que produciría parse())
+        """
+        tokens = self._tokens
+        # Los nodos compartidos de HashConsingFactory no se pueden desplazar en el lugar,
+        # y el modo 'lr' siempre analiza el programa completo
+        if previous is None or edit is None or not isinstance(tokens, list) or self.nodes.shares_nodes \
+                or self.mode == 'lr' \
+                or getattr(previous, 'span', None) is None or not previous.statements:
+            return self.parse()
+        head, old_end, new_end = edit
+        token_delta = new_end - old_end
+        line_delta = tokens[-1].line - previous.end_line
+        if head == old_end == new_end:
+            return previous
+        
+        statements = self._reparse_statements(previous.statements, head, old_end, token_delta, line_delta, None)
+        self._seek(len(tokens) - 1)
+        return self._finish_program(statements)
+    
+    def _reparse_statements(self, statements, head, old_end, token_delta, line_delta, block_end):
+        """
+        Re-analiza una lista de sentencias (del programa, o de un bloque cuyo
+        DEDENT está en `block_end`); retorna la nueva lista, o None si la
+        edición alteró la estructura del bloque
+        """
+        # Primera sentencia afectada: la que examinó algún token editado
+        low, high = 0, len(statements)
+        while low < high:
+            middle = (low + high) // 2
+            if statements[middle].span[1] < head:
+                low = middle + 1
+            else:
+                high = middle
+        first = low
+        if first == len(statements):
+            return None
+        
+        statement = statements[first]
+        start = statement.span[0]
+        if start < head:
+            blocks = _statement_blocks(statement)
+            for index, block in enumerate(blocks):
+                block_start, block_stop = block.span
+                if block_start < head and old_end < block_stop:
+                    inner = self._reparse_statements(block.statements, head, old_end,
+                                                     token_delta, line_delta, block_stop - 1)
+                    if inner is None:
+                        break
+                    block.statements = inner
+                    block.span = (block_start, block_stop + token_delta)
+                    statement.span = (start, statement.span[1] + token_delta)
+                    # Lo que sigue al bloque: condiciones elif, bloques posteriores y sentencias hermanas
+                    if isinstance(statement, IfNode):
+                        shift_ast([condition for condition, _ in statement.elif_parts[index:]],
+                                  token_delta, line_delta)
+                    shift_ast(blocks[index + 1:], token_delta, line_delta)
+                    shift_ast(statements[first + 1:], token_delta, line_delta)
+                    return statements
+        
+        # Primera sentencia posterior a la edición: candidata a resincronizar
+        resume = first
+        while resume < len(statements) and statements[resume].span[0] < old_end:
+            resume += 1
+        
+        self._seek(min(start, head))
+        result = statements[:first]
+        terminators = (TokenType.EOF,) if block_end is None else (TokenType.DEDENT, TokenType.EOF)
+        while self.current_token.type not in terminators:
+            start = self.position
+            stmt = self.parse_statement()
+            self.skip_newlines()
+            if stmt:
+                stmt.span = (start, self.position)
+                result.append(stmt)
+            
+            while resume < len(statements) and statements[resume].span[0] + token_delta < self.position:
+                resume += 1
+            if resume < len(statements) and statements[resume].span[0] + token_delta == self.position:
+                suffix = statements[resume:]
+                shift_ast(suffix, token_delta, line_delta)
+                result.extend(suffix)
+                return result
+        
+        if block_end is not None and self.position != block_end + token_delta:
+            return None
+        return result
     
-    def parse_term(self):
+    def parse_expression(self, min_precedence=0):
+        """
+        Parser de expresiones por precedencia (Pratt / precedence climbing)
+        
+        Lee un factor y consume los operadores de BINARY_OPERATORS cuya
+        precedencia sea al menos `min_precedence`; el operando derecho de
+        cada operador se analiza con una sola llamada recursiva.
+        """
         left = self.parse_factor()
-        while self.current_token.type in (TokenType.MULTIPLY, TokenType.DIVIDE, TokenType.MODULO):
-            operator = self.current_token.value
-            line = self.current_token.line
+        while True:
+            entry = BINARY_OPERATORS.get(self.current_token.type)
+            if entry is None or entry[0] < min_precedence:
+                return left
+            precedence, associativity = entry
+            token = self.current_token
             self.advance()
-            right = self.parse_factor()
-            left = BinaryOpNode(left, operator, right, line)
-        return left
+            right = self.parse_expression(precedence if associativity == 'right' else precedence + 1)
+            left = self.nodes.binary_op(left, token.value, right, token.line)
+            if associativity == 'none':
+                return left
     
     def parse_factor(self):
         token = self.current_token
         
         if token.type == TokenType.NUMBER:
             self.advance()
-            return NumberNode(token.value, token.line)
+            return self.nodes.number(token.value, token.line)
         elif token.type == TokenType.STRING:
             self.advance()
-            return StringNode(token.value, token.line)
+            return self.nodes.string(token.value, token.line)
         elif token.type == TokenType.IDENTIFIER:
             self.advance()
             if self.current_token.type == TokenType.LBRACKET:
                 self.advance()
                 index_expr = self.parse_expression()
                 self.expect(TokenType.RBRACKET)
-                return IndexNode(IdentifierNode(token.value, token.line), index_expr, token.line)
+                return self.nodes.index(self.nodes.identifier(token.value, token.line), index_expr, token.line)
             elif self.current_token.type == TokenType.DOT:
                 self.advance()
                 method = self.expect(TokenType.IDENTIFIER).value
@@ -638,8 +2031,8 @@ class Parser:
                         self.advance()
                         args.append(self.parse_expression())
                 self.expect(TokenType.RPAREN)
-                return CallNode(f"{token.value}.{method}", args, token.line)
-            return IdentifierNode(token.value, token.line)
+                return self.nodes.call(f"{token.value}.{method}", args, token.line)
+            return self.nodes.identifier(token.value, token.line)
         elif token.type == TokenType.LBRACKET:
             self.advance()
             elements = []
@@ -649,7 +2042,7 @@ class Parser:
                     self.advance()
                     elements.append(self.parse_expression())
             self.expect(TokenType.RBRACKET)
-            return ListNode(elements, token.line)
+            return self.nodes.list_literal(elements, token.line)
         elif token.type == TokenType.LPAREN:
             self.advance()
             expr = self.parse_expression()
@@ -666,10 +2059,253 @@ class Parser:
                     self.advance()
                     args.append(self.parse_expression())
             self.expect(TokenType.RPAREN)
-            return CallNode(func_name, args, token.line)
+            return self.nodes.call(func_name, args, token.line)
         elif token.type == TokenType.MINUS:
             self.advance()
-            operand = self.parse_factor()
-            return UnaryOpNode('-', operand, token.line)
+            operand = self.parse_expression(UNARY_PRECEDENCE)
+            return self.nodes.unary_op('-', operand, token.line)
         else:
             self.error(f"Token inesperado en expresión: {token}")
+    
+    # ----- Modo LR (tablas LALR(1)) -----
+    
+    def _parse_program_lr(self):
+        # Importación diferida: lr_parser importa este módulo
+        from lr_parser import front_end_parser
+        tokens = chain((self.current_token,) if self.current_token is not None else (),
+                       self._lookahead, self._token_stream)
+        program = front_end_parser().parse_ast(tokens, self.nodes)
+        self._lookahead.clear()
+        self.position = program.span[1]
+        return program
+    
+    # ----- Modo iterativo (pila explícita) -----
+    
+    def _open_block(self, frame, statements_stack):
+        """Consume el INDENT de un bloque y apila la sentencia compuesta que lo contiene"""
+        if self.current_token.type != TokenType.INDENT:
+            self.error("Se esperaba bloque indentado")
+        block_start = self.position
+        self.advance()
+        self.skip_newlines()
+        statements_stack.append((frame, [], block_start))
+    
+    def _parse_program_iterative(self):
+        return self._finish_program(list(self._iter_statements_iterative()))
+    
+    def _iter_statements_iterative(self):
+        """
+        Equivalente a _iter_statements_recursive() sin recursión: cada
+        sentencia compuesta abierta (if/while/for) es un marco
+        [tipo, línea, argumentos, inicio] en una pila explícita junto con la
+        lista de sentencias de su bloque actual y el índice de su INDENT.
+        Las sentencias simples reutilizan sus métodos de parse_statement().
+        """
+        # [(marco, sentencias del bloque, inicio del bloque)]; el fondo es el programa (marco None)
+        stack = [(None, None, 0)]
+        self.skip_newlines()
+        
+        while True:
+            frame, statements, block_start = stack[-1]
+            token_type = self.current_token.type
+            
+            if frame is None:
+                if token_type == TokenType.EOF:
+                    return
+            elif token_type in (TokenType.DEDENT, TokenType.EOF):
+                # Fin del bloque: completar la sentencia compuesta que lo abrió
+                if token_type == TokenType.DEDENT:
+                    self.advance()
+                stack.pop()
+                block = BlockNode(statements)
+                block.span = (block_start, self.position)
+                kind, line, args, start = frame
+                if kind == 'while':
+                    node = WhileNode(args[0], block, line)
+                elif kind == 'for':
+                    node = ForNode(args[0], args[1], block, line)
+                else:
+                    # args: [condición, then, elif_parts, else, parte actual, condición del elif]
+                    part = args[4]
+                    if part == 'then':
+                        args[1] = block
+                    elif part == 'elif':
+                        args[2].append((args[5], block))
+                    else:
+                        args[3] = block
+                    
+                    if part != 'else' and self.current_token.type == TokenType.ELIF:
+                        elif_line = self.current_token.line
+                        self.advance()
+                        args[4], args[5] = 'elif', self.nodes.root(self.parse_expression(), elif_line)
+                        self.expect(TokenType.COLON)
+                        self.skip_newlines()
+                        self._open_block(frame, stack)
+                        continue
+                    if part != 'else' and self.current_token.type == TokenType.ELSE:
+                        self.advance()
+                        args[4] = 'else'
+                        self.expect(TokenType.COLON)
+                        self.skip_newlines()
+                        self._open_block(frame, stack)
+                        continue
+                    node = IfNode(args[0], args[1], args[2], args[3], line)
+                self.skip_newlines()
+                node.span = (start, self.position)
+                if len(stack) == 1:
+                    yield node
+                else:
+                    stack[-1][1].append(node)
+                continue
+            
+            line = self.current_token.line
+            start = self.position
+            if token_type == TokenType.IF:
+                self.advance()
+                condition = self.parse_expression()
+                self.expect(TokenType.COLON)
+                self.skip_newlines()
+                self._open_block(['if', line, [condition, None, [], None, 'then', None], start], stack)
+            elif token_type == TokenType.WHILE:
+                self.advance()
+                condition = self.parse_expression()
+                self.expect(TokenType.COLON)
+                self.skip_newlines()
+                self._open_block(['while', line, [condition], start], stack)
+            elif token_type == TokenType.FOR:
+                self.advance()
+                identifier = self.expect(TokenType.IDENTIFIER).value
+                self.expect(TokenType.IN)
+                iterable = self.parse_expression()
+                self.expect(TokenType.COLON)
+                self.skip_newlines()
+                self._open_block(['for', line, [identifier, iterable], start], stack)
+            else:
+                node = self.parse_statement()
+                self.skip_newlines()
+                node.span = (start, self.position)
+                if frame is None:
+                    yield node
+                else:
+                    statements.append(node)
+    
+    def _parse_expression_iterative(self):
+        """
+        Equivalente a parse_expression() sin recursión (shunting-yard)
+        
+        `values` es la pila de operandos y `operators` la de operadores
+        pendientes (precedencia, asociatividad, operador, línea; asociatividad
+        None para el '-' unario). Cada paréntesis, lista, índice o llamada
+        abierta es un grupo con la altura de `operators` en que empieza.
+        """
+        nodes = self.nodes
+        values = []
+        operators = []
+        # Grupos: [tipo, base_operadores, línea, dato, elementos, hubo_comparación]
+        groups = [['expr', 0, 0, None, None, False]]
+        
+        def reduce_to(base, precedence=None, associativity=None):
+            while len(operators) > base:
+                top_precedence, top_associativity, operator, line = operators[-1]
+                if precedence is not None and not (
+                        top_precedence > precedence or
+                        (top_precedence == precedence and associativity != 'right')):
+                    return
+                operators.pop()
+                if top_associativity is None:
+                    values.append(nodes.unary_op(operator, values.pop(), line))
+                else:
+                    right = values.pop()
+                    values.append(nodes.binary_op(values.pop(), operator, right, line))
+        
+        while True:
+            # ----- Posición de operando: '-' prefijos y un factor -----
+            token = self.current_token
+            while token.type == TokenType.MINUS:
+                operators.append((UNARY_PRECEDENCE, None, '-', token.line))
+                token = self.advance()
+            
+            token_type = token.type
+            if token_type == TokenType.NUMBER:
+                self.advance()
+                values.append(nodes.number(token.value, token.line))
+            elif token_type == TokenType.STRING:
+                self.advance()
+                values.append(nodes.string(token.value, token.line))
+            elif token_type == TokenType.IDENTIFIER:
+                self.advance()
+                if self.current_token.type == TokenType.LBRACKET:
+                    self.advance()
+                    groups.append(['index', len(operators), token.line, token.value, None, False])
+                    continue
+                elif self.current_token.type == TokenType.DOT:
+                    self.advance()
+                    method = self.expect(TokenType.IDENTIFIER).value
+                    self.expect(TokenType.LPAREN)
+                    function = f"{token.value}.{method}"
+                    if self.current_token.type != TokenType.RPAREN:
+                        groups.append(['call', len(operators), token.line, function, [], False])
+                        continue
+                    self.advance()
+                    values.append(nodes.call(function, [], token.line))
+                else:
+                    values.append(nodes.identifier(token.value, token.line))
+            elif token_type == TokenType.LBRACKET:
+                self.advance()
+                if self.current_token.type != TokenType.RBRACKET:
+                    groups.append(['list', len(operators), token.line, None, [], False])
+                    continue
+                self.advance()
+                values.append(nodes.list_literal([], token.line))
+            elif token_type == TokenType.LPAREN:
+                self.advance()
+                groups.append(['paren', len(operators), token.line, None, None, False])
+                continue
+            elif token_type in (TokenType.RANGE, TokenType.LEN):
+                self.advance()
+                self.expect(TokenType.LPAREN)
+                if self.current_token.type != TokenType.RPAREN:
+                    groups.append(['call', len(operators), token.line, token.value, [], False])
+                    continue
+                self.advance()
+                values.append(nodes.call(token.value, [], token.line))
+            else:
+                self.error(f"Token inesperado en expresión: {token}")
+            
+            # ----- Posición de operador: binarios o cierre de grupos -----
+            while True:
+                group = groups[-1]
+                token = self.current_token
+                entry = BINARY_OPERATORS.get(token.type)
+                if entry is not None and not (entry[1] == 'none' and group[5]):
+                    precedence, associativity = entry
+                    reduce_to(group[1], precedence, associativity)
+                    if associativity == 'none':
+                        group[5] = True
+                    operators.append((precedence, associativity, token.value, token.line))
+                    self.advance()
+                    break
+                
+                reduce_to(group[1])
+                kind = group[0]
+                if kind == 'expr':
+                    return values.pop()
+                if kind in ('list', 'call') and token.type == TokenType.COMMA:
+                    group[4].append(values.pop())
+                    group[5] = False
+                    self.advance()
+                    break
+                groups.pop()
+                if kind == 'paren':
+                    self.expect(TokenType.RPAREN)
+                elif kind == 'index':
+                    self.expect(TokenType.RBRACKET)
+                    values.append(nodes.index(nodes.identifier(group[3], group[2]), values.pop(), group[2]))
+                elif kind == 'list':
+                    group[4].append(values.pop())
+                    self.expect(TokenType.RBRACKET)
+                    values.append(nodes.list_literal(group[4], group[2]))
+                else:
+                    group[4].append(values.pop())
+                    self.expect(TokenType.RPAREN)
+                    values.append(nodes.call(group[3], group[4], group[2]))
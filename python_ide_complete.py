@@ -78,6 +78,7 @@ class PythonCompilerIDE:
         self.style.theme_use('clam')
         
         # Datos de compilación
+        self.lexer = None  # Se conserva para re-analizar solo las líneas editadas
         self.tokens = []
         self.ast = None
         self.semantic_analyzer = None
@@ -535,11 +536,11 @@ class PythonCompilerIDE:
         )
         self.lr_parser_text.pack(fill=tk.BOTH, expand=True)
         
-        # Generar y mostrar tabla LR
+        # Mostrar tabla LR (compartida en el proceso y guardada en la caché de tablas)
         lr_parser = LRParser()
         content = lr_parser.print_parsing_table()
         content += "\n\n" + "=" * 100 + "\n"
-        content += "NOTA: Esta es la tabla LR(1) con autómata de pila explícito\n"
+        content += "NOTA: Esta es la tabla LALR(1) con autómata de pila explícito\n"
         content += "Completa el Punto 8: Autómatas de Pila para Análisis Sintáctico\n"
         content += "=" * 100 + "\n"
         
@@ -607,14 +608,22 @@ class PythonCompilerIDE:
         self.root.update()
         
         try:
-            # Fase 1: Análisis Léxico
-            lexer = Lexer(source_code)
-            self.tokens = lexer.tokenize()
+            # Fase 1: Análisis Léxico (incremental sobre el análisis anterior)
+            previous_ast = self.ast if self.lexer is not None else None
+            self.ast = None
+            if self.lexer is not None:
+                self.tokens = self.lexer.relex(source_code)
+            else:
+                self.lexer = Lexer(source_code)
+                self.tokens = self.lexer.tokenize()
             self.display_lexical_analysis()
             
-            # Fase 2: Análisis Sintáctico
+            # Fase 2: Análisis Sintáctico (reutiliza las sentencias no editadas)
             parser = Parser(self.tokens)
-            self.ast = parser.parse()
+            if previous_ast is not None:
+                self.ast = parser.reparse(previous_ast, self.lexer.last_edit)
+            else:
+                self.ast = parser.parse()
             self.display_syntax_analysis()
             
             # Fase 3: Análisis Semántico
@@ -657,6 +666,7 @@ class PythonCompilerIDE:
             )
             
         except LexerError as e:
+            self.lexer = None
             messagebox.showerror("Error Léxico", str(e))
             self.status_bar.config(text=f"❌ Error léxico", bg=COLORS['accent_red'])
         except ParserError as e:
@@ -19,6 +19,7 @@ class SemanticAnalyzer:
         self.errors = []
         self.warnings = []
         self.current_scope = 'global'
+        self.current_line = 0  # Línea del último nodo visitado que tiene línea propia
     
     def error(self, message, line=0):
         """Registra un error semántico"""
@@ -50,7 +51,7 @@ class SemanticAnalyzer:
                 return 'bool'
             
             # Operaciones aritméticas
-            if node.operator in ['+', '-', '*', '/', '%']:
+            if node.operator in ['+', '-', '*', '/', '%', '**']:
                 # Si alguno es float, el resultado es float
                 if left_type == 'float' or right_type == 'float':
                     return 'float'
@@ -75,7 +76,7 @@ class SemanticAnalyzer:
     def check_type_compatibility(self, left_type, operator, right_type, line=0):
         """Verifica compatibilidad de tipos en una operación"""
         # Operadores aritméticos
-        if operator in ['+', '-', '*', '/', '%']:
+        if operator in ['+', '-', '*', '/', '%', '**']:
             # Suma de strings está permitida (concatenación)
             if operator == '+' and (left_type == 'str' or right_type == 'str'):
                 if left_type != 'str' or right_type != 'str':
@@ -134,8 +135,30 @@ class SemanticAnalyzer:
         self.visit(ast)
         return len(self.errors) == 0
     
+    def analyze_statement(self, statement):
+        """
+        Analiza una sentencia de nivel superior (Parser.iter_statements),
+        conservando la tabla de símbolos de las anteriores
+        
+        Returns:
+            True si la sentencia no agregó errores
+        """
+        errors = len(self.errors)
+        self.visit(statement)
+        return len(self.errors) == errors
+    
+    def line_of(self, node):
+        """
+        Línea de un nodo de expresión; los nodos compartidos de
+        HashConsingFactory (line = 0) toman la de la sentencia que los contiene
+        """
+        return node.line or self.current_line
+    
     def visit(self, node):
         """Visita un nodo del AST"""
+        line = getattr(node, 'line', 0)
+        if line:
+            self.current_line = line
         method_name = f'visit_{node.__class__.__name__}'
         visitor = getattr(self, method_name, self.generic_visit)
         return visitor(node)
@@ -243,7 +266,7 @@ class SemanticAnalyzer:
         
         # Verificar compatibilidad
         if left_type != 'unknown' and right_type != 'unknown':
-            self.check_type_compatibility(left_type, node.operator, right_type, node.line)
+            self.check_type_compatibility(left_type, node.operator, right_type, self.line_of(node))
     
     def visit_UnaryOpNode(self, node):
         """Visita una operación unaria"""
@@ -254,7 +277,7 @@ class SemanticAnalyzer:
             if operand_type not in ['int', 'float', 'unknown']:
                 self.error(
                     f"El operador '-' requiere un operando numérico, se encontró '{operand_type}'",
-                    node.line
+                    self.line_of(node)
                 )
     
     def visit_IdentifierNode(self, node):
@@ -262,12 +285,12 @@ class SemanticAnalyzer:
         if node.name not in self.symbol_table:
             self.error(
                 f"Variable '{node.name}' no está declarada antes de usarse",
-                node.line
+                self.line_of(node)
             )
         elif not self.symbol_table[node.name]['initialized']:
             self.warning(
                 f"Variable '{node.name}' podría no estar inicializada",
-                node.line
+                self.line_of(node)
             )
     
     def visit_NumberNode(self, node):
@@ -294,13 +317,13 @@ class SemanticAnalyzer:
         if list_type not in ['list', 'unknown']:
             self.error(
                 f"El acceso por índice requiere una lista, se encontró '{list_type}'",
-                node.line
+                self.line_of(node)
             )
         
         if index_type not in ['int', 'unknown']:
             self.error(
                 f"El índice debe ser un entero, se encontró '{index_type}'",
-                node.line
+                self.line_of(node)
             )
     
     def visit_CallNode(self, node):
@@ -318,7 +341,7 @@ class SemanticAnalyzer:
                 if arg_type not in ['int', 'unknown']:
                     self.error(
                         f"range() requiere un argumento entero, se encontró '{arg_type}'",
-                        node.line
+                        self.line_of(node)
                     )
         elif node.function == 'len':
             if len(node.args) != 1:
@@ -328,7 +351,7 @@ class SemanticAnalyzer:
                 if arg_type not in ['list', 'str', 'unknown']:
                     self.error(
                         f"len() requiere una lista o string, se encontró '{arg_type}'",
-                        node.line
+                        self.line_of(node)
                     )
     
     def visit_BlockNode(self, node):
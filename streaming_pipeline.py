@@ -0,0 +1,73 @@
+"""
+Compilación y Ejecución en Streaming
+Lleva cada sentencia de nivel superior por todas las fases (sintáctico,
+semántico, TAC y ejecución) antes de analizar la siguiente, de modo que la
+primera salida aparece sin esperar a compilar el programa completo
+"""
+
+from python_compiler import Lexer, Parser
+from semantic_analyzer import SemanticAnalyzer, SemanticError
+from tac_generator import TACGenerator
+from tac_interpreter import TACInterpreter
+
+
+class StreamingPipeline:
+    """
+    Pipeline sentencia a sentencia: Lexer.iter_tokens → Parser.iter_statements
+    → SemanticAnalyzer.analyze_statement → TACGenerator.generate_statement →
+    TACInterpreter.execute
+
+    No aplica TACOptimizer: sus optimizaciones (propagación de constantes,
+    eliminación de código muerto) necesitan ver el programa completo. La
+    salida ya entregada no se retiene, así que la memoria queda acotada por
+    la sentencia más grande y las variables del programa.
+    """
+
+    def __init__(self, source, mode: str = 'recursive'):
+        self.source = source
+        self.mode = mode
+        self.semantic_analyzer = SemanticAnalyzer()
+        self.tac_generator = TACGenerator()
+        self.interpreter = TACInterpreter()
+        self.statements = 0
+
+    def run(self):
+        """
+        Genera las líneas de salida del programa a medida que se ejecutan
+
+        Raises:
+            LexerError, ParserError: al llegar a la sentencia con el error
+            SemanticError: si una sentencia tiene errores semánticos; las
+                sentencias anteriores ya se ejecutaron
+        """
+        parser = Parser(Lexer(self.source).iter_tokens(), self.mode)
+        for statement in parser.iter_statements():
+            self.statements += 1
+            if not self.semantic_analyzer.analyze_statement(statement):
+                raise SemanticError('\n'.join(self.semantic_analyzer.errors))
+            instructions = self.tac_generator.generate_statement(statement)
+            yield from self.interpreter.execute(instructions)
+            self.interpreter.output.clear()
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    code = """
+# Programa de prueba
+x = 10
+print(x)
+y = 0
+while y < 3:
+    print(y)
+    y = y + 1
+if x > y:
+    print("x es mayor")
+"""
+
+    print("=" * 80)
+    print("PIPELINE EN STREAMING")
+    print("=" * 80)
+    pipeline = StreamingPipeline(code)
+    for line in pipeline.run():
+        print(f"  > {line}")
+    print(f"Sentencias procesadas: {pipeline.statements}")
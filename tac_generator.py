@@ -17,9 +17,9 @@ class TACInstruction:
     def __str__(self):
         if self.op == 'ASSIGN':
             return f"{self.result} = {self.arg1}"
-        elif self.op in ['ADD', 'SUB', 'MUL', 'DIV', 'MOD']:
+        elif self.op in ['ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'POW']:
             op_symbol = {
-                'ADD': '+', 'SUB': '-', 'MUL': '*', 'DIV': '/', 'MOD': '%'
+                'ADD': '+', 'SUB': '-', 'MUL': '*', 'DIV': '/', 'MOD': '%', 'POW': '**'
             }[self.op]
             return f"{self.result} = {self.arg1} {op_symbol} {self.arg2}"
         elif self.op in ['EQ', 'NEQ', 'LT', 'GT', 'LTE', 'GTE']:
@@ -81,6 +81,18 @@ class TACGenerator:
         self.visit(ast)
         return self.instructions
     
+    def generate_statement(self, statement):
+        """
+        Genera el TAC de una sola sentencia de nivel superior
+        
+        Los contadores de temporales y etiquetas continúan entre llamadas, así
+        que los fragmentos no colisionan; `instructions` queda solo con las
+        de esta sentencia, que es lo que se retorna.
+        """
+        self.instructions = []
+        self.visit(statement)
+        return self.instructions
+    
     def visit(self, node):
         method_name = f'visit_{node.__class__.__name__}'
         visitor = getattr(self, method_name, self.generic_visit)
@@ -187,7 +199,7 @@ class TACGenerator:
         temp = self.new_temp()
         
         op_map = {
-            '+': 'ADD', '-': 'SUB', '*': 'MUL', '/': 'DIV', '%': 'MOD',
+            '+': 'ADD', '-': 'SUB', '*': 'MUL', '/': 'DIV', '%': 'MOD', '**': 'POW',
             '==': 'EQ', '!=': 'NEQ', '<': 'LT', '>': 'GT', '<=': 'LTE', '>=': 'GTE'
         }
         
@@ -15,12 +15,32 @@ class TACInterpreter:
         self.pc = 0
         self.labels = {}
     
-    def interpret(self, instructions):
-        """Ejecuta las instrucciones TAC"""
+    def reset(self):
+        """Descarta las variables y la salida de ejecuciones anteriores"""
         self.variables = {}
         self.output = []
         self.pc = 0
         self.labels = {}
+    
+    def interpret(self, instructions):
+        """Ejecuta las instrucciones TAC"""
+        self.reset()
+        self.execute(instructions)
+        return '\n'.join(self.output)
+    
+    def execute(self, instructions):
+        """
+        Ejecuta un fragmento de TAC (p. ej. el de una sentencia, de
+        TACGenerator.generate_statement) sobre las variables actuales
+        
+        Los saltos de un fragmento solo pueden ir a sus propias etiquetas.
+        
+        Returns:
+            Las líneas de salida que produjo el fragmento
+        """
+        first_output = len(self.output)
+        self.pc = 0
+        self.labels = {}
         
         for i, instr in enumerate(instructions):
             if instr.op == 'LABEL':
@@ -31,7 +51,7 @@ class TACInterpreter:
             self.execute_instruction(instr)
             self.pc += 1
         
-        return '\n'.join(self.output)
+        return self.output[first_output:]
     
     def execute_instruction(self, instr):
         """Ejecuta una instrucción individual"""
@@ -69,6 +89,13 @@ class TACInterpreter:
                 raise Exception("Error de ejecución: Módulo por cero")
             self.variables[instr.result] = left % right
         
+        elif instr.op == 'POW':
+            left = self.get_value(instr.arg1)
+            right = self.get_value(instr.arg2)
+            if left == 0 and right < 0:
+                raise Exception("Error de ejecución: Potencia negativa de cero")
+            self.variables[instr.result] = left ** right
+        
         elif instr.op == 'NEG':
             value = self.get_value(instr.arg1)
             self.variables[instr.result] = -value
@@ -42,7 +42,7 @@ class TACOptimizer:
         optimized = []
         
         for instr in instructions:
-            if instr.op in ['ADD', 'SUB', 'MUL', 'DIV', 'MOD']:
+            if instr.op in ['ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'POW']:
                 try:
                     left = self._parse_number(instr.arg1)
                     right = self._parse_number(instr.arg2)
@@ -59,6 +59,8 @@ class TACOptimizer:
                             result = left / right
                         elif instr.op == 'MOD' and right != 0:
                             result = left % right
+                        elif instr.op == 'POW' and abs(right) <= 64 and (left != 0 or right >= 0):
+                            result = left ** right
                         
                         if result is not None:
                             optimized.append(TACInstruction('ASSIGN', str(result), None, instr.result))
@@ -87,7 +89,7 @@ class TACOptimizer:
             new_instr = self._replace_with_constants(instr, constants)
             optimized.append(new_instr)
             
-            if instr.op in ['ASSIGN', 'ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'NEG']:
+            if instr.op in ['ASSIGN', 'ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'POW', 'NEG']:
                 if instr.result in constants:
                     del constants[instr.result]
         
@@ -120,7 +122,7 @@ class TACOptimizer:
                         used_vars.add(instr.arg1)
                         changed = True
                 
-                if instr.op in ['ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'EQ', 'NEQ', 'LT', 'GT', 'LTE', 'GTE']:
+                if instr.op in ['ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'POW', 'EQ', 'NEQ', 'LT', 'GT', 'LTE', 'GTE']:
                     if instr.result in used_vars:
                         if instr.arg1 and instr.arg1 not in used_vars:
                             used_vars.add(instr.arg1)
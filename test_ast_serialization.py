@@ -0,0 +1,241 @@
+"""
+Pruebas de la Serialización Binaria del AST
+Ida y vuelta load_ast(dump_ast(árbol)) con todas las clases de nodo, vistas
+de ASTArena y árboles con nodos compartidos, y rechazo de datos truncados o
+corruptos
+
+Ejecutar con: python -m pytest test_ast_serialization.py
+(o python -m unittest test_ast_serialization)
+"""
+
+import unittest
+
+from ast_serialization import AST_FORMAT_VERSION, ASTFormatError, dump_ast, load_ast
+from python_compiler import (ASTArena, ASTNode, AST_NODE_CLASSES, BinaryOpNode, BlockNode, CallNode,
+                             HashConsingFactory, IdentifierNode, IfNode, Lexer, ListNode, NumberNode,
+                             Parser, PrintNode, ProgramNode, StringNode, UnaryOpNode)
+
+
+# Programa que usa todas las clases de AST_NODE_CLASSES
+CODE = """
+x = 10
+y = -x + 2.5 * (x - 1)
+lista = [1, "dos", 3.0, []]
+lista[0] = lista[1]
+texto = "ñandú ✓ \\"citado\\""
+if x >= 5:
+    print("mayor")
+elif x < 0:
+    print(-x)
+else:
+    pass_count = 0
+while x > 0:
+    x = x - 1
+for i in range(len(lista)):
+    print(lista[i] % 3)
+lista.agregar(y * 2, "fin")
+"""
+
+
+def structure(value):
+    """Representación comparable: clase, campos y metadatos de posición, recursiva"""
+    if isinstance(value, ASTNode):
+        return (type(value).__name__,) + tuple(
+            (name, structure(getattr(value, name, None)))
+            for name in value._fields + ('line', 'span', 'end_line'))
+    if isinstance(value, list):
+        return [structure(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(structure(item) for item in value)
+    # La clase es parte del valor: 1, 1.0 y True no se confunden
+    return (value.__class__, value)
+
+
+def walk(value):
+    """Todos los nodos de un árbol, en preorden"""
+    pending = [value]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, ASTNode):
+            yield value
+            pending.extend(getattr(value, name) for name in reversed(value._fields))
+        elif isinstance(value, (list, tuple)):
+            pending.extend(reversed(value))
+
+
+def node_class_of(node):
+    """Clase de AST_NODE_CLASSES de un nodo (sus variantes Statement y vistas de arena son subclases)"""
+    return next(base for base in type(node).__mro__ if base in AST_NODE_CLASSES)
+
+
+def parse(code=CODE, factory=None):
+    return Parser(Lexer(code).tokenize(), factory=factory).parse()
+
+
+class RoundTripTest(unittest.TestCase):
+
+    def assertRoundTrip(self, tree):
+        data = dump_ast(tree)
+        loaded = load_ast(data)
+        self.assertEqual(structure(loaded), structure(tree))
+        self.assertEqual(dump_ast(loaded), data)
+        return loaded
+
+    def test_program_covers_every_node_class(self):
+        classes = {node_class_of(node) for node in walk(parse())}
+        self.assertEqual(classes, set(AST_NODE_CLASSES))
+
+    def test_expression_statements_keep_their_class(self):
+        statement = parse().statements[-1]
+        self.assertIs(type(statement), CallNode.Statement)
+        loaded = self.assertRoundTrip(statement)
+        self.assertIs(type(loaded), CallNode.Statement)
+        self.assertEqual(loaded.span, statement.span)
+        # Sin span, la misma expresión se carga con la clase base
+        self.assertIs(type(load_ast(dump_ast(CallNode('len', (), 1)))), CallNode)
+
+    def test_parsed_program(self):
+        loaded = self.assertRoundTrip(parse())
+        self.assertIsInstance(loaded, ProgramNode)
+        self.assertEqual(loaded.end_line, parse().end_line)
+
+    def test_every_node_class_as_root(self):
+        roots = {}
+        for node in walk(parse()):
+            roots.setdefault(type(node), node)
+        self.assertTrue(set(AST_NODE_CLASSES) <= set(roots))
+        for node_class, node in roots.items():
+            with self.subTest(node_class=node_class.__qualname__):
+                loaded = self.assertRoundTrip(node)
+                self.assertIs(type(loaded), node_class)
+
+    def test_every_node_in_the_tree(self):
+        for node in walk(parse()):
+            with self.subTest(node=type(node).__name__, line=getattr(node, 'line', None)):
+                self.assertRoundTrip(node)
+
+    def test_hand_built_values(self):
+        tree = ProgramNode([
+            PrintNode(NumberNode(2 ** 70, 1), 1),
+            PrintNode(UnaryOpNode('-', NumberNode(-2 ** 63, 2), 2), 2),
+            PrintNode(NumberNode(float('inf'), 3), 3),
+            PrintNode(NumberNode(True, 4), 4),
+            PrintNode(StringNode('', 5), 5),
+            PrintNode(StringNode('\ud800 surrogate', 6), 6),
+            PrintNode(ListNode([], 7), 7),
+            IfNode(IdentifierNode('x', 8), BlockNode([]), [], None, 8),
+            PrintNode(CallNode('f', (), 9), 9),
+        ])
+        tree.end_line = 9
+        self.assertRoundTrip(tree)
+
+    def test_nodes_without_span_or_end_line(self):
+        tree = ProgramNode([PrintNode(BinaryOpNode(NumberNode(1, 3), '+', NumberNode(2, 3), 3), 3)])
+        loaded = self.assertRoundTrip(tree)
+        self.assertIsNone(getattr(loaded, 'span', None))
+        self.assertIsNone(getattr(loaded, 'end_line', None))
+
+    def test_deep_tree(self):
+        # Más profundo que el límite de recursión de Python
+        expression = NumberNode(0, 1)
+        for value in range(1, 5000):
+            expression = BinaryOpNode(expression, '+', NumberNode(value, 1), 1)
+        tree = ProgramNode([PrintNode(expression, 1)])
+        data = dump_ast(tree)
+        loaded = load_ast(data)
+        self.assertEqual(dump_ast(loaded), data)
+        self.assertEqual(sum(1 for _ in walk(loaded)), sum(1 for _ in walk(tree)))
+
+    def test_arena_views(self):
+        tree = parse()
+        arena = ASTArena.from_ast(tree)
+        data = dump_ast(arena.root)
+        self.assertEqual(data, dump_ast(tree))
+        self.assertEqual(structure(load_ast(data)), structure(tree))
+        for node in range(len(arena)):
+            view = arena.node(node)
+            with self.subTest(node=node, kind=type(view).__name__):
+                loaded = load_ast(dump_ast(view))
+                self.assertEqual(structure(loaded), structure(view))
+                self.assertIs(node_class_of(loaded), node_class_of(view))
+
+    def test_arena_round_trip_back_to_arena(self):
+        tree = parse()
+        arena = ASTArena.from_ast(load_ast(dump_ast(ASTArena.from_ast(tree).root)))
+        self.assertEqual(structure(arena.to_ast()), structure(tree))
+
+    def test_hash_consed_tree(self):
+        code = CODE + "z = x * 2 + x * 2\nprint(x * 2)\n"
+        factory = HashConsingFactory()
+        tree = parse(code, factory)
+        self.assertGreater(factory.stats()['reused'], 0)
+        loaded = self.assertRoundTrip(tree)
+        self.assertEqual(sum(1 for _ in walk(loaded)), sum(1 for _ in walk(parse(code))))
+
+    def test_hash_consed_nodes_are_copied(self):
+        factory = HashConsingFactory()
+        tree = parse("a = x * 2\nb = x * 2\n", factory)
+        first, second = tree.statements
+        self.assertIs(first.expression, second.expression)
+        loaded = self.assertRoundTrip(tree)
+        self.assertIsNot(loaded.statements[0].expression, loaded.statements[1].expression)
+
+
+class RejectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = dump_ast(parse())
+
+    def test_every_truncation(self):
+        for size in range(len(self.data)):
+            with self.subTest(size=size):
+                with self.assertRaises(ASTFormatError):
+                    load_ast(self.data[:size])
+
+    def test_trailing_data(self):
+        with self.assertRaises(ASTFormatError):
+            load_ast(self.data + b'\x40')
+
+    def test_bad_magic(self):
+        with self.assertRaises(ASTFormatError):
+            load_ast(b'XAST' + self.data[4:])
+
+    def test_unknown_version(self):
+        with self.assertRaises(ASTFormatError):
+            load_ast(self.data[:4] + bytes([AST_FORMAT_VERSION + 1]) + self.data[5:])
+
+    def test_unknown_tag(self):
+        data = dump_ast(NumberNode(1, 1))
+        body = data.index(bytes([AST_NODE_CLASSES.index(NumberNode)]), 5)
+        with self.assertRaises(ASTFormatError):
+            load_ast(data[:body] + b'\xff' + data[body + 1:])
+
+    def test_string_index_out_of_table(self):
+        data = bytearray(dump_ast(StringNode('hola', 1)))
+        # Último byte: índice 0 del literal
+        data[-1] = 5
+        with self.assertRaises(ASTFormatError):
+            load_ast(bytes(data))
+
+    def test_invalid_utf8_in_table(self):
+        data = bytearray(dump_ast(parse('x = "hola"\n')))
+        data[data.index(b'hola')] = 0xff
+        with self.assertRaises(ASTFormatError):
+            load_ast(bytes(data))
+
+    def test_corrupt_bytes_raise_only_format_errors(self):
+        # Cada byte reemplazado por varios valores: o se rechaza con
+        # ASTFormatError o se obtiene algún AST, nunca otra excepción
+        data = dump_ast(parse("x = [1, 'a', 2.5]\nif x:\n    print(-x[0])\nx.agregar(len(x))\n"))
+        for position in range(len(data)):
+            for byte in (0x00, 0x01, 0x0e, 0x3f, 0x40, 0x47, 0x48, 0x7f, 0x80, 0xff):
+                corrupt = data[:position] + bytes([byte]) + data[position + 1:]
+                with self.subTest(position=position, byte=byte):
+                    try:
+                        load_ast(corrupt)
+                    except ASTFormatError:
+                        pass
+
+
+if __name__ == "__main__":
+    unittest.main()
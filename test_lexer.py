@@ -0,0 +1,220 @@
+"""
+Pruebas del Lexer
+Motores 'regex', 'char' y de bytes UTF-8 sobre las mismas fuentes, y
+re-análisis incremental (Lexer.relex) frente a un Lexer.tokenize completo
+de la nueva fuente: tipos, valores, offsets, líneas y columnas, y el rango
+reemplazado que queda en last_edit
+
+Ejecutar con: python -m pytest test_lexer.py
+(o python -m unittest test_lexer)
+"""
+
+import random
+import unittest
+
+from python_compiler import Lexer, LEXER_ENGINES, LexerError
+
+
+# Indentación anidada, strings que abarcan varias líneas, líneas en blanco
+# y de solo comentario entre sentencias
+CODE = """# encabezado
+x = 10
+texto = "una
+dos
+tres"
+if x >= 5:
+    print("mayor")
+
+    # comentario dentro del bloque
+    while x > 0:
+        x = x - 1
+        lista[0] = 'a
+b'
+elif x < 0:
+    print(-x)
+else:
+    z = 0
+for i in range(len(lista)):
+    print(lista[i] % 3)
+fin = 2.5 ** 2
+"""
+
+# Fragmentos que insertan las ediciones aleatorias
+FRAGMENTS = ['\n', '\n\n', ' ', '    ', '\t', 'x', 'valor', '1.5', '"', "'", '\\', '#', '# nota\n',
+             '(', ')', ':', '=', '**', 'if a:\n    ', 'while b:\n        c = 1\n', '"uno\ndos"', 'ñ']
+
+
+def described(tokens):
+    """Tipo, valor, offset, línea y columna de cada token"""
+    return [(token.type, token.value, token.offset, token.line, token.column) for token in tokens]
+
+
+def tokens_or_error(source, engine='regex'):
+    try:
+        return described(Lexer(source, engine).tokenize())
+    except LexerError:
+        return None
+
+
+class EnginesTest(unittest.TestCase):
+
+    def results(self, source):
+        """Tokens o mensaje de error de cada motor, y del motor 'regex' sobre bytes UTF-8"""
+        results = {}
+        for engine, text in [(engine, source) for engine in LEXER_ENGINES] + [('bytes', source.encode('utf-8'))]:
+            try:
+                tokens = Lexer(text, 'regex' if engine == 'bytes' else engine).tokenize()
+                results[engine] = [(token.type, token.value, token.line, token.column) for token in tokens]
+            except LexerError as error:
+                results[engine] = str(error)
+        return results
+
+    def assertSameInEveryEngine(self, source):
+        results = self.results(source)
+        for engine, result in results.items():
+            with self.subTest(source=source, engine=engine):
+                self.assertEqual(result, results['regex'])
+        return results['regex']
+
+    def test_program(self):
+        self.assertIsInstance(self.assertSameInEveryEngine(CODE), list)
+
+    def test_only_ascii_digits_start_a_number(self):
+        # str.isdigit() y \d aceptan superíndices y dígitos de otras
+        # escrituras; ningún motor los toma como número ni como identificador
+        for char in '²½Ⅻ١':
+            for source in (f"x = {char}\n", f"x = {char}2\n", f"{char} = 1\n", f"y = 1{char}\n"):
+                result = self.assertSameInEveryEngine(source)
+                self.assertEqual(result[-len("Carácter inesperado: 'c'"):], f"Carácter inesperado: '{char}'")
+
+    def test_identifiers_and_numbers(self):
+        for source in ("x² = 1\n", "ñandú = _x1\n", "v١ = 3.25\n", "x = 3.4.5\n", "x = 1.\n", "n = 007\n"):
+            self.assertSameInEveryEngine(source)
+        self.assertEqual(self.assertSameInEveryEngine("x² = 1\n")[0][1], 'x²')
+
+
+class RelexTest(unittest.TestCase):
+
+    def assertRelex(self, lexer, new_source, *lines):
+        """relex() coincide con tokenize() de la nueva fuente y last_edit describe el empalme"""
+        old_source = lexer.source
+        old = described(lexer.tokens)
+        expected = tokens_or_error(new_source, lexer.engine)
+        if expected is None:
+            # Un error deja el Lexer como antes de la edición
+            with self.assertRaises(LexerError):
+                lexer.relex(new_source, *lines)
+            self.assertEqual(lexer.source, old_source)
+            self.assertEqual(described(lexer.tokens), old)
+            return False
+
+        tokens = lexer.relex(new_source, *lines)
+        self.assertIs(tokens, lexer.tokens)
+        self.assertEqual(described(tokens), expected)
+        self.assertEqual(lexer.source, new_source)
+
+        head, old_end, new_end = lexer.last_edit
+        self.assertTrue(0 <= head <= old_end <= len(old))
+        self.assertTrue(head <= new_end <= len(tokens))
+        self.assertEqual(len(old) - old_end, len(tokens) - new_end)
+        # Antes del empalme los tokens no cambian; después, solo se desplazan
+        self.assertEqual(old[:head], expected[:head])
+        delta = len(new_source) - len(old_source)
+        self.assertEqual([(kind, value, offset + delta) for kind, value, offset, _, _ in old[old_end:]],
+                         [(kind, value, offset) for kind, value, offset, _, _ in expected[new_end:]])
+        return True
+
+    def lexer(self, source=CODE, engine='regex'):
+        lexer = Lexer(source, engine)
+        lexer.tokenize()
+        return lexer
+
+    def test_unchanged_source(self):
+        lexer = self.lexer()
+        self.assertRelex(lexer, CODE)
+        self.assertEqual(lexer.last_edit, (len(lexer.tokens),) * 3)
+
+    def test_edit_inside_a_line(self):
+        lexer = self.lexer()
+        self.assertRelex(lexer, CODE.replace("x = x - 1", "x = x - 100"))
+        head, old_end, new_end = lexer.last_edit
+        # Solo se re-analiza la línea editada
+        self.assertLess(new_end - head, 8)
+
+    def test_indentation_changes(self):
+        for old, new in (("    print(-x)", "print(-x)"), ("        x = x - 1", "    x = x - 1"),
+                         ("else:\n    z = 0", "else:\n        z = 0"), ("    print(\"mayor\")", "\tprint(\"mayor\")"),
+                         ("fin = 2.5 ** 2", "    fin = 2.5 ** 2")):
+            with self.subTest(new=new):
+                self.assertRelex(self.lexer(), CODE.replace(old, new))
+
+    def test_edits_inside_multiline_strings(self):
+        for old, new in (("dos\n", "dos y más\n"), ("una\n", "una\"\n"), ("tres\"", "tres"),
+                         ("'a\nb'", "'a\nb"), ("texto = \"una", "texto = una"), ("b'\n", "b'\nc = 'd\n")):
+            with self.subTest(old=old, new=new):
+                self.assertRelex(self.lexer(), CODE.replace(old, new, 1))
+
+    def test_blank_and_comment_lines(self):
+        for old, new in (("\n\n    # comentario", "\n    # comentario"), ("# comentario dentro", "comentario dentro"),
+                         ("mayor\")\n", "mayor\")\n\n\n"), ("# encabezado\n", "")):
+            with self.subTest(old=old, new=new):
+                self.assertRelex(self.lexer(), CODE.replace(old, new, 1))
+
+    def test_first_and_last_line(self):
+        for new in ("y = 1\n" + CODE, CODE[CODE.index("\n") + 1:], "x" + CODE, CODE + "extra = 1\n",
+                    CODE.rstrip("\n"), CODE[:CODE.index("fin")], CODE + "    mal = 1\n"):
+            with self.subTest(new=new[:12] + "..." + new[-12:]):
+                self.assertRelex(self.lexer(), new)
+
+    def test_delete_everything_and_start_again(self):
+        lexer = self.lexer()
+        self.assertRelex(lexer, "")
+        self.assertRelex(lexer, "x = 1\n")
+        self.assertRelex(lexer, "# solo un comentario\n")
+        self.assertRelex(lexer, CODE)
+
+    def test_explicit_line_range(self):
+        lexer = self.lexer()
+        new = CODE.replace("x = 10", "x = 10\ny = 20")
+        self.assertRelex(lexer, new, 2, 2, 3)
+
+    def test_lexer_error_keeps_previous_state(self):
+        for source, engine in ((CODE, 'regex'), ("", 'regex'), ("# c\n", 'regex'), (CODE, 'char')):
+            with self.subTest(source=source[:12], engine=engine):
+                lexer = self.lexer(source, engine)
+                self.assertFalse(self.assertRelex(lexer, source + "x = $\n"))
+                # Y sigue sirviendo para la próxima edición
+                self.assertTrue(self.assertRelex(lexer, source + "y = 1\n"))
+
+    def test_char_engine(self):
+        lexer = self.lexer(engine='char')
+        self.assertRelex(lexer, CODE.replace("x = 10", "x = 11"))
+        self.assertEqual(lexer.last_edit[0], 0)
+
+    def test_old_tokens_follow_the_edits(self):
+        # Los tokens posteriores a la edición no se recrean: trasladan su
+        # offset por la cadena de LineIndex cuando se consulta
+        lexer = self.lexer()
+        last = lexer.tokens[-2]
+        for _ in range(5):
+            self.assertRelex(lexer, "nueva = 1\n" + lexer.source)
+        self.assertIs(lexer.tokens[-2], last)
+        self.assertEqual(last.line, CODE.count("\n") + 5)
+
+    def test_random_edit_sequences(self):
+        rng = random.Random(2024)
+        for sequence in range(60):
+            lexer = self.lexer()
+            source = CODE
+            for step in range(25):
+                start = rng.randint(0, len(source))
+                end = min(len(source), start + rng.choice((0, 0, 1, 2, 5, 20)))
+                inserted = ''.join(rng.choice(FRAGMENTS) for _ in range(rng.choice((0, 1, 1, 2))))
+                new = source[:start] + inserted + source[end:]
+                with self.subTest(sequence=sequence, step=step):
+                    if self.assertRelex(lexer, new):
+                        source = new
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,259 @@
+"""
+Pruebas del Parser LR
+Caché de tablas en disco: tablas truncadas, corruptas o fuera de rango se
+rechazan y se regeneran, y las tablas cargadas analizan igual que las
+recién construidas. Contextos de análisis: cada hilo consulta la traza y la
+pila de su propio análisis
+
+Ejecutar con: python -m pytest test_lr_parser.py
+(o python -m unittest test_lr_parser)
+"""
+
+import os
+import random
+import stat
+import tempfile
+import unittest
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import lr_parser
+from ast_serialization import dump_ast
+from lr_parser import (LR_TABLES_SUFFIX, LRParser, LRTableCacheError, dump_lr_tables, grammar_hash,
+                       load_lr_tables, shared_lr_tables)
+from python_compiler import HashConsingFactory, Lexer, Parser
+
+
+CODE = """x = 10
+y = -x + 2.5 * (x - 1) ** 2 ** 3
+lista = [1, "dos", 3.0]
+lista[0] = lista[1]
+if x >= 5:
+    print("mayor")
+elif x < 0:
+    print(-x)
+else:
+    while x > 0:
+        x = x - 1
+for i in range(len(lista)):
+    lista.agregar(i % 3)
+"""
+
+
+def forget_shared(digest):
+    """Descarta las tablas compartidas en memoria para obligar a leer el disco"""
+    with lr_parser._SHARED_TABLES_LOCK:
+        lr_parser._SHARED_TABLES.pop(digest, None)
+
+
+class LRTableCacheTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.productions = LRParser(table_cache=None).productions
+        cls.digest = grammar_hash(cls.productions)
+        cls.data = dump_lr_tables(LRParser(table_cache=None).tables, cls.digest)
+
+    def setUp(self):
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.directory = os.path.join(temporary.name, 'lr-tables')
+        self.path = os.path.join(self.directory, self.digest.hex() + LR_TABLES_SUFFIX)
+        forget_shared(self.digest)
+        self.addCleanup(forget_shared, self.digest)
+
+    def load(self, data):
+        return load_lr_tables(data, self.digest, self.productions)
+
+    def cached_parser(self):
+        forget_shared(self.digest)
+        parser = LRParser(table_cache=self.directory)
+        parser.tables
+        return parser
+
+    def assertRegenerated(self):
+        parser = self.cached_parser()
+        self.assertEqual(parser.tables.origin, 'construidas')
+        # La entrada dañada se reemplazó por una válida
+        with open(self.path, 'rb') as file:
+            self.assertEqual(self.load(file.read()).action_entries, parser.tables.action_entries)
+
+    def test_round_trip(self):
+        tables = self.load(self.data)
+        fresh = LRParser(table_cache=None).tables
+        for name in lr_parser._TABLE_ARRAYS:
+            with self.subTest(array=name):
+                self.assertEqual(getattr(tables, name), getattr(fresh, name))
+        self.assertEqual(tables.action_entries, fresh.action_entries)
+        self.assertEqual(tables.goto_entries, fresh.goto_entries)
+        self.assertEqual(dump_lr_tables(tables, self.digest), self.data)
+
+    def test_tables_from_disk_parse_like_fresh_ones(self):
+        built = self.cached_parser()
+        self.assertEqual(built.tables.origin, 'construidas')
+        self.assertTrue(os.path.exists(self.path))
+        loaded = self.cached_parser()
+        self.assertEqual(loaded.tables.origin, 'caché en disco')
+
+        tokens = Lexer(CODE).tokenize()
+        expected = dump_ast(Parser(tokens).parse())
+        self.assertEqual(dump_ast(built.parse_ast(tokens)), expected)
+        self.assertEqual(dump_ast(loaded.parse_ast(tokens)), expected)
+        for source in (CODE, "x = (1\n", "print x\n", "x = y * * 2\n", "if a:\nb = 1\n"):
+            with self.subTest(source=source):
+                tokens = Lexer(source).tokenize()
+                self.assertEqual(loaded.parse(tokens), built.parse(tokens))
+                self.assertEqual(loaded.get_trace(), built.get_trace())
+
+    def test_every_truncation(self):
+        arrays = self.data.rindex(b'}') + 1
+        # Cabecera y final byte a byte; metadatos JSON y arrays, salteados
+        sizes = set(range(lr_parser._TABLES_HEADER.size + 1)) | set(range(len(self.data) - 32, len(self.data)))
+        sizes |= set(range(0, arrays, 61)) | set(range(arrays, len(self.data), 7))
+        for size in sorted(sizes):
+            with self.subTest(size=size):
+                with self.assertRaises(LRTableCacheError):
+                    self.load(self.data[:size])
+
+    def test_trailing_data(self):
+        with self.assertRaises(LRTableCacheError):
+            self.load(self.data + b'\0')
+
+    def test_other_grammar(self):
+        with self.assertRaises(LRTableCacheError):
+            load_lr_tables(self.data, grammar_hash(self.productions[:-1]))
+        with self.assertRaises(LRTableCacheError):
+            load_lr_tables(self.data, self.digest, self.productions[:-1])
+
+    def test_out_of_range_arrays(self):
+        corruptions = {
+            'action_base': lambda tables: len(tables.action_table),
+            'action_table': lambda tables: tables.state_count,
+            'default_reductions': lambda tables: -len(tables.production_lhs) - 1,
+            'goto_base': lambda tables: len(tables.goto_table),
+            'goto_table': lambda tables: tables.state_count,
+            'goto_defaults': lambda tables: -1,
+            'production_lhs': lambda tables: len(tables.nonterminals),
+        }
+        for name, value in corruptions.items():
+            with self.subTest(array=name):
+                tables = self.load(self.data)
+                column = getattr(tables, name)
+                corrupt = array('q', column)
+                corrupt[len(corrupt) // 2] = value(tables)
+                setattr(tables, name, corrupt)
+                with self.assertRaises(LRTableCacheError):
+                    self.load(dump_lr_tables(tables, self.digest))
+
+    def test_wrong_array_lengths(self):
+        for name in lr_parser._TABLE_ARRAYS:
+            with self.subTest(array=name):
+                tables = self.load(self.data)
+                setattr(tables, name, getattr(tables, name)[:-1])
+                with self.assertRaises(LRTableCacheError):
+                    self.load(dump_lr_tables(tables, self.digest))
+
+    def test_corrupt_bytes_raise_only_cache_errors(self):
+        rng = random.Random(5)
+        arrays = self.data.rindex(b'}') + 1
+        positions = list(range(lr_parser._TABLES_HEADER.size)) + rng.sample(range(len(self.data)), 300) \
+            + list(range(arrays, arrays + 40))
+        for position in positions:
+            for byte in (0x00, 0x7f, 0xff):
+                corrupt = self.data[:position] + bytes([byte]) + self.data[position + 1:]
+                with self.subTest(position=position, byte=byte):
+                    try:
+                        self.load(corrupt)
+                    except LRTableCacheError:
+                        pass
+
+    def test_damaged_entry_is_regenerated(self):
+        self.cached_parser()
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        arrays = data.rindex(b'}') + 1
+        for damaged in (b'', data[:len(data) // 2], data[:arrays] + b'z' + data[arrays + 1:],
+                        b'XLRT' + data[4:], data + b'\0'):
+            with self.subTest(size=len(damaged)):
+                with open(self.path, 'wb') as file:
+                    file.write(damaged)
+                self.assertRegenerated()
+
+    def test_cache_directory_is_private(self):
+        self.cached_parser()
+        if hasattr(os, 'getuid'):
+            self.assertEqual(stat.S_IMODE(os.stat(self.directory).st_mode) & 0o077, 0)
+
+    @unittest.skipUnless(hasattr(os, 'getuid'), "permisos POSIX")
+    def test_shared_directory_is_not_used(self):
+        self.cached_parser()
+        os.chmod(self.directory, 0o777)
+        self.addCleanup(os.chmod, self.directory, 0o700)
+        forget_shared(self.digest)
+        self.assertEqual(shared_lr_tables(self.productions, self.directory).origin, 'construidas')
+
+        os.unlink(self.path)
+        forget_shared(self.digest)
+        shared_lr_tables(self.productions, self.directory)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_default_directory_is_per_user(self):
+        with mock.patch.dict(os.environ, {'XDG_CACHE_HOME': '/cache/de/ana', 'LOCALAPPDATA': 'C:\\ana'}):
+            directory = lr_parser._user_cache_dir('lr-tables')
+        self.assertTrue(directory.startswith('/cache/de/ana' if os.name != 'nt' else 'C:\\ana'))
+        self.assertTrue(directory.endswith(os.path.join('analizador', 'lr-tables')))
+        self.assertNotEqual(os.path.commonpath([lr_parser.LR_TABLE_CACHE_DIR, tempfile.gettempdir()]),
+                            tempfile.gettempdir())
+
+
+class LRParseContextTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.lr = LRParser(table_cache=None)
+        cls.sources = [CODE, "x = (1\n", "print x\n"] + [f"v{i} = {i} * (w - {i})\n" * (i + 1) for i in range(5)]
+
+    def test_caller_context_keeps_its_parse(self):
+        context = self.lr.new_context()
+        self.assertTrue(self.lr.parse(Lexer(CODE).tokenize(), context))
+        trace, stack = self.lr.get_trace(context), self.lr.visualize_stack(context)
+        self.assertEqual(trace, self.lr.get_trace())
+
+        self.assertFalse(self.lr.parse(Lexer("x = (1\n").tokenize()))
+        self.assertNotEqual(self.lr.get_trace(), trace)
+        self.assertEqual(self.lr.get_trace(context), trace)
+        self.assertEqual(self.lr.visualize_stack(context), stack)
+
+    def test_concurrent_parses_keep_their_own_trace(self):
+        expected = []
+        for source in self.sources:
+            self.lr.parse(Lexer(source).tokenize())
+            expected.append((self.lr.get_trace(), self.lr.visualize_stack()))
+
+        def parse(index):
+            results = set()
+            for _ in range(20):
+                context = self.lr.new_context()
+                self.lr.parse(Lexer(self.sources[index]).iter_tokens(), context)
+                results.add((self.lr.get_trace(context), self.lr.visualize_stack(context)))
+            return results
+
+        with ThreadPoolExecutor(max_workers=len(self.sources)) as threads:
+            obtained = list(threads.map(parse, range(len(self.sources))))
+        self.assertEqual(obtained, [{result} for result in expected])
+
+    def test_parse_ast_with_context(self):
+        factory = HashConsingFactory()
+        context = self.lr.new_context(factory)
+        tokens = Lexer(CODE).tokenize()
+        self.assertEqual(dump_ast(self.lr.parse_ast(tokens, context=context)),
+                         dump_ast(Parser(tokens, factory=HashConsingFactory()).parse()))
+        self.assertIs(context.nodes, factory)
+        self.assertGreater(factory.stats()['reused'], 0)
+        with self.assertRaises(ValueError):
+            self.lr.parse_ast(tokens, factory, self.lr.new_context())
+
+
+if __name__ == "__main__":
+    unittest.main()
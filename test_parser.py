@@ -0,0 +1,334 @@
+"""
+Pruebas del Parser
+Los modos 'recursive', 'iterative' y 'lr' (y LRParser.parse_ast) construyen
+el mismo AST; re-análisis incremental (Parser.reparse) frente a un parse()
+completo de los tokens editados, con las líneas, spans y end_line de cada
+sentencia, y reutilización por identidad de las sentencias que no cambiaron
+
+Ejecutar con: python -m pytest test_parser.py
+(o python -m unittest test_parser)
+"""
+
+import random
+import sys
+import unittest
+
+from ast_serialization import dump_ast
+from lr_parser import LRParser
+from python_compiler import (BinaryOpNode, HashConsingFactory, IdentifierNode, Lexer, LexerError, NumberNode,
+                             Parser, ParserError, UnaryOpNode)
+
+
+MODES = ('recursive', 'iterative', 'lr')
+
+
+CODE = """x = 10
+y = -x + 2.5 * (x - 1)
+lista = [1, "dos", 3.0]
+if x >= 5:
+    print("mayor")
+    while x > 0:
+        x = x - 1
+        lista[0] = x
+elif x < 0:
+    print(-x)
+else:
+    z = 0
+for i in range(len(lista)):
+    print(lista[i] % 3)
+lista.agregar(y ** 2)
+fin = 1
+"""
+
+# Todas las clases de sentencia, expresiones usadas como sentencia,
+# precedencias, ** asociativo a derecha y menos unario
+CORPUS = [
+    CODE,
+    "",
+    "\n\n# solo comentarios\n\n",
+    "x = 1",
+    "a = 2 ** 3 ** 2\nb = -x ** 2\nc = - -x\nd = -2 ** -1\ne = (2 ** 3) ** 2\n",
+    "a = 1 - 2 - 3\nb = 2 * 3 ** 2 * 4 / 5 % 6\nc = 1 + 2 < 3 * 4\nd = x == -y\ne = x != (y >= z)\n",
+    "lista = [[], [1, [2, 'tres']], 4.5]\nlista[len(lista) - 1] = lista[0]\nprint(lista[-1])\n",
+    "x\nx.agregar(1, \"dos\", [3])\nx.metodo()\nprint(range(len(x)))\n",
+    "if a:\n    if b:\n        c = 1\n    elif d:\n        pass_ = 2\n    else:\n        e = 3\nelse:\n    f = 4\n",
+    "while i < 10:\n    for j in range(i):\n        while j:\n            j = j - 1\n    i = i + 1\nfin = i\n",
+    "if x:\n\n    # comentario\n\n    y = 1\n\n\nz = 2\n",
+]
+
+# Programas inválidos: todos los modos los rechazan en la misma línea
+INVALID = ["x = (1\n", "print x\n", "x = y * * 2\n", "if a:\nb = 1\n", "a = x < y < z\n",
+           "else:\n    x = 1\n", "x = [1, 2\n", "for 1 in x:\n    y = 1\n", "x = 1 +\n"]
+
+# Líneas que insertan o reemplazan las ediciones aleatorias
+SNIPPETS = ['x = 1', 'print(y)', 'if a < 2:', 'else:', 'elif b:', 'while c:', 'for i in range(3):',
+            'z = [1, 2]', '', '# c', 'y = (1 +', 'w = 2 ** 3', 'v[1] = 3', 'a + b', 'lista.agregar(1)']
+
+
+def parse_or_error(tokens, mode='recursive'):
+    """dump_ast del análisis completo, o el mensaje del ParserError"""
+    try:
+        return dump_ast(Parser(list(tokens), mode).parse())
+    except ParserError as error:
+        return str(error)
+
+
+def show(node):
+    """Expresión con paréntesis explícitos: (2 ** (3 ** 2))"""
+    if isinstance(node, BinaryOpNode):
+        return f"({show(node.left)} {node.operator} {show(node.right)})"
+    if isinstance(node, UnaryOpNode):
+        return f"({node.operator}{show(node.operand)})"
+    if isinstance(node, NumberNode):
+        return repr(node.value)
+    if isinstance(node, IdentifierNode):
+        return node.name
+    return type(node).__name__
+
+
+class ParserModesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.lr = LRParser(table_cache=None, trace='off')
+
+    def test_modes_build_the_same_ast(self):
+        for source in CORPUS:
+            tokens = Lexer(source).tokenize()
+            expected = dump_ast(Parser(tokens).parse())
+            for mode in MODES[1:]:
+                with self.subTest(source=source[:30], mode=mode):
+                    self.assertEqual(dump_ast(Parser(tokens, mode).parse()), expected)
+            with self.subTest(source=source[:30], mode='LRParser.parse_ast'):
+                self.assertEqual(dump_ast(self.lr.parse_ast(tokens)), expected)
+
+    def test_modes_with_hash_consing(self):
+        for source in CORPUS:
+            tokens = Lexer(source).tokenize()
+            expected = dump_ast(Parser(tokens, factory=HashConsingFactory()).parse())
+            for mode in MODES[1:]:
+                with self.subTest(source=source[:30], mode=mode):
+                    tree = Parser(tokens, mode, HashConsingFactory()).parse()
+                    self.assertEqual(dump_ast(tree), expected)
+
+    def test_lines_of_shared_nodes(self):
+        factory = HashConsingFactory()
+        tree = Parser(Lexer("x = 1\ny = x * 2\nz = x * 2 + 1\nprint(x * 2)\n").tokenize(), factory=factory).parse()
+        product = tree.statements[1].expression
+        self.assertIs(tree.statements[2].expression.left, product)
+        self.assertEqual(factory.lines_of(product), [2, 3, 4])
+        self.assertEqual(factory.lines_of(product.left), [2, 3, 4])
+        self.assertEqual(factory.lines_of(tree.statements[0].expression), [1, 3])
+        # Un nodo que la fábrica no internó no tiene apariciones
+        self.assertEqual(factory.lines_of(IdentifierNode('x', 2)), [])
+        self.assertEqual(factory.stats()['reused'], 7)
+
+    def test_token_iterators(self):
+        for source in CORPUS:
+            with self.subTest(source=source[:30]):
+                self.assertEqual(dump_ast(self.lr.parse_ast(Lexer(source).iter_tokens())),
+                                 dump_ast(Parser(Lexer(source).tokenize()).parse()))
+
+    def test_operator_associativity(self):
+        cases = {
+            "2 ** 3 ** 2": "(2 ** (3 ** 2))",
+            "-x ** 2": "(-(x ** 2))",
+            "- -x": "(-(-x))",
+            "-2 ** -1": "(-(2 ** (-1)))",
+            "(2 ** 3) ** 2": "((2 ** 3) ** 2)",
+            "1 - 2 - 3": "((1 - 2) - 3)",
+            "2 * 3 ** 2 * 4": "((2 * (3 ** 2)) * 4)",
+            "1 + 2 < 3 * 4": "((1 + 2) < (3 * 4))",
+            "x == -y": "(x == (-y))",
+        }
+        for expression, expected in cases.items():
+            tokens = Lexer(f"a = {expression}\n").tokenize()
+            for mode in MODES:
+                with self.subTest(expression=expression, mode=mode):
+                    self.assertEqual(show(Parser(tokens, mode).parse().statements[0].expression), expected)
+
+    def test_invalid_programs(self):
+        for source in INVALID:
+            tokens = Lexer(source).tokenize()
+            messages = {}
+            for mode in MODES:
+                with self.subTest(source=source, mode=mode):
+                    with self.assertRaises(ParserError) as raised:
+                        Parser(tokens, mode).parse()
+                    messages[mode] = str(raised.exception)
+            with self.subTest(source=source):
+                self.assertEqual(messages['iterative'], messages['recursive'])
+                # Las tablas LR no saben qué token se esperaba: solo coincide la línea
+                line = messages['recursive'].split(':')[0]
+                self.assertTrue(messages['lr'].startswith(line + ':'), messages['lr'])
+                self.assertFalse(self.lr.parse(tokens))
+
+
+def nested_blocks(depth):
+    """`depth` sentencias compuestas anidadas (if/else, while y for), un espacio de indentación por nivel"""
+    lines = []
+    for level in range(depth):
+        indent = " " * level
+        header = ("if x:", "while y > 0:", "for i in range(3):")[level % 3]
+        lines.append(f"{indent}{header}")
+        lines.append(f"{indent} v{level} = {level}")
+    lines.append(" " * depth + "print(-x ** 2)")
+    for level in reversed(range(0, depth, 3)):
+        lines.append(" " * level + "else:")
+        lines.append(" " * level + f" w{level} = 0")
+    return "\n".join(lines) + "\n"
+
+
+def nested_expression(depth):
+    """Paréntesis, listas, menos unario y ** anidados `depth` niveles"""
+    expression = "x"
+    for level in range(depth):
+        expression = ("({} + 1)", "[{}]", "-{}", "2 ** {}", "len({})")[level % 5].format(expression)
+    return f"a = {expression}\n"
+
+
+class NestingTest(unittest.TestCase):
+
+    def setUp(self):
+        limit = sys.getrecursionlimit()
+        self.addCleanup(sys.setrecursionlimit, limit)
+
+    def test_recursive_and_iterative_agree(self):
+        for depth in (1, 10, 60):
+            for source in (nested_blocks(depth), nested_expression(depth)):
+                tokens = Lexer(source).tokenize()
+                with self.subTest(depth=depth, source=source[:20]):
+                    expected = dump_ast(Parser(tokens).parse())
+                    self.assertEqual(dump_ast(Parser(tokens, 'iterative').parse()), expected)
+                    self.assertEqual(dump_ast(Parser(tokens, 'lr').parse()), expected)
+
+    def test_deep_nesting_in_constant_stack(self):
+        # Los modos iterativo y LR no usan la pila de Python: miles de
+        # niveles no agotan un límite de recursión mínimo
+        for source in (nested_blocks(2000), nested_expression(10000)):
+            tokens = Lexer(source).tokenize()
+            with self.subTest(source=source[:20]):
+                sys.setrecursionlimit(200)
+                try:
+                    iterative = Parser(tokens, 'iterative').parse()
+                    lr = Parser(tokens, 'lr').parse()
+                finally:
+                    sys.setrecursionlimit(10000)
+                self.assertEqual(dump_ast(iterative), dump_ast(lr))
+
+    def test_recursive_mode_reaches_the_recursion_limit(self):
+        tokens = Lexer(nested_expression(10000)).tokenize()
+        with self.assertRaises(RecursionError):
+            Parser(tokens).parse()
+
+
+class ReparseTest(unittest.TestCase):
+
+    def edit(self, source, new_source, mode='recursive'):
+        """(árbol anterior, sentencias anteriores, árbol re-analizado) tras relex + reparse"""
+        lexer = Lexer(source)
+        previous = Parser(lexer.tokenize(), mode).parse()
+        statements = list(previous.statements)
+        tokens = lexer.relex(new_source)
+        expected = parse_or_error(Lexer(new_source).tokenize(), mode)
+        try:
+            tree = Parser(tokens, mode).reparse(previous, lexer.last_edit)
+        except ParserError as error:
+            self.assertEqual(str(error), expected)
+            return previous, statements, None
+        self.assertEqual(dump_ast(tree), expected)
+        self.assertEqual(tree.end_line, new_source.count("\n") + 1)
+        return previous, statements, tree
+
+    def test_unchanged_source(self):
+        previous, _, tree = self.edit(CODE, CODE)
+        self.assertIs(tree, previous)
+
+    def test_edit_in_the_middle_reuses_the_rest(self):
+        _, statements, tree = self.edit(CODE, CODE.replace("lista = [1,", "lista = [0,"))
+        changed = [index for index, statement in enumerate(tree.statements) if statement is not statements[index]]
+        # La sentencia anterior también examinó el primer token re-analizado
+        self.assertEqual(changed, [1, 2])
+
+    def test_edit_inside_a_block_reuses_the_other_statements(self):
+        _, statements, tree = self.edit(CODE, CODE.replace("x = x - 1", "x = x - 2"))
+        self.assertEqual(len(tree.statements), len(statements))
+        for index, statement in enumerate(tree.statements):
+            if index != 3:
+                self.assertIs(statement, statements[index])
+        # El if se desciende: sus demás sentencias también se reutilizan
+        self.assertIs(tree.statements[3].then_block.statements[0], statements[3].then_block.statements[0])
+
+    def test_inserted_lines_shift_the_following_statements(self):
+        # Los spans y líneas desplazados se comparan en edit() contra el análisis completo
+        _, statements, tree = self.edit(CODE, "nueva = 1\notra = 2\n" + CODE)
+        self.assertEqual(len(tree.statements), len(statements) + 2)
+        # Relex re-analiza además la primera línea posterior a la edición
+        for new, old in zip(tree.statements[3:], statements[1:]):
+            self.assertIs(new, old)
+        self.assertEqual(tree.statements[-1].line, CODE.count("\n") + 2)
+
+    def test_structural_edits(self):
+        for old, new in (("else:\n    z = 0\n", ""), ("elif x < 0:\n    print(-x)\n", ""),
+                         ("fin = 1\n", "if fin:\n    fin = 2\n"), ("    print(\"mayor\")\n", "print(\"mayor\")\n"),
+                         ("x = 10\n", ""), ("fin = 1\n", ""), (CODE, "x = 1\n")):
+            with self.subTest(old=old, new=new):
+                self.edit(CODE, CODE.replace(old, new, 1))
+
+    def test_edits_that_break_the_program(self):
+        for old, new in (("    print(-x)\n", ""), ("if x >= 5:", "while x >= 5:"), ("fin = 1", "fin = (1")):
+            with self.subTest(old=old, new=new):
+                *_, tree = self.edit(CODE, CODE.replace(old, new, 1))
+                self.assertIsNone(tree)
+
+    def test_blank_and_comment_lines_only_shift_lines(self):
+        for old, new in (("if x >= 5:\n", "\n# nota\n\nif x >= 5:\n"), ("lista = [1", "\n\nlista = [1"),
+                         ("    print(\"mayor\")\n", "    print(\"mayor\")\n\n    # nota\n")):
+            with self.subTest(old=old, new=new):
+                self.edit(CODE, CODE.replace(old, new, 1))
+
+    def test_iterative_mode(self):
+        _, statements, tree = self.edit(CODE, CODE.replace("fin = 1", "fin = 2"), 'iterative')
+        self.assertIs(tree.statements[0], statements[0])
+
+    def test_random_edits(self):
+        rng = random.Random(11)
+        for sequence in range(40):
+            source = CODE
+            lexer = Lexer(source)
+            tree = Parser(lexer.tokenize()).parse()
+            for step in range(10):
+                lines = source.split("\n")
+                index = rng.randrange(len(lines) + 1)
+                indent = " " * rng.choice((0, 4, 8))
+                operation = rng.random()
+                if operation < 0.3 and index < len(lines):
+                    lines[index] = indent + rng.choice(SNIPPETS)
+                elif operation < 0.6:
+                    lines[index:index] = [indent + rng.choice(SNIPPETS) for _ in range(rng.randint(1, 2))]
+                elif operation < 0.8:
+                    del lines[index:index + rng.randint(1, 3)]
+                elif index < len(lines):
+                    lines[index] += rng.choice((" + 1", "1", " * (2)", ":"))
+                new_source = "\n".join(lines)
+                try:
+                    tokens = lexer.relex(new_source)
+                except LexerError:
+                    continue
+                source = new_source
+                expected = parse_or_error(tokens)
+                with self.subTest(sequence=sequence, step=step):
+                    try:
+                        if tree is None:
+                            tree = Parser(tokens).parse()
+                        else:
+                            tree = Parser(tokens).reparse(tree, lexer.last_edit)
+                        self.assertEqual(dump_ast(tree), expected)
+                    except ParserError as error:
+                        self.assertEqual(str(error), expected)
+                        # reparse() modifica el árbol anterior: tras un error se vuelve a empezar
+                        tree = None
+
+
+if __name__ == "__main__":
+    unittest.main()
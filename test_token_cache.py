@@ -0,0 +1,216 @@
+"""
+Pruebas de la Caché Persistente de Tokens
+Ida y vuelta load_tokens(dump_tokens(tokens)) frente a Lexer.tokenize,
+rechazo de entradas truncadas o corruptas, desalojo LRU y contadores
+
+Ejecutar con: python -m pytest test_token_cache.py
+(o python -m unittest test_token_cache)
+"""
+
+import os
+import tempfile
+import unittest
+
+from python_compiler import Lexer, LEXER_ENGINES, Token, TokenType
+from token_cache import CACHE_SUFFIX, TokenCache, TokenCacheError, dump_tokens, load_tokens
+
+
+# Enteros, floats, strings con escapes y no ASCII, comentarios e indentación
+CODE = """
+# comentario inicial
+x = 10
+y = 2.5 * (x - 1) + 12345678901234567890
+texto = "ñandú ✓ \\"citado\\""
+lista = [1, "dos", 3.0, []]
+if x >= 5:
+    print("mayor")
+    while x > 0:
+        x = x - 1
+elif x < 0:
+    print(-x)
+else:
+    z = 0
+for i in range(len(lista)):
+    print(lista[i] % 3)
+"""
+
+
+def described(tokens):
+    """Tipo, clase y valor, offset, línea y columna de cada token"""
+    return [(token.type, token.value.__class__, token.value, token.offset, token.line, token.column)
+            for token in tokens]
+
+
+class RoundTripTest(unittest.TestCase):
+
+    def assertRoundTrip(self, source, engine='regex'):
+        tokens = Lexer(source, engine).tokenize()
+        loaded = load_tokens(dump_tokens(tokens), source)
+        self.assertEqual(described(loaded), described(tokens))
+        return loaded
+
+    def test_program(self):
+        for engine in LEXER_ENGINES:
+            with self.subTest(engine=engine):
+                self.assertRoundTrip(CODE, engine)
+
+    def test_empty_and_short_sources(self):
+        for source in ("", "\n", "# solo un comentario\n", "x", "x = 1"):
+            with self.subTest(source=source):
+                self.assertRoundTrip(source)
+
+    def test_wide_columns(self):
+        # Deltas de offset y cantidad de valores que no caben en un byte
+        source = "x = 1\n" + " " * 70000 + "\n" + "".join(f"v{i} = {i}\n" for i in range(300))
+        self.assertRoundTrip(source)
+
+    def test_tokens_without_offset_are_rejected(self):
+        with self.assertRaises(TokenCacheError):
+            dump_tokens([Token(TokenType.IDENTIFIER, 'y', 1, 1)])
+        tokens = Lexer("a = 1\nb = 2\n").tokenize()
+        with self.assertRaises(TokenCacheError):
+            dump_tokens(tokens[::-1])
+
+
+class RejectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.source = "x = 12345\ny = 2.5\nz = \"ñandú\"\n"
+        self.data = dump_tokens(Lexer(self.source).tokenize())
+
+    def test_every_truncation(self):
+        for size in range(len(self.data)):
+            with self.subTest(size=size):
+                with self.assertRaises(TokenCacheError):
+                    load_tokens(self.data[:size], self.source)
+
+    def test_trailing_data(self):
+        with self.assertRaises(TokenCacheError):
+            load_tokens(self.data + b'\0', self.source)
+
+    def test_corrupt_integer_literal(self):
+        data = self.data.replace(b'12345', b'z2345')
+        with self.assertRaises(TokenCacheError):
+            load_tokens(data, self.source)
+
+    def test_invalid_utf8_in_string(self):
+        data = bytearray(self.data)
+        data[data.index('ñandú'.encode('utf-8'))] = 0xff
+        with self.assertRaises(TokenCacheError):
+            load_tokens(bytes(data), self.source)
+
+    def test_corrupt_bytes_raise_only_cache_errors(self):
+        # Cada byte reemplazado por varios valores: o se rechaza con
+        # TokenCacheError o se obtienen tokens utilizables, nunca otra excepción
+        for position in range(len(self.data)):
+            for byte in (0x00, 0x01, 0x03, 0x05, 0x7a, 0x7f, 0x80, 0xff):
+                corrupt = self.data[:position] + bytes([byte]) + self.data[position + 1:]
+                with self.subTest(position=position, byte=byte):
+                    try:
+                        described(load_tokens(corrupt, self.source))
+                    except TokenCacheError:
+                        pass
+
+
+class TokenCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, cache, source):
+        return os.path.join(self.directory.name, cache.key(source) + CACHE_SUFFIX)
+
+    def test_hit_returns_the_same_tokens(self):
+        cache = TokenCache(self.directory.name)
+        first = cache.tokenize(CODE)
+        second = cache.tokenize(CODE)
+        self.assertEqual(described(second), described(Lexer(CODE).tokenize()))
+        self.assertEqual(described(first), described(second))
+
+    def test_counters(self):
+        cache = TokenCache(self.directory.name)
+        cache.tokenize(CODE)
+        cache.tokenize(CODE)
+        cache.tokenize(CODE)
+        self.assertIsNone(cache.get("otra = 1\n"))
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (2, 2, 0))
+        self.assertEqual(stats['hit_rate'], 0.5)
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['bytes'], os.path.getsize(self.path(cache, CODE)))
+
+    def test_engines_have_separate_entries(self):
+        cache = TokenCache(self.directory.name)
+        cache.tokenize(CODE, 'regex')
+        self.assertIsNone(cache.get(CODE, 'char'))
+        self.assertNotEqual(cache.key(CODE, 'regex'), cache.key(CODE, 'char'))
+
+    def test_corrupt_entry_is_a_miss_and_is_removed(self):
+        source = "x = 12345\ny = \"ñandú\"\n"
+        for old, new in ((b'12345', b'z2345'), ('ñandú'.encode('utf-8')[:1], b'\xff'), (b'PTOK', b'XTOK')):
+            with self.subTest(corrupt=new):
+                cache = TokenCache(self.directory.name)
+                cache.tokenize(source)
+                path = self.path(cache, source)
+                with open(path, 'rb') as file:
+                    data = file.read()
+                with open(path, 'wb') as file:
+                    file.write(data.replace(old, new, 1))
+
+                self.assertIsNone(cache.get(source))
+                self.assertEqual(cache.misses, 2)
+                self.assertFalse(os.path.exists(path))
+                self.assertEqual(len(cache), 0)
+                # La siguiente compilación vuelve a analizar y a guardar
+                self.assertEqual(described(cache.tokenize(source)), described(Lexer(source).tokenize()))
+                self.assertTrue(os.path.exists(path))
+                cache.clear()
+
+    def test_tokens_without_offset_are_not_stored(self):
+        cache = TokenCache(self.directory.name)
+        cache.put("y", [Token(TokenType.IDENTIFIER, 'y', 1, 1)])
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_lru_eviction(self):
+        sources = [f"v{i} = {i}\n" for i in range(3)]
+        size = len(dump_tokens(Lexer(sources[0]).tokenize()))
+        cache = TokenCache(self.directory.name, max_bytes=2 * size)
+        cache.tokenize(sources[0])
+        cache.tokenize(sources[1])
+        # Un acierto hace de la primera la más recientemente usada
+        self.assertIsNotNone(cache.get(sources[0]))
+        cache.tokenize(sources[2])
+
+        self.assertEqual(cache.evictions, 1)
+        self.assertFalse(os.path.exists(self.path(cache, sources[1])))
+        self.assertTrue(os.path.exists(self.path(cache, sources[0])))
+        self.assertTrue(os.path.exists(self.path(cache, sources[2])))
+        self.assertEqual(cache.total_bytes, 2 * size)
+
+    def test_lru_order_survives_reopening(self):
+        sources = [f"v{i} = {i}\n" for i in range(3)]
+        cache = TokenCache(self.directory.name)
+        for source in sources:
+            cache.tokenize(source)
+        # La instancia nueva ordena las entradas por mtime
+        for age, source in enumerate((sources[1], sources[2], sources[0])):
+            os.utime(self.path(cache, source), ns=(10 ** 9 * (age + 1),) * 2)
+        size = os.path.getsize(self.path(cache, sources[0]))
+
+        reopened = TokenCache(self.directory.name, max_bytes=3 * size)
+        self.assertEqual(len(reopened), 3)
+        reopened.put("nueva = 1\n", Lexer("nueva = 1\n").tokenize())
+        self.assertFalse(os.path.exists(self.path(cache, sources[1])))
+        self.assertTrue(os.path.exists(self.path(cache, sources[0])))
+
+    def test_entry_larger_than_limit_is_not_stored(self):
+        cache = TokenCache(self.directory.name, max_bytes=16)
+        cache.tokenize(CODE)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.evictions, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,334 @@
+"""
+Caché Persistente de Tokens
+Guarda en disco la secuencia de tokens de cada fuente, direccionada por su
+contenido (hash de la fuente + versión del Lexer), para que recompilar una
+fuente ya vista no tenga que ejecutar Lexer.tokenize
+"""
+
+import gc
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections import OrderedDict
+from itertools import accumulate, repeat
+from typing import List, Optional
+
+from python_compiler import Lexer, LineIndex, Token, TOKEN_TYPES_BY_CODE, LEXER_VERSION
+
+
+# ============= FORMATO BINARIO =============
+#
+# Cabecera: magic, versión del formato, nº de tokens, nº de valores y ancho
+# (1, 2 o 4 bytes) de las columnas de deltas de offset y de índices de valor.
+# Columnas: códigos de tipo, deltas de offset, índices de valor y la tabla
+# de valores (etiquetas, longitudes y un blob UTF-8 con sus textos).
+
+CACHE_MAGIC = b'PTOK'
+CACHE_FORMAT_VERSION = 1
+CACHE_SUFFIX = '.tok'
+
+_HEADER = struct.Struct('<4sBIIBB')
+_ARRAY_CODES = {1: 'B', 2: 'H', 4: 'I'}
+
+_VALUE_NONE, _VALUE_INT, _VALUE_FLOAT, _VALUE_STR = range(4)
+
+
+class TokenCacheError(Exception):
+    """Entrada de caché inválida o de otro formato"""
+    pass
+
+
+def _narrowest_array(values) -> array:
+    """Empaqueta enteros no negativos en el array más angosto que los admite"""
+    largest = max(values, default=0)
+    for width, code in _ARRAY_CODES.items():
+        if largest < 1 << (8 * width):
+            return array(code, values)
+    raise TokenCacheError("Valor demasiado grande para el formato de caché")
+
+
+def _little_endian(column: array) -> bytes:
+    if sys.byteorder == 'big' and column.itemsize > 1:
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _read_column(data, position: int, code: str, count: int):
+    column = array(code)
+    end = position + column.itemsize * count
+    if end > len(data):
+        raise TokenCacheError("Entrada de caché truncada")
+    column.frombytes(data[position:end])
+    if sys.byteorder == 'big' and column.itemsize > 1:
+        column.byteswap()
+    return column, end
+
+
+def dump_tokens(tokens: List[Token]) -> bytes:
+    """Serializa una secuencia de tokens del Lexer al formato compacto de la caché"""
+    types = bytes(token.type.value for token in tokens)
+    offsets = [token.offset for token in tokens]
+    deltas = [current - previous for previous, current in zip([0] + offsets, offsets)]
+    # Un token sin offset (-1, construido a mano) o fuera de orden daría un
+    # delta negativo que el formato no representa
+    if deltas and min(deltas) < 0:
+        raise TokenCacheError("Los tokens deben tener offsets no negativos y en orden creciente")
+    deltas = _narrowest_array(deltas)
+
+    value_ids = {}
+    ids = _narrowest_array([value_ids.setdefault((value.__class__, value), len(value_ids))
+                            for value in (token.value for token in tokens)])
+    tags = bytearray()
+    texts = []
+    for value_class, value in value_ids:
+        if value is None:
+            tags.append(_VALUE_NONE)
+            texts.append(b'')
+        elif value_class is str:
+            tags.append(_VALUE_STR)
+            texts.append(value.encode('utf-8', 'surrogatepass'))
+        else:
+            tags.append(_VALUE_FLOAT if value_class is float else _VALUE_INT)
+            texts.append(repr(value).encode('ascii'))
+    lengths = array('I', map(len, texts))
+
+    header = _HEADER.pack(CACHE_MAGIC, CACHE_FORMAT_VERSION, len(tokens), len(value_ids),
+                          deltas.itemsize, ids.itemsize)
+    return b''.join((header, types, _little_endian(deltas), _little_endian(ids),
+                     bytes(tags), _little_endian(lengths), b''.join(texts)))
+
+
+def load_tokens(data: bytes, source) -> List[Token]:
+    """
+    Reconstruye la secuencia de tokens serializada con dump_tokens()
+
+    Args:
+        data: Contenido de la entrada de caché
+        source: Fuente de la que provienen los tokens; se usa para construir
+            el LineIndex que calcula línea y columna bajo demanda
+    """
+    if len(data) < _HEADER.size:
+        raise TokenCacheError("Entrada de caché truncada")
+    magic, version, count, value_count, delta_width, id_width = _HEADER.unpack_from(data)
+    if magic != CACHE_MAGIC or version != CACHE_FORMAT_VERSION:
+        raise TokenCacheError("Formato de caché desconocido")
+    if delta_width not in _ARRAY_CODES or id_width not in _ARRAY_CODES:
+        raise TokenCacheError("Ancho de columna inválido")
+
+    position = _HEADER.size
+    types, position = _read_column(data, position, 'B', count)
+    deltas, position = _read_column(data, position, _ARRAY_CODES[delta_width], count)
+    ids, position = _read_column(data, position, _ARRAY_CODES[id_width], count)
+    tags, position = _read_column(data, position, 'B', value_count)
+    lengths, position = _read_column(data, position, 'I', value_count)
+
+    values = []
+    try:
+        for tag, length in zip(tags, lengths):
+            text = data[position:position + length]
+            position += length
+            if tag == _VALUE_NONE:
+                values.append(None)
+            elif tag == _VALUE_STR:
+                values.append(text.decode('utf-8', 'surrogatepass'))
+            elif tag == _VALUE_FLOAT:
+                values.append(float(text))
+            elif tag == _VALUE_INT:
+                values.append(int(text))
+            else:
+                raise TokenCacheError(f"Etiqueta de valor desconocida: {tag}")
+    except (ValueError, UnicodeDecodeError):
+        raise TokenCacheError("Valor corrupto en la entrada de caché") from None
+    if position != len(data):
+        raise TokenCacheError("Entrada de caché con datos sobrantes")
+
+    try:
+        token_types = [TOKEN_TYPES_BY_CODE[code] for code in types]
+        token_values = [values[index] for index in ids]
+    except (KeyError, IndexError):
+        raise TokenCacheError("Entrada de caché corrupta")
+
+    # Los tokens no forman ciclos: se pausa el recolector mientras se crean en bloque
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return list(map(Token, token_types, token_values, repeat(0), repeat(0),
+                        accumulate(deltas), repeat(LineIndex(source))))
+    finally:
+        if collecting:
+            gc.enable()
+
+
+# ============= CACHÉ EN DISCO =============
+
+class TokenCache:
+    """
+    Caché de tokens en disco, direccionada por contenido y acotada en tamaño
+
+    Cada entrada es un archivo `<hash>.tok` cuyo nombre es el SHA-256 de la
+    versión del Lexer, el motor y la fuente. Al superar `max_bytes` se
+    eliminan las entradas usadas hace más tiempo (LRU, según su mtime, que se
+    actualiza en cada acierto). Los contadores `hits`, `misses` y `evictions`
+    son de esta instancia.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+        # {nombre_archivo: tamaño}, de la entrada menos a la más recientemente usada
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        existing = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(CACHE_SUFFIX) and entry.is_file():
+                stat = entry.stat()
+                existing.append((stat.st_mtime_ns, entry.name, stat.st_size))
+        for _, name, size in sorted(existing):
+            self._entries[name] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def key(source, engine: str = 'regex') -> str:
+        """Clave de la fuente: SHA-256 de versión del Lexer, motor y contenido"""
+        digest = hashlib.sha256(f"{LEXER_VERSION}:{CACHE_FORMAT_VERSION}:{engine}\0".encode('ascii'))
+        digest.update(source.encode('utf-8', 'surrogatepass') if isinstance(source, str) else source)
+        return digest.hexdigest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def get(self, source, engine: str = 'regex') -> Optional[List[Token]]:
+        """Retorna los tokens guardados de la fuente, o None si no están en caché"""
+        name = self.key(source, engine) + CACHE_SUFFIX
+        try:
+            with open(self._path(name), 'rb') as file:
+                data = file.read()
+            tokens = load_tokens(data, source)
+        except FileNotFoundError:
+            self._forget(name)
+            self.misses += 1
+            return None
+        except TokenCacheError:
+            self._remove(name)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        try:
+            os.utime(self._path(name))
+        except OSError:
+            pass
+        if name not in self._entries:
+            self._total_bytes += len(data)
+        self._entries[name] = len(data)
+        self._entries.move_to_end(name)
+        return tokens
+
+    def put(self, source, tokens: List[Token], engine: str = 'regex'):
+        """Guarda los tokens de la fuente y aplica el límite de tamaño"""
+        name = self.key(source, engine) + CACHE_SUFFIX
+        try:
+            data = dump_tokens(tokens)
+        except TokenCacheError:
+            # Tokens que el formato no representa: simplemente no se guardan
+            return
+        if len(data) > self.max_bytes:
+            return
+
+        # Escritura atómica: otro proceso nunca lee una entrada a medio escribir
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temporary, self._path(name))
+        except BaseException:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+
+        self._forget(name)
+        self._entries[name] = len(data)
+        self._total_bytes += len(data)
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def tokenize(self, source, engine: str = 'regex') -> List[Token]:
+        """
+        Retorna los tokens de la fuente desde la caché; en un fallo ejecuta
+        Lexer.tokenize y guarda el resultado
+        """
+        tokens = self.get(source, engine)
+        if tokens is None:
+            tokens = Lexer(source, engine).tokenize()
+            self.put(source, tokens, engine)
+        return tokens
+
+    def _forget(self, name: str):
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _remove(self, name: str):
+        self._forget(name)
+        try:
+            os.unlink(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        """Elimina todas las entradas de la caché"""
+        for name in list(self._entries):
+            self._remove(name)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Contadores de la caché"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._total_bytes,
+        }
+
+
+# Ejemplo de uso
+if __name__ == "__main__":
+    code = """
+# Programa de prueba
+x = 10
+y = 20
+if x < y:
+    print("x es menor")
+"""
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TokenCache(directory)
+        first = cache.tokenize(code)
+        second = cache.tokenize(code)
+
+        print("=" * 80)
+        print("CACHÉ PERSISTENTE DE TOKENS")
+        print("=" * 80)
+        print(f"Tokens: {len(second)}   Idénticos: {'SÍ' if first == second else 'NO'}")
+        for name, value in cache.stats().items():
+            print(f"  {name:<10} {value}")